@@ -0,0 +1,242 @@
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics_sink import LOG_FORMATS
+from results_store import DEFAULT_DB
+
+LEGACY_CONTROLLERS = ('csp', 'static')
+# Policy controller_harness (nama di policies.POLICIES); tidak diimpor di sini agar proses induk tidak memuat SUMO
+HARNESS_CONTROLLERS = ('fixed_time', 'csp_cycle', 'max_pressure', 'actuated')
+CONTROLLERS = LEGACY_CONTROLLERS + HARNESS_CONTROLLERS
+# Pemilih rencana hijau csp: solver analitik saja, atau mpc_planner.MPCPlanner (rollout SUMO)
+PLANNERS = ('analytic', 'mpc')
+BASE_PORT = 8873
+
+
+def build_grid(controllers, seeds, scales, steps):
+    """Every (controller, seed, demand scale, step budget) combination, numbered."""
+    specs = []
+    for index, (controller, seed, scale, budget) in enumerate(
+            itertools.product(controllers, seeds, scales, steps)):
+        if controller not in CONTROLLERS:
+            raise ValueError(f"Unknown controller '{controller}', expected one of {CONTROLLERS}")
+        specs.append({
+            'run': index,
+            'controller': controller,
+            'seed': seed,
+            'scale': scale,
+            'steps': budget,
+        })
+    return specs
+
+
+def run_controller(name, env, steps, fast_forward=False, weights=None, log_path=None, log_formats=('csv',),
+                   results_store=None, live_metrics=None, planner='analytic'):
+    """
+    Runs controller `name` (CONTROLLERS) on `env` for `steps` steps and returns its summary().
+    `weights` overrides the CSP cost weights; log_path None keeps the controller's own log file.
+    planner='mpc' lets the CSP pick among its best analytic plans with SUMO rollouts (mpc_planner).
+    """
+    from controller_harness import ControllerHarness
+    from mpc_planner import MPCPlanner
+    from policies import POLICIES
+    from statis import TrafficLightStatic
+    from traffic_light_csp import TrafficLightCSP
+
+    if planner not in PLANNERS:
+        raise ValueError(f"Unknown planner '{planner}', expected one of {PLANNERS}")
+    if planner != 'analytic' and name != 'csp':
+        raise ValueError(f"The {planner} planner only applies to the csp controller")
+    if name == 'csp':
+        controller = TrafficLightCSP(env=env, fast_forward=fast_forward,
+                                     planner=MPCPlanner(backend=env.backend) if planner == 'mpc' else None)
+        if weights:
+            controller.set_weights(weights)
+    elif name in HARNESS_CONTROLLERS:
+        if fast_forward:
+            raise ValueError(f"{name} decides every step and cannot fast-forward")
+        controller = ControllerHarness(POLICIES[name](), env)
+    elif name == 'static':
+        controller = TrafficLightStatic(env=env, fast_forward=fast_forward)
+        controller.max_simulation_steps = steps
+    else:
+        raise ValueError(f"Unknown controller '{name}', expected one of {CONTROLLERS}")
+    if log_path is not None:
+        controller.log_path = log_path
+    controller.log_formats = log_formats
+    controller.results_store = results_store
+    controller.live_metrics = live_metrics
+    if name == 'csp':
+        return controller.run_simulation(total_steps=steps)
+    if name == 'static':
+        return controller.run()
+    return controller.run(steps)
+
+
+def run_one(spec, out_dir, backend='libsumo', log_formats=('csv',), profile=False, metrics_mode='traci',
+            fast_forward=False, extra_sumo_args=(), warmup_steps=0, config_file=None, store_path=None,
+            live=False, observation='lanes'):
+    """
+    Runs one headless simulation in the current process and returns its result row.
+    A 'weights' dict in `spec` overrides the CSP cost weights of that run and a 'planner'
+    (PLANNERS) its plan selection; warmup_steps > 0
+    starts from the cached warm-up checkpoint of the run's seed and scale, config_file replaces
+    intersection.sumocfg (e.g. a demand_generator scenario). With store_path the run is also
+    recorded in that results_store database; with live its per-step metrics are published to
+    live_metrics.live_path(<label>). observation='detectors' feeds the CSP from the e1 induction
+    loops. HARNESS_CONTROLLERS run their policy in controller_harness.
+    """
+    # Import di dalam worker agar proses induk tidak perlu memuat SUMO
+    from instrumentation import Profiler
+    from live_metrics import LiveMetricsWriter, live_path
+    from results_store import ResultsStore
+    from sumoenv import SumoEnv
+
+    label = f"{spec['controller']}_{spec['run']:04d}"
+    # Tabel profil masuk ke <label>.log, Chrome trace ke <label>_trace.json
+    profiler = Profiler(trace_path=os.path.join(out_dir, f"{label}_trace.json")) if profile else None
+    env = SumoEnv(
+        label=label,
+        gui_f=False,
+        backend=backend,
+        port=BASE_PORT + spec['run'],
+        sumo_args=['--seed', str(spec['seed']), '--scale', str(spec['scale']),
+                   '--no-step-log', 'true', '--no-warnings', 'true'] + list(extra_sumo_args),
+        profiler=profiler,
+        metrics_mode=metrics_mode, # 'tripinfo': <label>_tripinfo.xml dan <label>_detectors.xml di out_dir
+        output_dir=out_dir,
+        warm_start=warmup_steps > 0,
+        warmup_steps=warmup_steps,
+        config_file=config_file,
+        observation=observation,
+    )
+    log_path = os.path.join(out_dir, f"{label}_queue_length.txt")
+    stdout_path = os.path.join(out_dir, f"{label}.log")
+
+    store = ResultsStore(store_path) if store_path else None
+    live_writer = LiveMetricsWriter(live_path(label)) if live else None
+    try:
+        with open(stdout_path, 'w') as out, contextlib.redirect_stdout(out):
+            summary = run_controller(spec['controller'], env, spec['steps'], fast_forward, spec.get('weights'),
+                                     log_path, log_formats, store, live_writer, spec.get('planner', 'analytic'))
+    finally:
+        if store is not None:
+            store.close()
+        if live_writer is not None:
+            live_writer.close()
+
+    row = dict(spec)
+    summary = dict(summary)
+    # 'steps' tetap anggaran dari spec (kunci pengelompokan tabel); langkah yang benar-benar disimulasikan terpisah
+    row['simulated_steps'] = summary.pop('steps')
+    row.update(summary)
+    row['log_path'] = log_path
+    return row
+
+
+def run_grid(specs, out_dir='runs', workers=None, backend='libsumo', log_formats=('csv',), profile=False,
+             metrics_mode='traci', fast_forward=False, extra_sumo_args=(), warmup_steps=0, config_file=None,
+             store_path=None, live=False, observation='lanes'):
+    """Fans the runs out over a process pool; rows come back in spec order."""
+    os.makedirs(out_dir, exist_ok=True)
+    out_dir = os.path.abspath(out_dir)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_one, spec, out_dir, backend, log_formats, profile, metrics_mode, fast_forward,
+                               extra_sumo_args, warmup_steps, config_file, store_path, live, observation)
+                   for spec in specs]
+        return [future.result() for future in futures]
+
+
+def write_table(rows, path):
+    if not rows:
+        return
+    with open(path, 'w', newline='') as f:
+        # Kolom per pendekat (mode tripinfo) bisa berbeda antar run
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run controller sweeps in parallel (headless).")
+    parser.add_argument('--controllers', nargs='+', default=list(LEGACY_CONTROLLERS), choices=CONTROLLERS,
+                        help=f"Default: {' '.join(LEGACY_CONTROLLERS)}; policies {', '.join(HARNESS_CONTROLLERS)} "
+                             f"run in controller_harness.py")
+    parser.add_argument('--seeds', nargs='+', type=int, default=[23])
+    parser.add_argument('--scales', nargs='+', type=float, default=[1.0], help="SUMO --scale demand multipliers")
+    parser.add_argument('--steps', nargs='+', type=int, default=[500])
+    parser.add_argument('--workers', type=int, default=None, help="Default: number of CPUs")
+    parser.add_argument('--backend', default='libsumo', choices=('libsumo', 'traci'))
+    parser.add_argument('--out-dir', default='runs')
+    parser.add_argument('--log-formats', nargs='+', default=['csv'], choices=LOG_FORMATS)
+    parser.add_argument('--profile', action='store_true',
+                        help="Per-stage/TraCI timing table in each run's .log plus a Chrome trace JSON")
+    parser.add_argument('--metrics', default='traci', choices=('traci', 'tripinfo'),
+                        help="tripinfo: trip KPIs from SUMO's tripinfo output instead of per-vehicle polling")
+    parser.add_argument('--fast-forward', action='store_true',
+                        help="Advance whole signal phases in one simulation call (needs --metrics tripinfo)")
+    parser.add_argument('--weights', default=None, help="CSP weight profile JSON written by weight_tuner.py")
+    parser.add_argument('--planner', default='analytic', choices=PLANNERS,
+                        help="mpc: the csp runs pick among their best plans with SUMO rollouts (mpc_planner.py)")
+    parser.add_argument('--warm-start', type=int, default=0, metavar='STEPS',
+                        help="Start every run from a cached checkpoint taken after STEPS warm-up seconds")
+    parser.add_argument('--config', default=None,
+                        help="SUMO config to run instead of intersection.sumocfg (see demand_generator.py)")
+    parser.add_argument('--store', default=DEFAULT_DB,
+                        help="results_store SQLite file every run is recorded in (read by perbandingan.py)")
+    parser.add_argument('--no-store', action='store_true', help="Do not record the runs in the results store")
+    parser.add_argument('--live', action='store_true',
+                        help="Publish per-step metrics of every run to a shared-memory ring (live_metrics.py --label <label>)")
+    parser.add_argument('--observation', default='lanes', choices=('lanes', 'detectors'),
+                        help="detectors: the CSP counts from the e1 induction loops (detector.add.xml)")
+    args = parser.parse_args(argv)
+    if args.fast_forward and args.metrics != 'tripinfo':
+        parser.error("--fast-forward needs --metrics tripinfo")
+    if args.fast_forward and set(args.controllers) & set(HARNESS_CONTROLLERS):
+        parser.error("--fast-forward only applies to the csp and static controllers")
+    if args.planner != 'analytic' and 'csp' not in args.controllers:
+        parser.error(f"--planner {args.planner} only applies to the csp controller")
+    if args.observation == 'detectors':
+        if args.fast_forward:
+            parser.error("--observation detectors cannot be combined with --fast-forward")
+        if set(args.controllers) & set(HARNESS_CONTROLLERS):
+            parser.error("--observation detectors only applies to the csp controller")
+
+    specs = build_grid(args.controllers, args.seeds, args.scales, args.steps)
+    if args.weights:
+        with open(args.weights) as f:
+            weights = json.load(f)['weights']
+        for spec in specs:
+            if spec['controller'] == 'csp':
+                spec['weights'] = weights
+    if args.planner != 'analytic':
+        for spec in specs:
+            if spec['controller'] == 'csp':
+                spec['planner'] = args.planner
+    start = time.perf_counter()
+    rows = run_grid(specs, out_dir=args.out_dir, workers=args.workers, backend=args.backend,
+                    log_formats=tuple(args.log_formats), profile=args.profile, metrics_mode=args.metrics,
+                    fast_forward=args.fast_forward, warmup_steps=args.warm_start,
+                    config_file=args.config and os.path.abspath(args.config),
+                    store_path=None if args.no_store else os.path.abspath(args.store), live=args.live,
+                    observation=args.observation)
+    elapsed = time.perf_counter() - start
+
+    table_path = os.path.join(args.out_dir, 'results.csv')
+    write_table(rows, table_path)
+    print(f"{len(rows)} runs finished in {elapsed:.2f}s, results written to {table_path}")
+    for row in rows:
+        print(f"  {row['controller']:>12} seed={row['seed']} scale={row['scale']} steps={row['steps']}: "
+              f"arrived={row['vehicles_arrived']}, avg wait={row['avg_waiting_time']:.2f}s, "
+              f"avg travel={row['avg_travel_time']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+End-to-end simulation throughput (simulated steps per wall-clock second) of the
+static and CSP controllers and of the controller_harness policies at several
+demand scales.
+"""
+import contextlib
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from harness import SkipBenchmark, parametrize
+
+STEPS = 1000
+SCALES = [1.0, 2.0, 4.0]
+
+
+def run_controller(env, controller, steps, out_dir, **options):
+    """
+    Runs one controller headless on `env` with its output silenced; returns the summary dict.
+    `options` go to the controller constructor (fast_forward, lookahead, ...) or, for a
+    policies.POLICIES name, to the policy. Raises if the run stopped before `steps`: the
+    controllers catch and print their own errors, and a failed run must not be timed as a result.
+    """
+    from controller_harness import ControllerHarness
+    from policies import POLICIES
+    from statis import TrafficLightStatic
+    from traffic_light_csp import TrafficLightCSP
+
+    log_path = os.path.join(out_dir, f"{env.label}_queue_length.txt")
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if controller in POLICIES:
+            sim = ControllerHarness(POLICIES[controller](**options), env=env)
+            sim.log_path = log_path
+            summary = sim.run(steps)
+        elif controller == 'csp':
+            sim = TrafficLightCSP(env=env, **options)
+            sim.log_path = log_path
+            summary = sim.run_simulation(total_steps=steps)
+        else:
+            sim = TrafficLightStatic(env=env, **options)
+            sim.max_simulation_steps = steps
+            sim.log_path = log_path
+            summary = sim.run()
+    if summary['steps'] < steps:
+        raise RuntimeError(f"{controller} stopped at step {summary['steps']} of {steps} (traceback above)")
+    return summary
+
+
+def sumo_args(scale):
+    return ['--scale', str(scale), '--no-step-log', 'true', '--no-warnings', 'true']
+
+
+@parametrize('controller', ['static', 'csp'])
+@parametrize('scale', SCALES)
+@parametrize('backend', ['libsumo'])
+def bench_end_to_end(benchmark, controller, scale, backend):
+    from sumoenv import SumoEnv
+
+    env = SumoEnv(label=f'bench_{controller}', backend=backend, sumo_args=sumo_args(scale))
+    with tempfile.TemporaryDirectory() as out_dir:
+        summary = benchmark.pedantic(run_controller, args=(env, controller, STEPS, out_dir), rounds=1)
+
+    benchmark.extra_info.update({
+        'backend': env.backend,
+        'steps': summary['steps'],
+        'steps_per_second': summary['steps_per_second'],
+        'vehicles_arrived': summary['vehicles_arrived'],
+        'avg_waiting_time': summary['avg_waiting_time'],
+    })
+
+
+@parametrize('policy', ['fixed_time', 'csp_cycle', 'max_pressure', 'actuated'])
+@parametrize('scale', SCALES)
+def bench_policies(benchmark, policy, scale):
+    """controller_harness policies, which decide every step; wall-clock and delay side by side."""
+    from sumoenv import SumoEnv
+
+    env = SumoEnv(label=f'bench_{policy}', sumo_args=sumo_args(scale))
+    with tempfile.TemporaryDirectory() as out_dir:
+        summary = benchmark.pedantic(run_controller, args=(env, policy, STEPS, out_dir), rounds=1)
+
+    benchmark.extra_info.update({
+        'steps_per_second': summary['steps_per_second'],
+        'vehicles_arrived': summary['vehicles_arrived'],
+        'avg_waiting_time': summary['avg_waiting_time'],
+        'avg_travel_time': summary['avg_travel_time'],
+    })
+
+
+@parametrize('observation', ['lanes', 'detectors'])
+@parametrize('scale', SCALES)
+def bench_observation(benchmark, observation, scale):
+    """CSP fed from lane subscriptions or from the e1 induction loops; per-step read cost of each."""
+    from instrumentation import Profiler
+    from sumoenv import SumoEnv
+
+    profiler = Profiler()
+    with tempfile.TemporaryDirectory() as out_dir:
+        env = SumoEnv(label='bench_observation', sumo_args=sumo_args(scale), metrics_mode='tripinfo',
+                      output_dir=out_dir, observation=observation, profiler=profiler)
+        summary = benchmark.pedantic(run_controller, args=(env, 'csp', STEPS, out_dir), rounds=1)
+
+    stages = {row['stage']: row for row in profiler.report()}
+    benchmark.extra_info.update({
+        'steps_per_second': summary['steps_per_second'],
+        'avg_waiting_time': summary['avg_waiting_time'],
+        'lane_read_us': stages['env.metrics_update']['mean'] * 1e6,
+        'detector_read_us': stages['env.detector_update']['mean'] * 1e6 if observation == 'detectors' else 0.0,
+    })
+
+
+@parametrize('solver_engine', ['vectorized', 'constraint'])
+@parametrize('lookahead', [None, 10, 45])
+@parametrize('pipeline_executor', ['thread', 'process'])
+def bench_pipeline(benchmark, solver_engine, lookahead, pipeline_executor):
+    """CSP wall-clock time with the solve overlapped with the simulation (lookahead) or not (None)."""
+    from sumoenv import SumoEnv
+
+    if lookahead is None and pipeline_executor == 'process':
+        raise SkipBenchmark("executor only applies to the pipeline mode")
+    env = SumoEnv(label='bench_pipeline', sumo_args=sumo_args(1.0))
+    options = {'solver_engine': solver_engine, 'lookahead': lookahead, 'solve_deadline': 2.0,
+               'pipeline_executor': pipeline_executor}
+    with tempfile.TemporaryDirectory() as out_dir:
+        summary = benchmark.pedantic(run_controller, args=(env, 'csp', STEPS, out_dir), kwargs=options, rounds=1)
+
+    benchmark.extra_info.update({
+        'steps_per_second': summary['steps_per_second'],
+        'avg_waiting_time': summary['avg_waiting_time'],
+        'cpu_count': os.cpu_count(),
+    })
@@ -0,0 +1,35 @@
+"""
+Controller throughput and delay against synthetic demand (demand_generator.py),
+from a lightly loaded intersection to far beyond its capacity. Scenarios are
+generated (or taken from the cache) before the timed run.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_controllers import run_controller, sumo_args
+from harness import parametrize
+
+STEPS = 1000
+DEMANDS = [500, 2000, 8000, 20000, 40000] # veh/h, semua pendekat
+
+
+@parametrize('controller', ['static', 'csp'])
+@parametrize('vph', DEMANDS)
+@parametrize('metrics_mode', ['traci', 'tripinfo'])
+def bench_demand(benchmark, controller, vph, metrics_mode):
+    from demand_generator import scenario
+    from sumoenv import SumoEnv
+
+    config_file = scenario(vph=vph, duration=STEPS + 100, ns_share=0.6, turning=(0.7, 0.15, 0.15), seed=1)
+    with tempfile.TemporaryDirectory() as out_dir:
+        env = SumoEnv(label=f'bench_demand_{controller}', sumo_args=sumo_args(1.0), config_file=config_file,
+                      metrics_mode=metrics_mode, output_dir=out_dir)
+        summary = benchmark.pedantic(run_controller, args=(env, controller, STEPS, out_dir), rounds=1)
+
+    benchmark.extra_info.update({
+        'steps_per_second': summary['steps_per_second'],
+        'vehicles_arrived': summary['vehicles_arrived'],
+        'avg_waiting_time': summary['avg_waiting_time'],
+    })
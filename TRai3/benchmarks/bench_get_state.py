@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: SumoEnv.get_state (batched) vs get_state_loop (per-vehicle TraCI).
+
+Fills the intersection with a scaled-up demand, then times both implementations
+on the same simulation steps and checks that the outputs are bit-identical.
+
+    python benchmarks/bench_get_state.py --scale 4 --warmup 400 --steps 100
+
+bench_get_state is the same comparison as a suite case (run_benchmarks.py).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sumoenv import SumoEnv
+from harness import parametrize
+
+
+def run(scale=4.0, warmup=400, steps=100, repeat=5, backend='libsumo'):
+    env = SumoEnv(label='bench_get_state', backend=backend,
+                  sumo_args=['--scale', str(scale), '--no-step-log', 'true', '--no-warnings', 'true'])
+    env.reset()
+    try:
+        for _ in range(warmup):
+            env.simulation_step()
+
+        loop_time = 0.0
+        batched_time = 0.0
+        vehicles = 0
+        for _ in range(steps):
+            env.simulation_step()
+            vehicles += int(env.metrics.lane_vehicle_number.sum())
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                expected = env.get_state_loop()
+            loop_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                actual = env.get_state()
+            batched_time += time.perf_counter() - start
+
+            if expected.tobytes() != actual.tobytes():
+                raise AssertionError(f"get_state differs from get_state_loop at t={env.metrics.time}")
+    finally:
+        env.close()
+
+    calls = steps * repeat
+    return {
+        'scale': scale,
+        'mean_vehicles_on_incoming_lanes': vehicles / steps,
+        'loop_us': loop_time / calls * 1e6,
+        'batched_us': batched_time / calls * 1e6,
+        'speedup': loop_time / batched_time if batched_time > 0 else float('inf'),
+    }
+
+
+@parametrize('impl', ['get_state', 'get_state_loop'])
+@parametrize('scale', [1.0, 4.0])
+def bench_get_state(benchmark, impl, scale, warmup=400):
+    env = SumoEnv(label='bench_get_state', sumo_args=['--scale', str(scale), '--no-step-log', 'true',
+                                                      '--no-warnings', 'true'])
+    env.reset()
+    try:
+        for _ in range(warmup):
+            env.simulation_step()
+        benchmark(getattr(env, impl))
+        benchmark.extra_info['backend'] = env.backend
+        benchmark.extra_info['vehicles_on_incoming_lanes'] = int(env.metrics.lane_vehicle_number.sum())
+    finally:
+        env.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=float, nargs='+', default=[1.0, 4.0])
+    parser.add_argument('--warmup', type=int, default=400)
+    parser.add_argument('--steps', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--backend', default='libsumo', choices=('libsumo', 'traci'))
+    args = parser.parse_args(argv)
+
+    for scale in args.scale:
+        res = run(scale, args.warmup, args.steps, args.repeat, args.backend)
+        print(f"scale={res['scale']:<4} vehicles={res['mean_vehicles_on_incoming_lanes']:6.1f}  "
+              f"loop={res['loop_us']:8.1f}us  batched={res['batched_us']:8.1f}us  "
+              f"speedup={res['speedup']:.1f}x (bit-identical)")
+
+
+if __name__ == "__main__":
+    main()
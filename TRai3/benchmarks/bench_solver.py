@@ -0,0 +1,101 @@
+"""
+Per-decision latency of the CSP green-split solver.
+
+Times one solve for both engines over several green ranges and NS/EW demand
+imbalances, using the controller's own cost weights. bench_batch_decision times
+the batched solver used by the multi-intersection controller per junction count,
+bench_phase_switch the TraCI phase switches of that controller on a generated grid.
+"""
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from green_solver import DEFAULT_WEIGHTS, SOLVER_ENGINES, green_grid, solve_batch
+from harness import SkipBenchmark, parametrize
+
+# (min_green, max_green); python-constraint is quadratic in the number of candidates
+GREEN_RANGES = [(20, 40), (20, 60), (10, 120), (0, 300)]
+CONSTRAINT_MAX_SPAN = 40
+
+# (ns_count, ew_count): seimbang, NS dominan, EW dominan
+IMBALANCES = [(10, 10), (30, 10), (10, 30)]
+
+
+@parametrize('engine', sorted(SOLVER_ENGINES))
+@parametrize('green_range', GREEN_RANGES)
+@parametrize('counts', IMBALANCES)
+def bench_decision(benchmark, engine, green_range, counts):
+    min_green, max_green = green_range
+    if engine == 'constraint' and max_green - min_green > CONSTRAINT_MAX_SPAN:
+        raise SkipBenchmark(f"constraint engine too slow for span {max_green - min_green}")
+    ns_count, ew_count = counts
+    weights = DEFAULT_WEIGHTS
+    # Waktu tunggu sebanding dengan antrean (10 s per kendaraan)
+    args = (ns_count, ew_count, ns_count * 10.0, ew_count * 10.0, weights, min_green, max_green)
+
+    if engine == 'constraint':
+        benchmark.rounds, benchmark.warmup = 3, 0
+    result = benchmark(SOLVER_ENGINES[engine], *args)
+
+    ns_green, _ = green_grid(min_green, max_green)
+    benchmark.extra_info['candidates'] = int(ns_green.size)
+    benchmark.extra_info['plan'] = None if result is None else list(result[:2])
+
+
+@parametrize('junctions', [1, 10, 100, 1000])
+def bench_batch_decision(benchmark, junctions, seed=0):
+    rng = np.random.default_rng(seed)
+    ns_count = rng.integers(0, 40, junctions)
+    ew_count = rng.integers(0, 40, junctions)
+    args = (ns_count, ew_count, ns_count * 10.0, ew_count * 10.0, DEFAULT_WEIGHTS, 20, 60)
+
+    benchmark(solve_batch, *args)
+    benchmark.extra_info['junctions'] = junctions
+    benchmark.extra_info['us_per_junction'] = benchmark.stats['mean'] / junctions * 1e6
+
+
+def grid_config(size, out_dir):
+    """SUMO config of a size x size traffic-light grid (netgenerate, no traffic); returns its path."""
+    from sumoenv import sumo_home
+    net_path = os.path.join(out_dir, 'grid.net.xml')
+    subprocess.run([os.path.join(sumo_home(), 'bin', 'netgenerate'), '--grid', '--grid.number', str(size),
+                    '--grid.attach-length', '100', '--default-junction-type', 'traffic_light',
+                    '-o', net_path], check=True, capture_output=True)
+    config_path = os.path.join(out_dir, 'grid.sumocfg')
+    with open(config_path, 'w') as f:
+        f.write('<configuration><input><net-file value="grid.net.xml"/></input></configuration>\n')
+    return config_path
+
+
+@parametrize('grid', [2, 5, 10])
+@parametrize('backend', ['libsumo', 'traci'])
+def bench_phase_switch(benchmark, grid, backend):
+    """Every junction's phase clock expires at once: one _advance_clocks call (switches, plus a batch solve per cycle)."""
+    from multi_intersection import MultiIntersectionCSP
+    from sumoenv import sumo_home
+    try:
+        sumo_home()
+    except RuntimeError as e:
+        raise SkipBenchmark(str(e))
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        controller = MultiIntersectionCSP(config_file=grid_config(grid, out_dir), label=f'bench_switch_{grid}',
+                                          backend=backend, sumo_args=['--no-step-log', 'true', '--no-warnings', 'true'])
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            controller.start()
+        try:
+            def switch_all():
+                controller.phase_end[:] = -np.inf
+                return controller._advance_clocks(controller.metrics.time)
+
+            switches = benchmark(switch_all)
+        finally:
+            controller.close()
+    benchmark.extra_info['junctions'] = len(controller.layout)
+    benchmark.extra_info['switches'] = switches
+    benchmark.extra_info['us_per_switch'] = benchmark.stats['mean'] / max(switches, 1) * 1e6
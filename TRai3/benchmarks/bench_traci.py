@@ -0,0 +1,61 @@
+"""
+TraCI round trips per simulated second for each controller.
+
+Runs over the socket backend and counts the messages sent to SUMO
+(Connection._sendExact, one request/response pair per message). The
+fast-forward runs take their trip statistics from SUMO's tripinfo output.
+"""
+import contextlib
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_controllers import run_controller, sumo_args
+from harness import parametrize
+
+STEPS = 500
+
+
+@contextlib.contextmanager
+def count_round_trips():
+    """Counts every TraCI message sent by any connection inside the block."""
+    import traci.connection
+    conn_cls = traci.connection.Connection
+    send_exact = conn_cls._sendExact
+    counter = {'round_trips': 0}
+
+    def _send_exact(conn):
+        counter['round_trips'] += 1
+        return send_exact(conn)
+
+    conn_cls._sendExact = _send_exact
+    try:
+        yield counter
+    finally:
+        conn_cls._sendExact = send_exact
+
+
+@parametrize('controller', ['static', 'csp'])
+@parametrize('use_subscriptions', [True, False])
+@parametrize('fast_forward', [False, True])
+def bench_round_trips(benchmark, controller, use_subscriptions, fast_forward):
+    from sumoenv import SumoEnv
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        env = SumoEnv(label=f'bench_traci_{controller}', backend='traci',
+                      use_subscriptions=use_subscriptions, sumo_args=sumo_args(1.0),
+                      metrics_mode='tripinfo' if fast_forward else 'traci', output_dir=out_dir)
+        with count_round_trips() as counter:
+            summary = benchmark.pedantic(run_controller, args=(env, controller, STEPS, out_dir),
+                                         kwargs={'fast_forward': fast_forward}, rounds=1)
+
+    if counter['round_trips'] == 0:
+        raise RuntimeError("no TraCI message was sent (SUMO did not run over the socket backend)")
+    sim_seconds = max(env.metrics.time, 1.0)
+    benchmark.extra_info.update({
+        'simulated_seconds': sim_seconds,
+        'round_trips': counter['round_trips'],
+        'round_trips_per_sim_second': counter['round_trips'] / sim_seconds,
+        'steps_per_second': summary['steps_per_second'],
+    })
@@ -0,0 +1,33 @@
+"""
+Sample collection throughput of VectorSumoEnv (environment steps per second)
+for several worker counts.
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from harness import parametrize
+
+STEPS = 100
+
+
+@parametrize('num_envs', [1, 2, 4, 8])
+def bench_vector_step(benchmark, num_envs, seed=0):
+    from vector_env import VectorSumoEnv
+
+    rng = np.random.default_rng(seed)
+    actions = rng.choice([0, 2], size=(STEPS, num_envs))
+    with VectorSumoEnv(num_envs) as venv:
+        venv.reset()
+
+        def collect():
+            for step_actions in actions:
+                venv.step(step_actions)
+
+        benchmark.pedantic(collect, rounds=1)
+        benchmark.extra_info['env_steps_per_second'] = STEPS * num_envs / benchmark.stats['mean']
+        benchmark.extra_info['sim_seconds_per_second'] = \
+            STEPS * num_envs * venv.action_duration / benchmark.stats['mean']
+    benchmark.extra_info['cpu_count'] = os.cpu_count()
@@ -0,0 +1,113 @@
+"""
+Minimal pytest-benchmark style harness.
+
+A benchmark case is a function named `bench_*` in a `bench_*.py` module of this
+directory. It receives a `benchmark` fixture plus its parameters:
+
+    @parametrize('engine', ['vectorized', 'constraint'])
+    def bench_decision(benchmark, engine):
+        benchmark(solve, ...)                       # timed over several rounds
+        benchmark.extra_info['candidates'] = 1681   # stored next to the stats
+
+Long, stateful cases (full simulations) use benchmark.pedantic(func, rounds=1).
+Results are written as JSON (see run_benchmarks.py) so two commits can be diffed.
+"""
+import itertools
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+
+class SkipBenchmark(Exception):
+    """Raised by a case when a parameter combination does not apply."""
+
+
+def parametrize(name, values):
+    """Adds a parameter axis to a case; stacked decorators form the cartesian product."""
+    def decorator(func):
+        axes = getattr(func, '_bench_axes', [])
+        func._bench_axes = [(name, list(values))] + axes
+        return func
+    return decorator
+
+
+def param_sets(func):
+    axes = getattr(func, '_bench_axes', [])
+    if not axes:
+        return [{}]
+    names = [name for name, _ in axes]
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values for _, values in axes))]
+
+
+def summarize(times):
+    times = sorted(times)
+    return {
+        'rounds': len(times),
+        'min': times[0],
+        'max': times[-1],
+        'mean': statistics.fmean(times),
+        'median': statistics.median(times),
+        'stddev': statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+class Benchmark:
+    """The `benchmark` fixture passed to every case."""
+
+    def __init__(self, rounds=20, warmup=2, min_time=0.0):
+        self.rounds = rounds
+        self.warmup = warmup
+        self.min_time = min_time
+        self.extra_info = {}
+        self.stats = None
+
+    def __call__(self, func, *args, **kwargs):
+        for _ in range(self.warmup):
+            func(*args, **kwargs)
+        times = []
+        start = time.perf_counter()
+        while len(times) < self.rounds or time.perf_counter() - start < self.min_time:
+            t0 = time.perf_counter()
+            result = func(*args, **kwargs)
+            times.append(time.perf_counter() - t0)
+        self.stats = summarize(times)
+        return result
+
+    def pedantic(self, func, args=(), kwargs=None, rounds=1, warmup_rounds=0):
+        kwargs = kwargs or {}
+        for _ in range(warmup_rounds):
+            func(*args, **kwargs)
+        times = []
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            result = func(*args, **kwargs)
+            times.append(time.perf_counter() - t0)
+        self.stats = summarize(times)
+        return result
+
+
+def format_params(params):
+    return ','.join(f"{k}={v}" for k, v in params.items())
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def commit_info():
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        sha = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=cwd, capture_output=True, text=True,
+                             check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {'id': None, 'dirty': None}
+    return {'id': sha, 'dirty': dirty}
@@ -0,0 +1,151 @@
+"""
+Runs every bench_* case in benchmarks/bench_*.py and stores the results as JSON.
+
+    python benchmarks/run_benchmarks.py                       # all cases -> results/<commit>.json
+    python benchmarks/run_benchmarks.py -k solver --rounds 50
+    python benchmarks/run_benchmarks.py --compare results/<old>.json
+    python benchmarks/run_benchmarks.py --diff results/<old>.json results/<new>.json
+
+The JSON layout follows pytest-benchmark (machine_info, commit_info, benchmarks
+with name/params/stats/extra_info), so two commits can be compared case by case.
+"""
+import argparse
+import datetime
+import glob
+import importlib
+import json
+import os
+import sys
+import traceback
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+from harness import Benchmark, SkipBenchmark, commit_info, format_params, machine_info, param_sets
+
+
+def discover(keyword=None):
+    """Yields (group, case name, function, params) for every case matching `keyword`."""
+    for path in sorted(glob.glob(os.path.join(BENCH_DIR, 'bench_*.py'))):
+        group = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module(group)
+        for attr in sorted(vars(module)):
+            func = getattr(module, attr)
+            if not attr.startswith('bench_') or not callable(func) or func.__module__ != group:
+                continue
+            for params in param_sets(func):
+                name = f"{attr}[{format_params(params)}]" if params else attr
+                if keyword and keyword not in f"{group}::{name}":
+                    continue
+                yield group, name, func, params
+
+
+def run_case(func, params, rounds, warmup):
+    benchmark = Benchmark(rounds=rounds, warmup=warmup)
+    func(benchmark, **params)
+    if benchmark.stats is None:
+        raise RuntimeError("case finished without calling benchmark()")
+    return benchmark
+
+
+def run_all(keyword=None, rounds=20, warmup=2):
+    results = []
+    failed = 0
+    for group, name, func, params in discover(keyword):
+        fullname = f"{group}::{name}"
+        try:
+            benchmark = run_case(func, params, rounds, warmup)
+        except SkipBenchmark as e:
+            print(f"SKIP  {fullname}: {e}")
+            continue
+        except Exception:
+            failed += 1
+            print(f"ERROR {fullname}")
+            traceback.print_exc()
+            continue
+        stats = benchmark.stats
+        print(f"ok    {fullname}: mean {stats['mean'] * 1e3:.3f} ms, "
+              f"median {stats['median'] * 1e3:.3f} ms ({stats['rounds']} rounds)")
+        results.append({
+            'group': group,
+            'name': name,
+            'fullname': fullname,
+            'params': params,
+            'stats': stats,
+            'extra_info': benchmark.extra_info,
+        })
+    return results, failed
+
+
+def save(results, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = {
+        'datetime': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'machine_info': machine_info(),
+        'commit_info': commit_info(),
+        'benchmarks': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(old, new, threshold=1.2):
+    """Prints mean-time ratios per case; returns the names slower than `threshold`x."""
+    old_cases = {case['fullname']: case for case in old['benchmarks']}
+    regressions = []
+    print(f"{'case':<70} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for case in new['benchmarks']:
+        before = old_cases.get(case['fullname'])
+        new_mean = case['stats']['mean']
+        if before is None:
+            print(f"{case['fullname']:<70} {'-':>10} {new_mean * 1e3:>10.3f} {'new':>7}")
+            continue
+        old_mean = before['stats']['mean']
+        ratio = new_mean / old_mean if old_mean > 0 else float('inf')
+        flag = '  <-- slower' if ratio > threshold else ''
+        if ratio > threshold:
+            regressions.append(case['fullname'])
+        print(f"{case['fullname']:<70} {old_mean * 1e3:>10.3f} {new_mean * 1e3:>10.3f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def default_output():
+    sha = commit_info()['id']
+    return os.path.join(BENCH_DIR, 'results', f"{sha[:10] if sha else 'local'}.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Controller latency / simulation throughput benchmarks.")
+    parser.add_argument('-k', dest='keyword', default=None, help="Only run cases whose group::name contains this")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--out', default=None, help="Default: benchmarks/results/<commit>.json")
+    parser.add_argument('--compare', metavar='OLD', default=None, help="Compare this run against an older JSON")
+    parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'), default=None,
+                        help="Only compare two stored JSON results")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Mean-time ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.diff:
+        regressions = compare(load(args.diff[0]), load(args.diff[1]), args.threshold)
+        return 1 if regressions else 0
+
+    results, failed = run_all(args.keyword, args.rounds, args.warmup)
+    out = args.out or default_output()
+    save(results, out)
+    print(f"{len(results)} results written to {out}")
+
+    if args.compare:
+        regressions = compare(load(args.compare), load(out), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than {args.threshold}x")
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
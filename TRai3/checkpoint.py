@@ -0,0 +1,59 @@
+import hashlib
+import os
+import xml.etree.ElementTree as ET
+
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'checkpoints')
+
+# Opsi sumocfg yang menunjuk ke file masukan skenario
+INPUT_OPTIONS = ('net-file', 'route-files', 'additional-files')
+
+
+def config_inputs(config_file):
+    """Paths of the net, route and additional files a .sumocfg refers to (relative to the config)."""
+    base = os.path.dirname(os.path.abspath(config_file))
+    paths = []
+    for elem in ET.parse(config_file).getroot().iter():
+        if elem.tag in INPUT_OPTIONS and elem.get('value'):
+            paths += [os.path.join(base, name.strip()) for name in elem.get('value').split(',') if name.strip()]
+    return paths
+
+
+def scenario_key(config_file, sumo_args=(), warmup_steps=0):
+    """
+    Hash of everything the warmed-up state depends on: the contents of the config
+    and of every input file it names, the extra SUMO options (seed, scale, ...) and
+    the warm-up length. Editing any of them gives a new key, so stale checkpoints
+    are never loaded.
+    """
+    digest = hashlib.sha256()
+    for path in [config_file] + config_inputs(config_file):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    digest.update(repr((list(sumo_args), warmup_steps)).encode())
+    return digest.hexdigest()[:16]
+
+
+def ensure_checkpoint(sumo_cmd, key, warmup_steps, start, checkpoint_dir=CHECKPOINT_DIR):
+    """
+    Path of the saved state for `key`, running the warm-up first if it is not cached.
+
+    `start(cmd)` starts SUMO and returns its handle (libsumo module or TraCI
+    connection); `sumo_cmd` should carry no output options, the warm-up writes
+    nothing but the state. The state is saved under a temporary name and renamed,
+    so parallel workers warming the same scenario never read a half-written file.
+    """
+    path = os.path.join(checkpoint_dir, f"{key}.xml.gz")
+    if os.path.exists(path):
+        return path
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    tmp_path = os.path.join(checkpoint_dir, f"{key}-{os.getpid()}.xml.gz")
+    conn = start(sumo_cmd)
+    try:
+        conn.simulationStep(float(warmup_steps))
+        conn.simulation.saveState(tmp_path)
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,126 @@
+"""
+Command-line entry point for runs, comparisons and benchmarks (headless by default).
+
+    python cli.py run csp --steps 500               # sumo tanpa GUI; --gui untuk sumo-gui
+    python cli.py run max_pressure --scale 2 --metrics tripinfo
+    python cli.py run csp --planner mpc             # rollout SUMO per keputusan (mpc_planner.py)
+    python cli.py compare --no-plot                 # opsi perbandingan.py
+    python cli.py bench -k bench_policies           # opsi benchmarks/run_benchmarks.py
+
+Every subcommand imports only what it uses: SUMO (located by sumoenv.sumo_home()
+on first use) is only loaded by `run`, python-constraint only by the
+'constraint' solver engine and matplotlib only when `compare` plots.
+"""
+import argparse
+import contextlib
+import os
+import sys
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+
+
+def run(args):
+    from batch_runner import run_controller
+    from instrumentation import Profiler
+    from live_metrics import LiveMetricsWriter, live_path
+    from results_store import ResultsStore
+    from sumoenv import SumoEnv
+
+    sumo_args = []
+    if args.seed is not None:
+        sumo_args += ['--seed', str(args.seed)]
+    if args.scale is not None:
+        sumo_args += ['--scale', str(args.scale)]
+    env = SumoEnv(
+        label=f'{args.controller}_sim',
+        gui_f=args.gui,
+        backend=args.backend,
+        sumo_args=sumo_args,
+        profiler=Profiler() if args.profile else None,
+        metrics_mode=args.metrics,
+        output_dir=args.out_dir,
+        warm_start=args.warm_start > 0,
+        warmup_steps=args.warm_start,
+        config_file=args.config and os.path.abspath(args.config),
+        observation=args.observation,
+    )
+    weights = None
+    if args.weights:
+        import json
+        with open(args.weights) as f:
+            weights = json.load(f)['weights']
+    with contextlib.ExitStack() as stack:
+        # Dibaca oleh perbandingan.py / dipantau dengan: python live_metrics.py --label <controller>
+        store = None if args.no_store else stack.enter_context(ResultsStore(args.store))
+        live = stack.enter_context(LiveMetricsWriter(live_path(args.controller))) if args.live else None
+        run_controller(args.controller, env, args.steps, args.fast_forward, weights,
+                       results_store=store, live_metrics=live, planner=args.planner)
+    return 0
+
+
+def compare(argv):
+    from perbandingan import main
+    return main(argv)
+
+
+def bench(argv):
+    sys.path.insert(0, BENCH_DIR)
+    from run_benchmarks import main
+    return main(argv)
+
+
+# Subcommand yang meneruskan semua opsinya ke skrip aslinya
+PASSTHROUGH = {'compare': compare, 'bench': bench}
+
+
+def build_parser():
+    from batch_runner import CONTROLLERS, HARNESS_CONTROLLERS, PLANNERS
+    from results_store import DEFAULT_DB
+
+    parser = argparse.ArgumentParser(description="TRai3 traffic light controllers (headless SUMO by default).")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run one controller", description=(
+        f"Run one controller. {', '.join(HARNESS_CONTROLLERS)} are controller_harness policies."))
+    run_parser.add_argument('controller', choices=CONTROLLERS)
+    run_parser.add_argument('--steps', type=int, default=500)
+    run_parser.add_argument('--gui', action='store_true', help="Use sumo-gui instead of headless sumo")
+    run_parser.add_argument('--backend', default='libsumo', choices=('libsumo', 'traci'))
+    run_parser.add_argument('--seed', type=int, default=None, help="SUMO --seed (default: SUMO's, 23)")
+    run_parser.add_argument('--scale', type=float, default=None, help="SUMO --scale demand multiplier")
+    run_parser.add_argument('--config', default=None, help="SUMO config instead of intersection.sumocfg")
+    run_parser.add_argument('--metrics', default='traci', choices=('traci', 'tripinfo'))
+    run_parser.add_argument('--observation', default='lanes', choices=('lanes', 'detectors'))
+    run_parser.add_argument('--fast-forward', action='store_true', help="csp/static only, needs --metrics tripinfo")
+    run_parser.add_argument('--warm-start', type=int, default=0, metavar='STEPS')
+    run_parser.add_argument('--weights', default=None, help="CSP weight profile JSON written by weight_tuner.py")
+    run_parser.add_argument('--planner', default='analytic', choices=PLANNERS,
+                            help="csp only; mpc picks among the best plans with SUMO rollouts (mpc_planner.py)")
+    run_parser.add_argument('--out-dir', default='.', help="Directory of the tripinfo/detector output")
+    run_parser.add_argument('--profile', action='store_true', help="Print the per-stage timing table")
+    run_parser.add_argument('--store', default=DEFAULT_DB, help="results_store SQLite file")
+    run_parser.add_argument('--no-store', action='store_true')
+    run_parser.add_argument('--live', action='store_true',
+                            help="Publish per-step metrics to a shared-memory ring (live_metrics.py --label <controller>)")
+    run_parser.set_defaults(func=run)
+
+    commands.add_parser('compare', help="Compare stored runs (perbandingan.py options)")
+    commands.add_parser('bench', help="Run benchmarks (benchmarks/run_benchmarks.py options)")
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in PASSTHROUGH:
+        return PASSTHROUGH[argv[0]](argv[1:])
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'run' and args.fast_forward and args.metrics != 'tripinfo':
+        parser.error("--fast-forward needs --metrics tripinfo")
+    if args.command == 'run' and args.planner != 'analytic' and args.controller != 'csp':
+        parser.error(f"--planner {args.planner} only applies to the csp controller")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
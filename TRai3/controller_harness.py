@@ -0,0 +1,297 @@
+"""
+Controller harness: one simulation loop around SumoEnv for any signal policy.
+
+The harness owns what every controller needs: the approach lanes, per-step
+metrics (read once per step and shared with the policy as an Observation),
+vehicle bookkeeping, the queue_length log, the results store / live ring and the
+run summary. The policy only answers one question each simulated second while a
+green is showing: which direction (NS or EW) should have green now? When the
+answer changes, the harness runs the yellow phase and switches.
+
+TrafficLightCSP (traffic_light_csp.py) and TrafficLightStatic (statis.py) keep
+their own loops and are not ported onto the harness: the static log has its own
+columns that perbandingan.py reads, and the CSP's fast-forward, prefetch and
+plan cache have no policy hook. Both take their cycle from signal_cycle() below,
+so the phase mapping is shared; csp_cycle and fixed_time are their harness
+counterparts.
+
+    python cli.py run max_pressure --steps 500
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from metrics_sink import MetricsSink
+from sumoenv import SumoEnv
+from vehicle_stats import VehicleStats
+import results_store
+import tripinfo
+
+NS_LANES = ('-gneE0_0', '-gneE0_1', '-gneE0_2', '-gneE2_0', '-gneE2_1', '-gneE2_2')
+EW_LANES = ('-gneE1_0', '-gneE1_1', '-gneE1_2', '-gneE3_0', '-gneE3_1', '-gneE3_2')
+NS, EW = 0, 1 # Arah (indeks Observation dan nilai kembali Policy.select)
+# Fase hijau per arah di program gneJ00: fase 0 memberi hijau ke -gneE1/-gneE3 (EW), fase 2 ke
+# -gneE0/-gneE2 (NS); kuning adalah fase berikutnya. Run dimulai seperti program SUMO, di fase 0
+GREEN_PHASE = {NS: 2, EW: 0}
+START = EW
+
+# Format log queue_length yang sama dengan TrafficLightCSP (dibaca oleh perbandingan.py / results_store)
+LOG_COLUMNS = [
+    ('step', 'd'),
+    ('total_halting_vehicles', 'd'),
+    ('total_waiting_time_step', '.2f'),
+    ('ns_queue', 'd'),
+    ('ew_queue', 'd'),
+    ('ns_avg_wait_current', '.2f'),
+    ('ew_avg_wait_current', '.2f'),
+]
+STORE_COLUMNS = {
+    'step': 'step',
+    'total_halting_vehicles': 'halting_vehicles',
+    'total_waiting_time_step': 'waiting_time',
+    'ns_queue': 'ns_queue',
+    'ew_queue': 'ew_queue',
+    'ns_avg_wait_current': 'ns_avg_wait',
+    'ew_avg_wait_current': 'ew_avg_wait',
+}
+
+HOLD = 10 ** 6 # Durasi fase yang diberikan ke SUMO: fase hanya berganti atas perintah harness
+
+
+def signal_cycle(green_ns, green_ew, yellow_time):
+    """
+    One fixed cycle as ((phase, duration), ...) in program order: the green of
+    START, its yellow, then the other direction's green and yellow. Every
+    controller that runs NS/EW green splits on gneJ00 maps them through here.
+    """
+    greens = {NS: green_ns, EW: green_ew}
+    first, second = START, 1 - START
+    return ((GREEN_PHASE[first], greens[first]), (GREEN_PHASE[first] + 1, yellow_time),
+            (GREEN_PHASE[second], greens[second]), (GREEN_PHASE[second] + 1, yellow_time))
+
+
+class Observation:
+    """
+    Per-direction lane aggregates of one step (index NS / EW), filled in O(lanes).
+
+    vehicles / queue / waiting are the vehicle count, halting count and summed
+    waiting time on the approach lanes; green is the direction showing green and
+    elapsed the seconds it has been green.
+    """
+    __slots__ = ('step', 'green', 'elapsed', 'vehicles', 'queue', 'waiting')
+
+    def __init__(self):
+        self.step = 0
+        self.green = NS
+        self.elapsed = 0
+        self.vehicles = np.zeros(2)
+        self.queue = np.zeros(2)
+        self.waiting = np.zeros(2)
+
+
+def average_vehicle_wait(metrics, lane_idx):
+    """Mean accumulated waiting time of the vehicles on the lanes `lane_idx` (the logs' *_avg_wait column)."""
+    if not metrics.track_vehicles:
+        # Tanpa subscription kendaraan: waktu tunggu lajur = jumlah waktu tunggu kendaraannya
+        count = int(metrics.lane_vehicle_number[lane_idx].sum())
+        return float(metrics.lane_waiting_time[lane_idx].sum()) / count if count > 0 else 0.0
+    waiting_sum = 0.0
+    count = 0
+    for i in lane_idx:
+        for veh_id in metrics.lane_vehicle_ids[i]:
+            waiting_sum += metrics.vehicle_waiting_time[veh_id]
+            count += 1
+    return waiting_sum / count if count > 0 else 0.0
+
+
+def summary_dict(controller, step, wall_time, arrived, total_waiting_time, vehicle_stats, trip_summary=None):
+    """
+    KPI dict of a run, the same fields for every controller: from the tripinfo
+    summary if there is one, else from the per-vehicle bookkeeping.
+    """
+    if trip_summary is not None:
+        return tripinfo.summary_row(trip_summary, controller, step, wall_time)
+    total_travel_time = vehicle_stats.total_travel_time
+    trips = vehicle_stats.summary()
+    return {
+        'controller': controller,
+        'steps': step,
+        'vehicles_arrived': arrived,
+        'total_waiting_time': total_waiting_time,
+        'avg_waiting_time': total_waiting_time / arrived if arrived > 0 else 0.0,
+        'total_travel_time': total_travel_time,
+        'avg_travel_time': total_travel_time / arrived if arrived > 0 else 0.0,
+        'travel_time_p50': trips['travel_time_p50'],
+        'travel_time_p90': trips['travel_time_p90'],
+        'travel_time_p99': trips['travel_time_p99'],
+        'throughput': arrived / step if step > 0 else 0.0,
+        'wall_time': wall_time,
+        'steps_per_second': step / wall_time if wall_time > 0 else 0.0,
+    }
+
+
+class ControllerHarness:
+    """
+    Runs `policy` (see policies.py) on `env`, deciding every simulated second.
+
+    Waiting and travel time are per vehicle (accumulated waiting time of the
+    vehicles that arrived), as in TrafficLightCSP, whatever the policy; in
+    metrics_mode='tripinfo' they come from SUMO's tripinfo output instead.
+    """
+
+    def __init__(self, policy, env=None, yellow_time=5):
+        if env is None:
+            env = SumoEnv(label=f'harness_{policy.name}')
+        self.env = env
+        self.policy = policy
+        self.profiler = env.profiler
+        self.yellow_time = yellow_time
+        self.ns_lane_idx = env.metrics.lane_indices(list(NS_LANES))
+        self.ew_lane_idx = env.metrics.lane_indices(list(EW_LANES))
+
+        self.step = 0
+        self.wall_time = 0.0
+        self.switches = 0
+        self.log_path = f'{policy.name}_queue_length.txt'
+        self.log_formats = ('csv',)
+        self.vehicle_stats = VehicleStats()
+        self.trip_summary = None
+        # Opsional, seperti pada TrafficLightCSP: results_store.ResultsStore dan live_metrics.LiveMetricsWriter
+        self.results_store = None
+        self.live_metrics = None
+        self._run_id = None
+        self._sink = None
+        self.obs = Observation()
+
+    def _observe(self):
+        """Fills self.obs from the lane aggregates of the last step (O(lanes))."""
+        metrics = self.env.metrics
+        obs = self.obs
+        for d, idx in ((NS, self.ns_lane_idx), (EW, self.ew_lane_idx)):
+            obs.vehicles[d] = metrics.lane_vehicle_number[idx].sum()
+            obs.queue[d] = metrics.lane_halting_number[idx].sum()
+            obs.waiting[d] = metrics.lane_waiting_time[idx].sum()
+        obs.step = self.step
+        return obs
+
+    def _account(self):
+        """Vehicle bookkeeping of the last step (traci mode only)."""
+        metrics = self.env.metrics
+        if not metrics.track_vehicles:
+            return
+        stats = self.vehicle_stats
+        stats.depart(metrics.departed_ids, metrics.time)
+        stats.add_waiting(metrics.vehicle_waiting_time.keys(), metrics.vehicle_waiting_time.values())
+        stats.arrive(metrics.arrived_ids, metrics.time)
+
+    def _log_step(self, phase):
+        obs = self.obs
+        metrics = self.env.metrics
+        row = (self.step, int(obs.queue.sum()), self.env.get_waiting_time(), int(obs.queue[NS]), int(obs.queue[EW]),
+               average_vehicle_wait(metrics, self.ns_lane_idx), average_vehicle_wait(metrics, self.ew_lane_idx))
+        self._sink.append(*row)
+        if self.live_metrics is not None:
+            self.live_metrics.publish(*row, phase, *self.policy.greens)
+
+    def _simulate(self, phase):
+        """One simulated second: step, bookkeeping, observation and log row."""
+        with self.profiler.stage('harness.simulation_step'):
+            self.env.simulation_step()
+        with self.profiler.stage('harness.vehicle_accounting'):
+            self._account()
+        self._observe()
+        with self.profiler.stage('harness.log'):
+            self._log_step(phase)
+        self.step += 1
+
+    def run(self, total_steps):
+        """Runs `total_steps` simulated seconds and returns summary()."""
+        obs = self.obs
+        try:
+            self.env.reset()
+            self.step = 0
+            self.switches = 0
+            self.vehicle_stats.reset()
+            self.trip_summary = None
+            on_flush = None
+            if self.results_store is not None:
+                self._run_id = self.results_store.begin_run(
+                    results_store.run_metadata(self.env, self.policy.name, total_steps, fast_forward=0),
+                    params=self.policy.params())
+                on_flush = self.results_store.series_writer(self._run_id, STORE_COLUMNS)
+            self._sink = MetricsSink(self.log_path, LOG_COLUMNS, formats=self.log_formats, on_flush=on_flush)
+            obs.green, obs.elapsed = START, 0
+            self._observe()
+            self.policy.reset(obs)
+            self.env.set_traffic_light_phase(GREEN_PHASE[START], HOLD)
+            start_time = time.perf_counter()
+
+            while self.step < total_steps:
+                with self.profiler.stage('harness.decision'):
+                    target = self.policy.select(obs)
+                if target != obs.green:
+                    # Kuning arah yang sedang hijau, lalu hijau arah yang dipilih
+                    self.switches += 1
+                    yellow = GREEN_PHASE[obs.green] + 1
+                    self.env.set_traffic_light_phase(yellow, HOLD)
+                    for _ in range(min(self.yellow_time, total_steps - self.step)):
+                        self._simulate(yellow)
+                    obs.green, obs.elapsed = target, 0
+                    self.env.set_traffic_light_phase(GREEN_PHASE[target], HOLD)
+                    continue # Keputusan berikutnya dengan observasi setelah kuning
+                self._simulate(GREEN_PHASE[obs.green])
+                obs.elapsed += 1
+
+            self.wall_time = time.perf_counter() - start_time
+            print(f"\nSimulation ended at step {self.step} ({self.policy.name}): {self.switches} phase switches")
+            print(f"Wall-clock: {self.wall_time:.2f}s ({self.step / self.wall_time:.1f} steps/s)")
+            if self.profiler.enabled:
+                self.profiler.print_report()
+        except Exception as e:
+            self._run_id = None # Run yang gagal tidak ditandai selesai di results_store
+            print(f"Simulation terminated with error: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            if self._sink is not None:
+                self._sink.close()
+            self.env.close()
+            self.profiler.close()
+            sys.stdout.flush()
+        if self.env.metrics_mode == 'tripinfo' and os.path.exists(self.env.tripinfo_path):
+            self.trip_summary = self.env.read_trips()
+            tripinfo.print_summary(self.trip_summary, self.policy.name)
+        summary = self.summary()
+        if self.trip_summary is None:
+            print_summary(summary, self.policy.name)
+        if self._run_id is not None:
+            self.results_store.finish_run(self._run_id, summary)
+            self._run_id = None
+        return summary
+
+    def summary(self):
+        """KPI of the last run as a dict (same fields as the controllers' summary())."""
+        stats = self.vehicle_stats
+        return summary_dict(self.policy.name, self.step, self.wall_time, stats.arrived, stats.total_waiting_time,
+                            stats, self.trip_summary)
+
+
+def print_summary(summary, title):
+    """Prints a summary_dict() in the layout of the controllers' run summary."""
+    print(f"\n--- Simulation Summary ({title}) ---")
+    print(f"Total vehicles arrived: {summary['vehicles_arrived']}")
+    print(f"Total waiting time: {summary['total_waiting_time']:.2f}s, "
+          f"Average waiting time per vehicle: {summary['avg_waiting_time']:.2f}s")
+    print(f"Total travel time: {summary['total_travel_time']:.2f}s, "
+          f"Average travel time per vehicle: {summary['avg_travel_time']:.2f}s")
+    print(f"Travel time p50/p90/p99: {summary['travel_time_p50']:.1f}s / {summary['travel_time_p90']:.1f}s / "
+          f"{summary['travel_time_p99']:.1f}s")
+    print(f"Throughput: {summary['throughput']:.4f} vehicles/step")
+
+
+if __name__ == "__main__":
+    # Sama dengan `python cli.py run <policy>`
+    from cli import main
+    sys.exit(main(['run'] + sys.argv[1:]))
@@ -0,0 +1,197 @@
+"""
+Synthetic demand for the single intersection.
+
+Writes SUMO route files with time-varying Poisson arrivals per approach:
+a base rate in veh/h (all approaches together), Gaussian peaks on top of it,
+an NS/EW split and straight/left/right turning ratios. Vehicles are generated
+and written one chunk of simulated time at a time, so the route file is never
+held in memory, whatever the demand. A scenario is cached by the hash of its
+parameters (and of the net), scenario() returns the .sumocfg to run:
+
+    python demand_generator.py --vph 6000 --ns-share 0.7 --peak 1800 300 1.5 --seed 1
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NET_FILE = os.path.join(BASE_DIR, 'intersection.net.xml')
+SCENARIO_DIR = os.path.join(BASE_DIR, 'scenarios')
+GENERATOR_VERSION = 1 # Naikkan jika format keluaran berubah, agar cache lama tidak dipakai lagi
+
+NS_APPROACHES = ('-gneE0', '-gneE2')
+EW_APPROACHES = ('-gneE1', '-gneE3')
+TURNS = ('s', 'l', 'r') # Urutan rasio belok: lurus, kiri, kanan
+
+# Tipe kendaraan yang sama dengan intersection.rou.xml
+VTYPES = (
+    ('car', 'accel="2.6" decel="4.5" sigma="0.5" length="5" maxSpeed="70"'),
+    ('car2', 'accel="2.0" decel="4.0" sigma="0.6" length="5" maxSpeed="60"'),
+    ('car3', 'accel="1.8" decel="3.5" sigma="0.7" length="5" maxSpeed="50"'),
+)
+
+
+def demand_params(vph=3000.0, duration=3600, ns_share=0.5, turning=(0.8, 0.1, 0.1), peaks=(),
+                  vtype_mix=(0.5, 0.3, 0.2), seed=0):
+    """
+    Validated, JSON-ready scenario parameters.
+
+    vph is the base demand of all four approaches together; ns_share the part of it
+    on the NS approaches (split evenly, as EW gets the rest). Each peak is
+    (center s, width s, amplitude): the rate is vph * (1 + sum of amplitude *
+    exp(-((t - center) / width)^2 / 2)).
+    """
+    turning = [float(r) for r in turning]
+    vtype_mix = [float(r) for r in vtype_mix]
+    if vph < 0 or duration <= 0:
+        raise ValueError("vph must be >= 0 and duration > 0")
+    if not 0.0 <= ns_share <= 1.0:
+        raise ValueError(f"ns_share must be in [0, 1], got {ns_share}")
+    if len(turning) != len(TURNS) or min(turning) < 0 or not np.isclose(sum(turning), 1.0):
+        raise ValueError(f"turning must be {len(TURNS)} ratios (straight, left, right) summing to 1")
+    if len(vtype_mix) != len(VTYPES) or min(vtype_mix) < 0 or not np.isclose(sum(vtype_mix), 1.0):
+        raise ValueError(f"vtype_mix must be {len(VTYPES)} ratios summing to 1")
+    peaks = [[float(c), float(w), float(a)] for c, w, a in peaks]
+    if any(w <= 0 for _, w, _ in peaks):
+        raise ValueError("peak widths must be > 0")
+    return {
+        'vph': float(vph),
+        'duration': int(duration),
+        'ns_share': float(ns_share),
+        'turning': turning,
+        'peaks': peaks,
+        'vtype_mix': vtype_mix,
+        'seed': int(seed),
+    }
+
+
+def rate_profile(t, vph, peaks=()):
+    """Demand in veh/h at times `t` (array, seconds)."""
+    factor = np.ones_like(t, dtype=np.float64)
+    for center, width, amplitude in peaks:
+        factor += amplitude * np.exp(-0.5 * ((t - center) / width) ** 2)
+    return vph * np.maximum(factor, 0.0)
+
+
+def approach_turns(net_file=NET_FILE, approaches=NS_APPROACHES + EW_APPROACHES):
+    """{approach edge: {'s'|'l'|'r': outgoing edge}} from the connections of the net."""
+    turns = {edge: {} for edge in approaches}
+    for _, elem in ET.iterparse(net_file):
+        if elem.tag == 'connection' and elem.get('from') in turns and elem.get('dir') in TURNS:
+            turns[elem.get('from')][elem.get('dir')] = elem.get('to')
+        elem.clear()
+    for edge, dirs in turns.items():
+        missing = set(TURNS) - set(dirs)
+        if missing:
+            raise ValueError(f"Approach {edge} has no {sorted(missing)} connection in {net_file}")
+    return turns
+
+
+def write_routes(path, params, net_file=NET_FILE, chunk=300):
+    """
+    Streams the vehicles of `params` (demand_params()) to `path` in departure order,
+    `chunk` simulated seconds at a time. Returns the number of vehicles written.
+    """
+    turns = approach_turns(net_file)
+    approaches = NS_APPROACHES + EW_APPROACHES
+    share = np.array([params['ns_share'] / len(NS_APPROACHES)] * len(NS_APPROACHES)
+                     + [(1.0 - params['ns_share']) / len(EW_APPROACHES)] * len(EW_APPROACHES))
+    routes = [[f"{edge}_{turn}" for turn in TURNS] for edge in approaches]
+    vtypes = [vtype_id for vtype_id, _ in VTYPES]
+    rng = np.random.default_rng(params['seed'])
+
+    written = 0
+    with open(path, 'w') as f:
+        f.write('<routes>\n')
+        for vtype_id, attrs in VTYPES:
+            f.write(f'    <vType id="{vtype_id}" {attrs}/>\n')
+        for edge in approaches:
+            for turn in TURNS:
+                f.write(f'    <route id="{edge}_{turn}" edges="{edge} {turns[edge][turn]}"/>\n')
+        for begin in range(0, params['duration'], chunk):
+            t = np.arange(begin, min(begin + chunk, params['duration']), dtype=np.float64)
+            # Kedatangan Poisson per detik dan per pendekat, lalu waktu acak di dalam detiknya
+            rate = rate_profile(t, params['vph'], params['peaks']) / 3600.0
+            counts = rng.poisson(np.outer(share, rate))
+            approach = np.repeat(np.repeat(np.arange(len(approaches)), len(t)), counts.ravel())
+            depart = np.repeat(np.tile(t, len(approaches)), counts.ravel()) + rng.random(approach.size)
+            turn = rng.choice(len(TURNS), size=approach.size, p=params['turning'])
+            vtype = rng.choice(len(VTYPES), size=approach.size, p=params['vtype_mix'])
+            order = np.argsort(depart, kind='stable')
+            f.writelines(
+                f'    <vehicle id="v{written + n}" type="{vtypes[vtype[i]]}" route="{routes[approach[i]][turn[i]]}" '
+                f'depart="{depart[i]:.2f}" departLane="best" departSpeed="random"/>\n'
+                for n, i in enumerate(order))
+            written += order.size
+        f.write('</routes>\n')
+    return written
+
+
+def scenario_key(params, net_file=NET_FILE):
+    """Hash of the parameters, the generator version and the net contents."""
+    digest = hashlib.sha256(json.dumps([GENERATOR_VERSION, params], sort_keys=True).encode())
+    with open(net_file, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def scenario(cache_dir=SCENARIO_DIR, net_file=NET_FILE, **params):
+    """
+    Path of the .sumocfg of a generated scenario, generating it only if it is not cached.
+
+    `params` are demand_params() arguments. The scenario is written to a temporary
+    directory and renamed into <cache_dir>/<key>/, so concurrent callers never see a
+    half-written route file.
+    """
+    params = demand_params(**params)
+    key = scenario_key(params, net_file)
+    target = os.path.join(cache_dir, key)
+    config_path = os.path.join(target, 'scenario.sumocfg')
+    if os.path.exists(config_path):
+        return config_path
+    tmp = f"{target}.{os.getpid()}.tmp"
+    os.makedirs(tmp, exist_ok=True)
+    vehicles = write_routes(os.path.join(tmp, 'demand.rou.xml'), params, net_file)
+    with open(os.path.join(tmp, 'scenario.sumocfg'), 'w') as f:
+        f.write('<configuration>\n'
+                '    <input>\n'
+                f'       <net-file value="{os.path.abspath(net_file)}"/>\n'
+                '       <route-files value="demand.rou.xml"/>\n'
+                '    </input>\n'
+                '</configuration>\n')
+    with open(os.path.join(tmp, 'params.json'), 'w') as f:
+        json.dump(dict(params, vehicles=vehicles), f, indent=2)
+    try:
+        os.rename(tmp, target)
+    except OSError: # Proses lain sudah menulis skenario yang sama lebih dulu
+        shutil.rmtree(tmp, ignore_errors=True)
+    return config_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate (or reuse) a synthetic demand scenario.")
+    parser.add_argument('--vph', type=float, default=3000.0, help="Base demand of all approaches (veh/h)")
+    parser.add_argument('--duration', type=int, default=3600, help="Seconds of demand")
+    parser.add_argument('--ns-share', type=float, default=0.5, help="Fraction of the demand on the NS approaches")
+    parser.add_argument('--turning', nargs=3, type=float, default=[0.8, 0.1, 0.1],
+                        metavar=('STRAIGHT', 'LEFT', 'RIGHT'))
+    parser.add_argument('--peak', nargs=3, type=float, action='append', default=[],
+                        metavar=('CENTER', 'WIDTH', 'AMPLITUDE'), help="Gaussian peak on the base rate (repeatable)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache-dir', default=SCENARIO_DIR)
+    args = parser.parse_args(argv)
+
+    config_path = scenario(args.cache_dir, vph=args.vph, duration=args.duration, ns_share=args.ns_share,
+                           turning=args.turning, peaks=args.peak, seed=args.seed)
+    with open(os.path.join(os.path.dirname(config_path), 'params.json')) as f:
+        vehicles = json.load(f)['vehicles']
+    print(f"{vehicles} vehicles, config: {config_path}")
+
+
+if __name__ == "__main__":
+    main()
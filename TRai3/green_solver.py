@@ -0,0 +1,289 @@
+import functools
+import numpy as np
+
+# Nama atribut bobot pada TrafficLightCSP yang dipakai oleh fungsi biaya
+WEIGHT_NAMES = (
+    'ns_waiting_time_weight',
+    'ew_waiting_time_weight',
+    'ns_vehicle_count_weight',
+    'ew_vehicle_count_weight',
+    'imbalance_penalty',
+    'over_max_green_penalty',
+    'green_duration_penalty_weight',
+)
+
+# Bobot awal TrafficLightCSP (tuning ini sangat penting!, lihat weight_tuner.py)
+DEFAULT_WEIGHTS = {
+    'ns_waiting_time_weight': 1.0,
+    'ew_waiting_time_weight': 1.0,
+    'ns_vehicle_count_weight': 0.5,
+    'ew_vehicle_count_weight': 0.5,
+    'imbalance_penalty': 10.0,
+    'over_max_green_penalty': 5.0,
+    'green_duration_penalty_weight': 0.01, # Penalti untuk durasi hijau yang lebih panjang
+}
+
+
+def calculate_cost(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                   ns_green, ew_green, weights):
+    """Scalar cost of a single (ns_green, ew_green) plan."""
+    cost = 0
+    cost += ns_waiting_time * weights['ns_waiting_time_weight']
+    cost += ew_waiting_time * weights['ew_waiting_time_weight']
+
+    cost += ns_vehicle_count * weights['ns_vehicle_count_weight']
+    cost += ew_vehicle_count * weights['ew_vehicle_count_weight']
+
+    if ns_vehicle_count > ew_vehicle_count and ns_green < ew_green:
+        cost += (ew_green - ns_green) * weights['imbalance_penalty']
+    elif ew_vehicle_count > ns_vehicle_count and ew_green < ns_green:
+        cost += (ns_green - ew_green) * weights['imbalance_penalty']
+
+    cost += ns_green * weights['green_duration_penalty_weight']
+    cost += ew_green * weights['green_duration_penalty_weight']
+
+    return cost
+
+
+def calculate_cost_grid(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                        ns_green, ew_green, weights):
+    """
+    Broadcasted version of calculate_cost. The terms are added in the same order
+    as the scalar function so every element is bit-identical to the scalar cost.
+    """
+    cost = 0
+    cost += ns_waiting_time * weights['ns_waiting_time_weight']
+    cost += ew_waiting_time * weights['ew_waiting_time_weight']
+
+    cost += ns_vehicle_count * weights['ns_vehicle_count_weight']
+    cost += ew_vehicle_count * weights['ew_vehicle_count_weight']
+
+    ns_major = (ns_vehicle_count > ew_vehicle_count) & (ns_green < ew_green)
+    ew_major = (ew_vehicle_count > ns_vehicle_count) & (ew_green < ns_green)
+    imbalance = np.abs(ns_green - ew_green) * weights['imbalance_penalty']
+    cost = cost + np.where(ns_major | ew_major, imbalance, 0.)
+
+    cost = cost + ns_green * weights['green_duration_penalty_weight']
+    cost = cost + ew_green * weights['green_duration_penalty_weight']
+
+    return cost
+
+
+def feasible_mask(ns_vehicle_count, ew_vehicle_count, ns_green, ew_green, min_green, max_green):
+    """Boolean mask of the plans allowed by the min/max green and imbalance rules."""
+    diff = ns_green - ew_green
+    mask = np.where(ns_vehicle_count > ew_vehicle_count, diff >= 5,
+                    np.where(ew_vehicle_count > ns_vehicle_count, diff <= -5, np.abs(diff) <= 10))
+    mask &= (ns_green >= min_green) & (ew_green >= min_green)
+    mask &= (ns_green <= max_green) & (ew_green <= max_green)
+    return mask
+
+
+@functools.lru_cache(maxsize=32)
+def green_grid(min_green, max_green, green_step=1):
+    """
+    (ns_green, ew_green) grid in the order BacktrackingSolver enumerates solutions:
+    ew_green is the outer variable and both domains are walked from the largest value
+    down. Taking the first argmin therefore picks the same plan as the legacy path
+    when several plans share the minimum cost.
+    """
+    values = np.arange(min_green, max_green + 1, green_step)[::-1]
+    ew_green, ns_green = np.meshgrid(values, values, indexing='ij')
+    ns_green.setflags(write=False)
+    ew_green.setflags(write=False)
+    return ns_green, ew_green
+
+
+@functools.lru_cache(maxsize=64)
+def _ranked_plans(direction, weight_values, min_green, max_green, green_step):
+    """
+    Feasible plans of one direction class (sign of ns - ew count), ranked once.
+
+    Counts and waiting times only shift the cost by a constant, so the plan cost
+    without them (the class "shape") orders the plans of every decision of the class.
+    Returns (ns_green, ew_green, order, shape) with the feasible grid indices in
+    `order` sorted by their `shape` value (stable, so ties keep the grid order),
+    or None when the class has no feasible plan.
+    """
+    weights = dict(zip(WEIGHT_NAMES, weight_values))
+    ns_grid, ew_grid = green_grid(min_green, max_green, green_step)
+    ns_grid, ew_grid = ns_grid.ravel(), ew_grid.ravel()
+    # Wakil kelas: hanya perbandingan ns/ew yang memengaruhi mask dan penalti
+    rep_ns, rep_ew = max(direction, 0), max(-direction, 0)
+    feasible = np.flatnonzero(feasible_mask(rep_ns, rep_ew, ns_grid, ew_grid, min_green, max_green))
+    if len(feasible) == 0:
+        return None
+    shape = calculate_cost_grid(rep_ns, rep_ew, 0.0, 0.0, ns_grid[feasible], ew_grid[feasible], weights)
+    rank = np.argsort(shape, kind='stable')
+    for array in (feasible, shape):
+        array.setflags(write=False)
+    return ns_grid, ew_grid, feasible[rank], shape[rank]
+
+
+def _candidates(direction, ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                weights, min_green, max_green, green_step, k=1):
+    """
+    Grid indices (in grid order) of the plans of a direction class that can be among
+    the k cheapest for these counts (scalars, or arrays of one class), plus the ns/ew
+    grids; None when no plan is feasible. A plan whose shape is within rounding
+    distance of the k-th lowest is kept, the exact cost decides between them.
+    """
+    ranked = _ranked_plans(direction, tuple(weights[name] for name in WEIGHT_NAMES),
+                           min_green, max_green, green_step)
+    if ranked is None:
+        return None
+    ns_grid, ew_grid, order, shape = ranked
+    offset = calculate_cost_grid(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                                 0, 0, weights)
+    kth = shape[min(k, len(shape)) - 1]
+    tol = 1e-9 * (1.0 + abs(kth) + float(np.max(np.abs(offset))))
+    end = np.searchsorted(shape, kth + tol, side='right')
+    return ns_grid, ew_grid, np.sort(order[:end])
+
+
+def solve_vectorized(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                     weights, min_green, max_green, green_step=1):
+    """
+    Closed-form green split: the feasible plans of the demand direction are ranked
+    once per weights and green range (_ranked_plans), so a decision only evaluates
+    the exact cost of the few plans tied for the lowest. Picks the same plan as
+    an argmin over the whole grid. Returns (ns_green, ew_green, cost) or None when
+    no plan is feasible.
+    """
+    found = _candidates(int(np.sign(ns_vehicle_count - ew_vehicle_count)), ns_vehicle_count, ew_vehicle_count,
+                        ns_waiting_time, ew_waiting_time, weights, min_green, max_green, green_step)
+    if found is None:
+        return None
+    ns_grid, ew_grid, candidates = found
+    ns_green, ew_green = ns_grid[candidates], ew_grid[candidates]
+    cost = calculate_cost_grid(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                               ns_green, ew_green, weights)
+    idx = np.argmin(cost)
+    return int(ns_green[idx]), int(ew_green[idx]), float(cost[idx])
+
+
+def rank_plans(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+               weights, min_green, max_green, green_step=1, k=8):
+    """
+    The k feasible plans with the lowest analytic cost as (ns_green, ew_green, cost),
+    best first. Equal costs keep the solver order, so the first entry is the
+    solve_vectorized plan.
+    """
+    found = _candidates(int(np.sign(ns_vehicle_count - ew_vehicle_count)), ns_vehicle_count, ew_vehicle_count,
+                        ns_waiting_time, ew_waiting_time, weights, min_green, max_green, green_step, k)
+    if found is None:
+        return []
+    ns_grid, ew_grid, candidates = found
+    ns_green, ew_green = ns_grid[candidates], ew_grid[candidates]
+    cost = calculate_cost_grid(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                               ns_green, ew_green, weights)
+    order = np.argsort(cost, kind='stable')[:k]
+    return [(int(ns_green[i]), int(ew_green[i]), float(cost[i])) for i in order]
+
+
+def solve_batch(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                weights, min_green, max_green, green_step=1):
+    """
+    solve_vectorized for many junctions in one call. Inputs are 1-D arrays with one
+    entry per junction. Returns (ns_green, ew_green, cost, feasible) arrays, with -1
+    greens and an inf cost where no plan is feasible; every row matches
+    solve_vectorized for the same inputs.
+
+    Each junction evaluates the exact cost only on the plans of its direction class
+    that are within rounding distance of the class minimum (see _ranked_plans).
+    """
+    ns_count = np.asarray(ns_vehicle_count).ravel()
+    ew_count = np.asarray(ew_vehicle_count).ravel()
+    ns_wait = np.asarray(ns_waiting_time, dtype=np.float64).ravel()
+    ew_wait = np.asarray(ew_waiting_time, dtype=np.float64).ravel()
+    n = len(ns_count)
+
+    ns_best = np.full(n, -1, dtype=np.int64)
+    ew_best = np.full(n, -1, dtype=np.int64)
+    cost_best = np.full(n, np.inf)
+
+    direction = np.sign(ns_count - ew_count)
+    for cls in np.unique(direction):
+        rows = np.flatnonzero(direction == cls)
+        found = _candidates(int(cls), ns_count[rows], ew_count[rows], ns_wait[rows], ew_wait[rows],
+                            weights, min_green, max_green, green_step)
+        if found is None:
+            continue
+        ns_grid, ew_grid, candidates = found
+        ns_cand, ew_cand = ns_grid[candidates], ew_grid[candidates]
+        cost = calculate_cost_grid(ns_count[rows, None], ew_count[rows, None],
+                                   ns_wait[rows, None], ew_wait[rows, None], ns_cand, ew_cand, weights)
+        idx = np.argmin(cost, axis=1)
+        ns_best[rows] = ns_cand[idx]
+        ew_best[rows] = ew_cand[idx]
+        cost_best[rows] = cost[np.arange(len(rows)), idx]
+    return ns_best, ew_best, cost_best, ns_best >= 0
+
+
+def solve_constraint(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                     weights, min_green, max_green, green_step=1):
+    """Legacy python-constraint path (objective expressed as a constraint)."""
+    from constraint import Problem, BacktrackingSolver # Hanya engine ini yang memerlukan python-constraint
+
+    def cost_of(ns_green, ew_green):
+        return calculate_cost(ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time,
+                              ns_green, ew_green, weights)
+
+    greens = range(min_green, max_green + 1, green_step)
+
+    problem = Problem(BacktrackingSolver())
+
+    problem.addVariable('ns_green', greens)
+    problem.addVariable('ew_green', greens)
+
+    problem.addConstraint(lambda ns: ns >= min_green, ['ns_green'])
+    problem.addConstraint(lambda ew: ew >= min_green, ['ew_green'])
+
+    problem.addConstraint(lambda ns: ns <= max_green, ['ns_green'])
+    problem.addConstraint(lambda ew: ew <= max_green, ['ew_green'])
+
+    if ns_vehicle_count > ew_vehicle_count:
+        problem.addConstraint(lambda ns, ew: ns >= ew, ['ns_green', 'ew_green'])
+        problem.addConstraint(lambda ns, ew: ns - ew >= 5, ['ns_green', 'ew_green'])
+    elif ew_vehicle_count > ns_vehicle_count:
+        problem.addConstraint(lambda ns, ew: ew >= ns, ['ns_green', 'ew_green'])
+        problem.addConstraint(lambda ew, ns: ew - ns >= 5, ['ew_green', 'ns_green'])
+    else:
+        problem.addConstraint(lambda ns, ew: abs(ns - ew) <= 10, ['ns_green', 'ew_green'])
+
+    problem.addConstraint(lambda ns, ew: ns >= min_green and ew >= min_green, ['ns_green', 'ew_green'])
+
+    # Add the objective function constraint
+    problem.addConstraint(
+        lambda ns_green, ew_green: cost_of(ns_green, ew_green) == min(
+            cost_of(ng, eg)
+            for ng in greens
+            for eg in greens
+            # Filter solutions that meet other constraints for accurate min_cost calculation
+            if ( (ns_vehicle_count > ew_vehicle_count and ng >= eg and ng - eg >= 5) or
+                 (ew_vehicle_count > ns_vehicle_count and eg >= ng and eg - ng >= 5) or
+                 (ns_vehicle_count == ew_vehicle_count and abs(ng - eg) <= 10) )
+            and ng >= min_green and eg >= min_green and ng <= max_green and eg <= max_green
+        ),
+        ['ns_green', 'ew_green']
+    )
+
+    solutions = problem.getSolutions()
+
+    optimal_solution = None
+    min_cost = float('inf')
+    for sol in solutions:
+        cost = cost_of(sol['ns_green'], sol['ew_green'])
+        if cost < min_cost:
+            min_cost = cost
+            optimal_solution = sol
+
+    if optimal_solution is None:
+        return None
+    return optimal_solution['ns_green'], optimal_solution['ew_green'], min_cost
+
+
+SOLVER_ENGINES = {
+    'vectorized': solve_vectorized,
+    'constraint': solve_constraint,
+}
@@ -0,0 +1,178 @@
+import json
+import time
+from collections import defaultdict
+import numpy as np
+
+
+class _Stage:
+    """Reusable timing context for one stage name."""
+    __slots__ = ('_record', '_name', '_start')
+
+    def __init__(self, record, name):
+        self._record = record
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._record(self._name, self._start, time.perf_counter() - self._start)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler:
+    """Disabled profiler: stages are a shared no-op and TraCI handles are left unwrapped."""
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def wrap_traci(self, conn):
+        return conn
+
+    def report(self):
+        return []
+
+    def print_report(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    """
+    Opt-in hot-path profiler.
+
+    Controller code times its stages with `with profiler.stage('name'):`, and
+    SumoEnv wraps its TraCI handle with wrap_traci() so that every call is
+    recorded as stage 'traci.<domain>.<method>'. report() gives calls, total,
+    mean, p50 and p99 per stage. With `trace_path` set, every sample is also
+    kept as a Chrome trace event and written on close() (open the file in
+    chrome://tracing or Perfetto).
+    """
+    enabled = True
+
+    def __init__(self, trace_path=None):
+        self.trace_path = trace_path
+        self._samples = defaultdict(list)
+        self._stages = {}
+        self._events = [] if trace_path else None
+        self._origin = time.perf_counter()
+
+    def record(self, name, start, duration):
+        self._samples[name].append(duration)
+        if self._events is not None:
+            self._events.append((name, start, duration))
+
+    def stage(self, name):
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage(self.record, name)
+        return stage
+
+    def wrap_traci(self, conn):
+        return TracedTraci(conn, self)
+
+    def report(self):
+        """One dict per stage, sorted by total time (seconds)."""
+        rows = []
+        for name, samples in self._samples.items():
+            durations = np.asarray(samples)
+            p50, p99 = np.percentile(durations, [50, 99])
+            rows.append({
+                'stage': name,
+                'calls': len(samples),
+                'total': float(durations.sum()),
+                'mean': float(durations.mean()),
+                'p50': float(p50),
+                'p99': float(p99),
+            })
+        rows.sort(key=lambda row: row['total'], reverse=True)
+        return rows
+
+    def print_report(self):
+        rows = self.report()
+        print(f"\n--- Profile ---")
+        print(f"{'stage':<48} {'calls':>9} {'total s':>9} {'p50 us':>9} {'p99 us':>9}")
+        for row in rows:
+            print(f"{row['stage']:<48} {row['calls']:>9} {row['total']:>9.3f} "
+                  f"{row['p50'] * 1e6:>9.1f} {row['p99'] * 1e6:>9.1f}")
+
+    def write_chrome_trace(self, path):
+        events = [{
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': duration * 1e6,
+            'pid': 0,
+            'tid': 0,
+        } for name, start, duration in self._events or ()]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def close(self):
+        if self.trace_path:
+            self.write_chrome_trace(self.trace_path)
+
+
+class _TracedDomain:
+    """Times the methods of one TraCI domain (vehicle, lane, ...); wrappers are cached on first use."""
+
+    def __init__(self, domain, prefix, profiler):
+        self._domain = domain
+        self._prefix = prefix
+        self._profiler = profiler
+
+    def __getattr__(self, attr):
+        target = getattr(self._domain, attr)
+        if not callable(target):
+            return target
+        record = self._profiler.record
+        name = f"{self._prefix}.{attr}"
+
+        def traced(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return target(*args, **kwargs)
+            finally:
+                record(name, start, time.perf_counter() - start)
+
+        setattr(self, attr, traced)
+        return traced
+
+
+class TracedTraci(_TracedDomain):
+    """Proxy for a TraCI connection or the libsumo module; sub-domains are proxied as well."""
+
+    def __init__(self, conn, profiler):
+        super().__init__(conn, 'traci', profiler)
+
+    def __getattr__(self, attr):
+        target = getattr(self._domain, attr)
+        # Fungsi tingkat atas (simulationStep, close); domain libsumo berupa kelas
+        if callable(target) and not isinstance(target, type):
+            return super().__getattr__(attr)
+        if isinstance(target, (int, float, str, bytes, type(None))):
+            return target
+        domain = _TracedDomain(target, f"traci.{attr}", self._profiler)
+        setattr(self, attr, domain)
+        return domain
@@ -0,0 +1,211 @@
+import numpy as np
+import traci.constants as tc
+
+
+def add_lane_occupancy(state, ilane, xy, lane_len, place_offset, place_len):
+    """
+    Scatters vehicle positions into the occupancy cells of a SumoEnv state vector.
+
+    ilane[i] is the index of the incoming lane of vehicle i (0-11, SumoEnv.lane_ids
+    order) and xy[i] its position. Each vehicle is projected on its approach axis and
+    split between the two nearest cells by linear interpolation.
+    """
+    if len(ilane) == 0:
+        return state
+    # Lajur 0-2: +y, 3-5: +x, 6-8: -y, 9-11: -x
+    coord = np.where((ilane // 3) % 2 == 0, xy[:, 1], xy[:, 0])
+    coord = np.where(ilane < 6, coord, -coord)
+    pos = (coord - place_offset) / place_len
+
+    keep = ~(pos > lane_len - 1.)
+    ilane = ilane[keep]
+    pos = np.clip(pos[keep], 0., lane_len - 1. - 1e-6)
+    ipos = pos.astype(np.int64)
+
+    # Urutan penjumlahan sama dengan loop lama (mobil demi mobil, sel depan lalu belakang);
+    # bobot float64 ditambahkan ke state float32 seperti `state[i] += np.float64`
+    cells = ilane * lane_len + ipos
+    idx = np.stack([cells, cells + 1], axis=1).ravel()
+    weights = np.stack([1. - pos + ipos, pos - ipos], axis=1).ravel()
+    np.add.at(state, idx, weights)
+    return state
+
+
+class LaneMetrics:
+    """
+    Per-step lane and vehicle metrics read from TraCI subscriptions.
+
+    The lanes and the simulation departed/arrived lists are subscribed once in
+    start(); every departing vehicle is subscribed to its waiting time, speed and
+    position when it enters the network. After each simulation step update() only reads
+    the subscription results that came back with the step, so the number of
+    round trips no longer grows with the number of vehicles.
+
+    With track_vehicles=False no vehicle is subscribed: only the lane and
+    simulation values are kept (vehicle_waiting_time etc. stay empty), for runs
+    whose trip statistics come from SUMO's own output files.
+    """
+
+    lane_vars = (
+        tc.LAST_STEP_VEHICLE_NUMBER,
+        tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+        tc.VAR_WAITING_TIME,
+        tc.LAST_STEP_VEHICLE_ID_LIST,
+    )
+    vehicle_vars = (tc.VAR_WAITING_TIME, tc.VAR_SPEED, tc.VAR_POSITION)
+    simulation_vars = (tc.VAR_TIME, tc.VAR_DEPARTED_VEHICLES_IDS, tc.VAR_ARRIVED_VEHICLES_IDS)
+
+    def __init__(self, lane_ids, track_vehicles=True):
+        self.lane_ids = list(lane_ids)
+        self.track_vehicles = track_vehicles
+        self._conn = None
+        self._reset_values()
+
+    def _reset_values(self):
+        n = len(self.lane_ids)
+        self.time = 0.0
+        self.departed_ids = ()
+        self.arrived_ids = ()
+        self.lane_vehicle_number = np.zeros(n, dtype=np.int64)
+        self.lane_halting_number = np.zeros(n, dtype=np.int64)
+        self.lane_waiting_time = np.zeros(n, dtype=np.float64)
+        self.lane_vehicle_ids = [()] * n
+        self.vehicle_waiting_time = {}
+        self.vehicle_speed = {}
+        self.vehicle_position = {}
+
+    @property
+    def vehicle_ids(self):
+        return self.vehicle_waiting_time.keys()
+
+    def lane_indices(self, lanes):
+        return [self.lane_ids.index(lane) for lane in lanes]
+
+    def lane_positions(self):
+        """(lane index, xy) arrays of every vehicle on the tracked lanes, in lane order."""
+        positions = self.vehicle_position
+        if not self.track_vehicles: # Tanpa subscription kendaraan: satu getPosition per kendaraan
+            positions = {veh_id: self._conn.vehicle.getPosition(veh_id)
+                         for veh_ids in self.lane_vehicle_ids for veh_id in veh_ids}
+        xy = [positions[veh_id] for veh_ids in self.lane_vehicle_ids for veh_id in veh_ids]
+        counts = [len(veh_ids) for veh_ids in self.lane_vehicle_ids]
+        ilane = np.repeat(np.arange(len(self.lane_ids)), counts)
+        return ilane, np.array(xy, dtype=np.float64).reshape(-1, 2)
+
+    def start(self, conn):
+        """Subscribes lanes, simulation and the vehicles already in the network."""
+        self._conn = conn
+        self._reset_values()
+        for lane_id in self.lane_ids:
+            self._conn.lane.subscribe(lane_id, self.lane_vars)
+        self._conn.simulation.subscribe(self.simulation_vars)
+        if self.track_vehicles:
+            for veh_id in self._conn.vehicle.getIDList():
+                self._conn.vehicle.subscribe(veh_id, self.vehicle_vars)
+        self._read()
+
+    def update(self):
+        """Reads the results of the last simulation step."""
+        if self.track_vehicles:
+            for veh_id in self._conn.simulation.getSubscriptionResults()[tc.VAR_DEPARTED_VEHICLES_IDS]:
+                self._conn.vehicle.subscribe(veh_id, self.vehicle_vars)
+        self._read()
+
+    def _read(self):
+        sim = self._conn.simulation.getSubscriptionResults()
+        self.time = sim[tc.VAR_TIME]
+        self.departed_ids = sim[tc.VAR_DEPARTED_VEHICLES_IDS]
+        self.arrived_ids = sim[tc.VAR_ARRIVED_VEHICLES_IDS]
+
+        lanes = self._conn.lane.getAllSubscriptionResults()
+        for i, lane_id in enumerate(self.lane_ids):
+            res = lanes[lane_id]
+            self.lane_vehicle_number[i] = res[tc.LAST_STEP_VEHICLE_NUMBER]
+            self.lane_halting_number[i] = res[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+            self.lane_waiting_time[i] = res[tc.VAR_WAITING_TIME]
+            self.lane_vehicle_ids[i] = res[tc.LAST_STEP_VEHICLE_ID_LIST]
+
+        if not self.track_vehicles:
+            return
+        vehicles = self._conn.vehicle.getAllSubscriptionResults()
+        self.vehicle_waiting_time = {veh_id: res[tc.VAR_WAITING_TIME] for veh_id, res in vehicles.items()}
+        self.vehicle_speed = {veh_id: res[tc.VAR_SPEED] for veh_id, res in vehicles.items()}
+        self.vehicle_position = {veh_id: res[tc.VAR_POSITION] for veh_id, res in vehicles.items()}
+
+
+class PollingLaneMetrics(LaneMetrics):
+    """Same interface as LaneMetrics, filled with one TraCI getter call per value (baseline)."""
+
+    def start(self, conn):
+        self._conn = conn
+        self._reset_values()
+        self.update()
+
+    def update(self):
+        self.time = self._conn.simulation.getTime()
+        self.departed_ids = self._conn.simulation.getDepartedIDList()
+        self.arrived_ids = self._conn.simulation.getArrivedIDList()
+
+        for i, lane_id in enumerate(self.lane_ids):
+            self.lane_vehicle_number[i] = self._conn.lane.getLastStepVehicleNumber(lane_id)
+            self.lane_halting_number[i] = self._conn.lane.getLastStepHaltingNumber(lane_id)
+            self.lane_waiting_time[i] = self._conn.lane.getWaitingTime(lane_id)
+            self.lane_vehicle_ids[i] = self._conn.lane.getLastStepVehicleIDs(lane_id)
+
+        if not self.track_vehicles:
+            return
+        veh_ids = self._conn.vehicle.getIDList()
+        self.vehicle_waiting_time = {veh_id: self._conn.vehicle.getWaitingTime(veh_id) for veh_id in veh_ids}
+        self.vehicle_speed = {veh_id: self._conn.vehicle.getSpeed(veh_id) for veh_id in veh_ids}
+        self.vehicle_position = {veh_id: self._conn.vehicle.getPosition(veh_id) for veh_id in veh_ids}
+
+
+class DetectorMetrics:
+    """
+    Per-step e1 induction loop readings from TraCI subscriptions, the sensors a
+    field controller has instead of per-vehicle positions.
+
+    Each loop is subscribed once in start() to the vehicles on it and its
+    occupancy; update() reads one subscription result per loop, so the cost does
+    not grow with the traffic. Counts and occupied time are kept as running
+    totals since start(): a consumer takes differences between two steps to get
+    the aggregate over a window (see TrafficLightCSP in detector mode).
+    """
+
+    detector_vars = (tc.LAST_STEP_VEHICLE_ID_LIST, tc.LAST_STEP_OCCUPANCY)
+
+    def __init__(self, detector_ids):
+        self.detector_ids = list(detector_ids)
+        self._conn = None
+        self._reset_values()
+
+    def _reset_values(self):
+        n = len(self.detector_ids)
+        self.vehicle_count = np.zeros(n, dtype=np.int64) # Kendaraan yang mulai melewati loop pada langkah ini
+        self.occupancy = np.zeros(n, dtype=np.float64) # Fraksi langkah terakhir loop tertutup kendaraan (0-1)
+        self.vehicle_total = np.zeros(n, dtype=np.int64)
+        self.occupied_time = np.zeros(n, dtype=np.float64) # Detik loop tertutup sejak start()
+        self._on_loop = [()] * n
+
+    def detector_indices(self, detectors):
+        return [self.detector_ids.index(detector) for detector in detectors]
+
+    def start(self, conn):
+        self._conn = conn
+        self._reset_values()
+        for detector_id in self.detector_ids:
+            self._conn.inductionloop.subscribe(detector_id, self.detector_vars)
+        self.update()
+
+    def update(self, step_length=1.0):
+        """Reads the loops after a step of `step_length` seconds."""
+        loops = self._conn.inductionloop.getAllSubscriptionResults()
+        for i, detector_id in enumerate(self.detector_ids):
+            res = loops[detector_id]
+            on_loop = res[tc.LAST_STEP_VEHICLE_ID_LIST]
+            # Kendaraan yang berhenti di atas loop muncul di beberapa langkah; hanya yang baru dihitung
+            self.vehicle_count[i] = sum(1 for veh_id in on_loop if veh_id not in self._on_loop[i])
+            self._on_loop[i] = on_loop
+            self.occupancy[i] = res[tc.LAST_STEP_OCCUPANCY] / 100.0
+        self.vehicle_total += self.vehicle_count
+        self.occupied_time += self.occupancy * step_length
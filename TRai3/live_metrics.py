@@ -0,0 +1,230 @@
+"""
+Live per-step metrics in a memory-mapped ring buffer.
+
+A controller publishes one row per logged step (LIVE_COLUMNS) into a fixed-size
+file under /dev/shm; any number of viewer processes map the same file read-only
+(view() is zero-copy, since()/latest() copy only the rows asked for) and nothing
+is locked. Neither side ever waits for the other:
+the writer stores the row, then bumps a sequence counter; a reader copies the rows
+it wants and re-reads the counter to drop any row that was overwritten while it
+copied. Memory is capacity x columns x 8 bytes however long the run is. The
+writer deletes the file when it is closed; a viewer that already mapped it keeps
+the end of the run.
+
+Viewer (rolling statistics, or a live plot with --plot):
+
+    python live_metrics.py --label csp --window 300
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+LIVE_COLUMNS = ('step', 'halting_vehicles', 'waiting_time', 'ns_queue', 'ew_queue', 'ns_avg_wait', 'ew_avg_wait',
+                'phase', 'green_ns', 'green_ew')
+
+MAGIC = 0x4D4C3354 # 'T3LM'
+VERSION = 1
+HEADER_WORDS = 8 # uint64: magic, versi, kapasitas, jumlah kolom, jumlah baris yang pernah ditulis, cadangan
+_MAGIC, _VERSION, _CAPACITY, _COLUMNS, _COUNT = range(5)
+
+
+def live_path(label):
+    """Default ring file of a run label (shared memory on Linux, the temp dir elsewhere)."""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, f"trai3_{label}.live")
+
+
+class LiveMetricsWriter:
+    """
+    Producer side of the ring: publish() overwrites the oldest row once `capacity`
+    rows have been written. A new ring replaces an older file at `path` by rename,
+    so a viewer still mapping the old one never sees it truncated. close() unlinks
+    the file (unless another run has replaced it meanwhile): a mapped viewer can
+    still read the end of the run, and nothing is left behind in /dev/shm.
+    """
+
+    def __init__(self, path, capacity=3600):
+        self.path = path
+        self.capacity = capacity
+        ncols = len(LIVE_COLUMNS)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.truncate(8 * (HEADER_WORDS + capacity * ncols))
+        self._header = np.memmap(tmp_path, dtype=np.uint64, mode='r+', shape=(HEADER_WORDS,))
+        self._rows = np.memmap(tmp_path, dtype=np.float64, mode='r+', offset=8 * HEADER_WORDS,
+                               shape=(capacity, ncols))
+        self._header[:_COUNT + 1] = (MAGIC, VERSION, capacity, ncols, 0)
+        self._header.flush()
+        os.replace(tmp_path, path)
+        self._inode = os.stat(path).st_ino
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def publish(self, *values):
+        """Writes one row of LIVE_COLUMNS values (NaN for unknown ones)."""
+        self._rows[self._count % self.capacity] = values
+        self._count += 1
+        # Penghitung diperbarui setelah baris selesai ditulis: pembaca tidak melihat baris setengah jadi
+        self._header[_COUNT] = self._count
+
+    def close(self):
+        if self._rows is None:
+            return
+        self._rows.flush()
+        self._header.flush()
+        self._rows = self._header = None
+        try:
+            if os.stat(self.path).st_ino == self._inode:
+                os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class LiveMetricsReader:
+    """Consumer side: a read-only mapping of a ring written by LiveMetricsWriter."""
+
+    def __init__(self, path):
+        self.path = path
+        self._inode = os.stat(path).st_ino
+        self._header = np.memmap(path, dtype=np.uint64, mode='r', shape=(HEADER_WORDS,))
+        if int(self._header[_MAGIC]) != MAGIC or int(self._header[_VERSION]) != VERSION \
+                or int(self._header[_COLUMNS]) != len(LIVE_COLUMNS):
+            raise ValueError(f"{path} is not a live metrics ring (version {VERSION})")
+        self.capacity = int(self._header[_CAPACITY])
+        self.columns = LIVE_COLUMNS
+        self._rows = np.memmap(path, dtype=np.float64, mode='r', offset=8 * HEADER_WORDS,
+                               shape=(self.capacity, len(LIVE_COLUMNS)))
+
+    def replaced(self):
+        """True once a new run has put a fresh ring at this path (reopen to follow it)."""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return False
+
+    @property
+    def count(self):
+        """Rows published so far (including the ones already overwritten)."""
+        return int(self._header[_COUNT])
+
+    def view(self):
+        """The raw ring (zero-copy, slot order, may change while it is read)."""
+        return self._rows
+
+    def since(self, seq, limit=None):
+        """
+        Rows published after sequence number `seq`, oldest first, as
+        (rows copy, next seq, dropped): `dropped` rows were overwritten before they
+        could be read. Pass the returned next seq to the following call.
+        """
+        end = self.count
+        start = max(seq, end - self.capacity + 1)
+        if limit is not None:
+            start = max(start, end - limit)
+        rows = self._rows[np.arange(start, end) % self.capacity] # Salinan (fancy indexing)
+        # Slot yang ditimpa selama penyalinan (dan slot yang sedang ditulis) dibuang
+        first = max(start, self.count - self.capacity + 1)
+        return rows[first - start:], max(end, first), first - seq
+
+    def latest(self, n):
+        """The last `n` (at most capacity - 1) rows, oldest first."""
+        rows, _, _ = self.since(0, limit=n)
+        return rows
+
+    def column(self, rows, name):
+        return rows[:, self.columns.index(name)]
+
+
+def rolling_stats(reader, rows):
+    """Mean / max of every column over `rows` (from LiveMetricsReader.since or latest), NaN ignored."""
+    stats = {}
+    for i, name in enumerate(reader.columns):
+        values = rows[:, i][~np.isnan(rows[:, i])]
+        if name not in ('step', 'phase') and values.size:
+            stats[name] = (float(values.mean()), float(values.max()))
+    return stats
+
+
+def watch(reader, window, interval):
+    """Prints rolling statistics (mean/max) over the last `window` rows every `interval` seconds."""
+    last = None
+    while True:
+        if reader.replaced():
+            reader = LiveMetricsReader(reader.path)
+        rows = reader.latest(window)
+        if rows.size and reader.count != last:
+            last = reader.count
+            stats = rolling_stats(reader, rows)
+            step = int(rows[-1, reader.columns.index('step')])
+            print(f"step {step:>6} ({len(rows)} rows): " +
+                  ', '.join(f"{name} {mean:.1f}/{peak:.0f}" for name, (mean, peak) in stats.items()), flush=True)
+        time.sleep(interval)
+
+
+def plot(reader, window, interval):
+    """Live plot of queues and waiting time over the last `window` rows."""
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    fig, (ax_queue, ax_wait) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+    queue_lines = {name: ax_queue.plot([], [], label=name)[0] for name in ('halting_vehicles', 'ns_queue', 'ew_queue')}
+    wait_lines = {name: ax_wait.plot([], [], label=name)[0] for name in ('ns_avg_wait', 'ew_avg_wait')}
+    ax_queue.set_ylabel('Kendaraan berhenti')
+    ax_wait.set_ylabel('Waktu tunggu rata-rata (detik)')
+    ax_wait.set_xlabel('Langkah Simulasi')
+    for ax in (ax_queue, ax_wait):
+        ax.legend(loc='upper left')
+        ax.grid(True, linestyle=':', alpha=0.6)
+
+    def update(_):
+        nonlocal reader
+        if reader.replaced():
+            reader = LiveMetricsReader(reader.path)
+        rows = reader.latest(window)
+        if not rows.size:
+            return []
+        step = reader.column(rows, 'step')
+        for lines, ax in ((queue_lines, ax_queue), (wait_lines, ax_wait)):
+            for name, line in lines.items():
+                line.set_data(step, reader.column(rows, name))
+            ax.relim()
+            ax.autoscale_view()
+        return list(queue_lines.values()) + list(wait_lines.values())
+
+    animation = FuncAnimation(fig, update, interval=interval * 1000, cache_frame_data=False)
+    plt.show()
+    return animation
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch the live metrics ring of a running controller.")
+    parser.add_argument('--label', default='csp', help="Run label (ring file live_path(label))")
+    parser.add_argument('--path', default=None, help="Ring file (overrides --label)")
+    parser.add_argument('--window', type=int, default=300, help="Rows in the rolling window / plot")
+    parser.add_argument('--interval', type=float, default=1.0, help="Seconds between refreshes")
+    parser.add_argument('--plot', action='store_true', help="Live plot instead of printed statistics")
+    args = parser.parse_args(argv)
+
+    path = args.path or live_path(args.label)
+    while not os.path.exists(path): # Viewer boleh dijalankan sebelum simulasi
+        time.sleep(args.interval)
+    reader = LiveMetricsReader(path)
+    try:
+        if args.plot:
+            plot(reader, args.window, args.interval)
+        else:
+            watch(reader, args.window, args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
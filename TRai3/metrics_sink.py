@@ -0,0 +1,129 @@
+import os
+import zipfile
+import numpy as np
+
+LOG_FORMATS = ('csv', 'npz', 'parquet')
+
+
+class MetricsSink:
+    """
+    Buffered per-step metrics writer.
+
+    Rows are stored in a preallocated NumPy structured array and written out in
+    batches of `capacity` rows, so a run keeps one file handle open instead of
+    opening the log on every step. `columns` is a list of (name, fmt) pairs:
+    fmt is the str.format spec used for the CSV output ('d' columns are stored
+    as int64, everything else as float64).
+
+    Output formats, derived from `path`:
+        csv     -> path itself (same header and formatting as the old text logs)
+        npz     -> <path without extension>.npz; flushed batches are spooled to
+                   <npz path>.part and packed column by column on close(), so
+                   memory stays at one batch however long the run is
+        parquet -> <path without extension>.parquet, one row group per flush (needs pyarrow)
+
+    `on_flush`, if given, is called with every flushed batch (a structured array view,
+    only valid during the call), e.g. ResultsStore.series_writer().
+    """
+
+    def __init__(self, path, columns, formats=('csv',), capacity=4096, on_flush=None):
+        unknown = set(formats) - set(LOG_FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown log format(s) {sorted(unknown)}, expected any of {LOG_FORMATS}")
+        self.path = path
+        self.names = [name for name, _ in columns]
+        self.formats = tuple(formats)
+        self.capacity = capacity
+        self.on_flush = on_flush
+        dtype = [(name, np.int64 if fmt == 'd' else np.float64) for name, fmt in columns]
+        self._buffer = np.zeros(capacity, dtype=dtype)
+        self._size = 0
+        self._row_format = ','.join('{%d:%s}' % (i, fmt) for i, (_, fmt) in enumerate(columns)) + '\n'
+
+        base = os.path.splitext(path)[0]
+        self.npz_path = base + '.npz'
+        self.parquet_path = base + '.parquet'
+        self._spool_path = self.npz_path + '.part'
+        self._spool = None
+        self._spooled = 0 # Baris yang sudah ditulis ke file spool npz
+        self._csv = None
+        self._parquet = None
+        self.closed = False
+        if 'csv' in self.formats:
+            self._csv = open(path, 'w')
+            self._csv.write(','.join(self.names) + '\n')
+        if 'npz' in self.formats:
+            self._spool = open(self._spool_path, 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, *values):
+        self._buffer[self._size] = values
+        self._size += 1
+        if self._size == self.capacity:
+            self.flush()
+
+    def flush(self):
+        if self._size == 0:
+            return
+        rows = self._buffer[:self._size]
+        if self._csv is not None:
+            fmt = self._row_format.format
+            self._csv.write(''.join(fmt(*row) for row in rows.tolist()))
+            self._csv.flush()
+        if self._spool is not None:
+            rows.tofile(self._spool)
+            self._spooled += len(rows)
+        if 'parquet' in self.formats:
+            self._write_parquet(rows)
+        if self.on_flush is not None:
+            self.on_flush(rows)
+        self._size = 0
+
+    def _write_parquet(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({name: rows[name] for name in self.names})
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.parquet_path, table.schema)
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        if self._csv is not None:
+            self._csv.close()
+            self._csv = None
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+            self._write_npz()
+            os.remove(self._spool_path)
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def _write_npz(self):
+        """Packs the spooled rows into npz_path (one .npy per column, as np.savez), `capacity` rows at a time."""
+        if self._spooled:
+            data = np.memmap(self._spool_path, dtype=self._buffer.dtype, mode='r', shape=(self._spooled,))
+        else:
+            data = self._buffer[:0]
+        with zipfile.ZipFile(self.npz_path, 'w', allowZip64=True) as archive:
+            for name in self.names:
+                column = data[name]
+                with archive.open(name + '.npy', 'w', force_zip64=True) as f:
+                    np.lib.format.write_array_header_1_0(f, {
+                        'descr': np.lib.format.dtype_to_descr(column.dtype),
+                        'fortran_order': False,
+                        'shape': column.shape,
+                    })
+                    for start in range(0, len(column), self.capacity):
+                        f.write(np.ascontiguousarray(column[start:start + self.capacity]).tobytes())
+        del data
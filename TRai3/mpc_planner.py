@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing.connection import wait
+
+from controller_harness import signal_cycle
+from green_solver import rank_plans
+
+
+def _rollout(sim, state_path, plan, yellow_time, horizon, tl_id, lane_ids):
+    """Restores the snapshot and repeats the (ns_green, ew_green) cycle for `horizon` steps."""
+    sim.simulation.loadState(state_path)
+    cycle = signal_cycle(*plan, yellow_time)
+    waiting = 0.0
+    step = 0
+    while step < horizon:
+        for phase, duration in cycle:
+            if step >= horizon:
+                break
+            sim.trafficlight.setPhase(tl_id, phase)
+            sim.trafficlight.setPhaseDuration(tl_id, duration)
+            for _ in range(min(duration, horizon - step)):
+                sim.simulationStep()
+                waiting += sum(sim.lane.getWaitingTime(lane_id) for lane_id in lane_ids)
+                step += 1
+    return waiting
+
+
+def _worker_main(conn, sumo_cmd, backend, label, tl_id, lane_ids):
+    """Rollout worker: keeps one headless SUMO loaded and answers rollout requests."""
+    from sumoenv import start_sumo
+    sim = start_sumo(sumo_cmd, backend, label)
+    conn.send(('ready', None, None))
+    try:
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+            request_id, state_path, plan, yellow_time, horizon = request
+            try:
+                result = _rollout(sim, state_path, plan, yellow_time, horizon, tl_id, lane_ids)
+            except Exception as e: # Laporkan ke proses utama sebagai teks (objek SWIG tidak bisa di-pickle)
+                conn.send((request_id, plan, repr(e)))
+                continue
+            conn.send((request_id, plan, result))
+    finally:
+        sim.close()
+
+
+class RolloutPool:
+    """Warm headless SUMO workers (one process each, started once and reused)."""
+
+    def __init__(self, sumo_cmd, tl_id, lane_ids, workers=4, backend='libsumo', label='rollout'):
+        from sumoenv import sumo_binary
+        # Worker selalu tanpa GUI, apa pun biner simulasi utama; SUMO menolak opsi yang diulang
+        self.sumo_cmd = [sumo_binary()] + list(sumo_cmd[1:])
+        for option in ('--no-step-log', '--no-warnings'):
+            if option not in self.sumo_cmd:
+                self.sumo_cmd += [option, 'true']
+        self.tl_id = tl_id
+        self.lane_ids = list(lane_ids)
+        self.workers = workers
+        self.backend = backend
+        self.label = label
+        self._procs = []
+        self._conns = []
+        self._busy = {} # conn -> id permintaan yang belum dijawab
+
+    def start(self):
+        # spawn: proses anak tidak boleh mewarisi instance libsumo yang sedang berjalan
+        ctx = multiprocessing.get_context('spawn')
+        for i in range(self.workers):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker_main, daemon=True,
+                               args=(child, self.sumo_cmd, self.backend, f"{self.label}_{i}",
+                                     self.tl_id, self.lane_ids))
+            proc.start()
+            child.close()
+            self._procs.append(proc)
+            self._conns.append(parent)
+        for conn in self._conns:
+            conn.recv() # 'ready'
+
+    def evaluate(self, request_id, state_path, plans, yellow_time, horizon, deadline):
+        """
+        Rolls every plan out on the idle workers until `deadline` (perf_counter time).
+        Returns {plan: waiting time} for the rollouts that finished in time.
+        """
+        pending = list(plans)
+        results = {}
+        while len(results) < len(plans):
+            for conn in self._conns:
+                if pending and conn not in self._busy:
+                    plan = pending.pop(0)
+                    conn.send((request_id, state_path, plan, yellow_time, horizon))
+                    self._busy[conn] = request_id
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self._busy:
+                break
+            for conn in wait(list(self._busy), timeout=remaining):
+                del self._busy[conn]
+                try:
+                    answered_id, plan, result = conn.recv()
+                except (EOFError, OSError): # Worker mati: keluarkan dari pool
+                    self._conns.remove(conn)
+                    conn.close()
+                    continue
+                # Jawaban terlambat dari keputusan sebelumnya (atau pesan galat) diabaikan
+                if answered_id == request_id and isinstance(result, float):
+                    results[plan] = result
+        return results
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._procs, self._conns, self._busy = [], [], {}
+
+
+class MPCPlanner:
+    """
+    Model-predictive green split for TrafficLightCSP.
+
+    At each decision the top_k plans by analytic cost are rolled out from a
+    saveState snapshot of the running simulation on a pool of warm worker SUMO
+    instances, and the plan with the lowest accumulated waiting time over the
+    horizon (the longest candidate cycle, shorter cycles are repeated) is chosen.
+    If not every rollout finishes within `budget` seconds, the best analytic plan
+    is used instead.
+    """
+
+    def __init__(self, top_k=4, workers=4, budget=0.5, backend='libsumo'):
+        self.top_k = top_k
+        self.workers = workers
+        self.budget = budget
+        self.backend = backend
+        self.pool = None
+        self._state_dir = None
+        self.decisions = 0
+        self.fallbacks = 0
+        self.decision_time = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start(self, controller):
+        env = controller.env
+        self._state_dir = tempfile.mkdtemp(prefix='mpc_state_')
+        # Tanpa opsi output run utama (tripinfo/detektor): worker tidak boleh menimpa file run
+        sumo_cmd = [env.sumoCmd[0], '-c', env.config_file] + env.sumo_args
+        self.pool = RolloutPool(sumo_cmd, controller.tl_id, controller.ns_lanes + controller.ew_lanes,
+                                workers=self.workers, backend=self.backend)
+        self.pool.start()
+
+    def plan(self, controller):
+        """(ns_green, ew_green, cost) for the controller's current state, or None."""
+        candidates = rank_plans(controller.current_ns_vehicle_count, controller.current_ew_vehicle_count,
+                                controller.current_ns_waiting_time, controller.current_ew_waiting_time,
+                                controller.cost_weights(), controller.min_green, controller.max_green,
+                                controller.green_step, k=self.top_k)
+        if not candidates:
+            return None
+        if self.pool is None:
+            self._start(controller)
+
+        start = time.perf_counter()
+        deadline = start + self.budget
+        self.decisions += 1
+        state_path = os.path.join(self._state_dir, f"state_{self.decisions}.xml")
+        controller.env.traci.simulation.saveState(state_path)
+
+        plans = [(ns_green, ew_green) for ns_green, ew_green, _ in candidates]
+        horizon = max(ns_green + ew_green for ns_green, ew_green in plans) + 2 * controller.yellow_time
+        measured = self.pool.evaluate(self.decisions, state_path, plans, controller.yellow_time, horizon, deadline)
+        self.decision_time += time.perf_counter() - start
+        # Worker yang masih antre untuk snapshot ini akan gagal memuatnya; jawabannya memang diabaikan
+        os.remove(state_path)
+
+        if len(measured) < len(plans):
+            self.fallbacks += 1
+            return candidates[0]
+        # Biaya = waktu tunggu terakumulasi hasil simulasi; seri -> urutan analitik
+        best = min(plans, key=lambda plan: measured[plan])
+        return best[0], best[1], measured[best]
+
+    def stats(self):
+        return {
+            'decisions': self.decisions,
+            'fallbacks': self.fallbacks,
+            'mean_decision_time': self.decision_time / self.decisions if self.decisions else 0.0,
+        }
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        if self._state_dir is not None:
+            shutil.rmtree(self._state_dir, ignore_errors=True)
+            self._state_dir = None
@@ -0,0 +1,338 @@
+import json
+import os
+import time
+import numpy as np
+from sumoenv import SumoEnv, start_sumo, sumo_binary, _libsumo_available
+from green_solver import DEFAULT_WEIGHTS, WEIGHT_NAMES, solve_batch
+from lane_metrics import LaneMetrics
+from instrumentation import NULL_PROFILER
+from vehicle_stats import VehicleStats
+import tripinfo
+from traffic_light_csp import TIMING_NAMES
+
+NS, EW = 0, 1
+# Posisi dalam siklus: hijau NS, kuning NS, hijau EW, kuning EW
+CYCLE_LENGTH = 4
+# Durasi fase program yang dipasang controller (detik): fase hanya berakhir lewat jam fase
+HOLD_DURATION = 1e6
+
+
+def approach_group(shape):
+    """NS for lanes whose last segment runs along the y axis, EW otherwise."""
+    (x0, y0), (x1, y1) = shape[-2], shape[-1]
+    return NS if abs(y1 - y0) > abs(x1 - x0) else EW
+
+
+def cycle_phases(conn, tl_id, lane_group):
+    """
+    Phase indices [NS green, NS yellow, EW green, EW yellow] of the running program.
+    The green phases are the ones that give the most green links to one group; a
+    yellow index is -1 when the green is not followed by a yellow phase.
+    """
+    program = conn.trafficlight.getProgram(tl_id)
+    logic = next(logic for logic in conn.trafficlight.getAllProgramLogics(tl_id)
+                 if logic.programID == program)
+    links = conn.trafficlight.getControlledLinks(tl_id)
+    states = [phase.state for phase in logic.phases]
+
+    scores = []
+    for i, state in enumerate(states):
+        if 'y' in state.lower():
+            continue
+        greens = [0, 0]
+        for link_index, signal in enumerate(state):
+            if signal in 'Gg' and links[link_index]:
+                greens[lane_group[links[link_index][0][0]]] += 1
+        scores.append((i, greens[NS] - greens[EW]))
+    if not scores:
+        raise ValueError(f"Traffic light '{tl_id}' has no green phase")
+    ns_green = max(scores, key=lambda s: s[1])[0]
+    ew_green = min(scores, key=lambda s: s[1])[0]
+    if ns_green == ew_green:
+        raise ValueError(f"Traffic light '{tl_id}' has no separate NS and EW green phases")
+
+    def yellow_after(i):
+        nxt = (i + 1) % len(states)
+        return nxt if 'y' in states[nxt].lower() else -1
+
+    return [ns_green, yellow_after(ns_green), ew_green, yellow_after(ew_green)]
+
+
+class JunctionLayout:
+    """
+    Signalized junctions and their incoming lanes as flat arrays.
+
+    lane_ids are the controlled incoming lanes of every junction, concatenated;
+    lane_junction / lane_group give the junction index and NS/EW group of each
+    lane, and cycle_phases (J, 4) the phase index for every position of the cycle.
+    """
+
+    def __init__(self, tl_ids, lane_ids, lane_junction, lane_group, cycle_phases):
+        self.tl_ids = list(tl_ids)
+        self.lane_ids = list(lane_ids)
+        self.lane_junction = np.asarray(lane_junction, dtype=np.int64)
+        self.lane_group = np.asarray(lane_group, dtype=np.int64)
+        self.cycle_phases = np.asarray(cycle_phases, dtype=np.int64).reshape(-1, CYCLE_LENGTH)
+        # Indeks (junction, group) yang diratakan, untuk np.bincount
+        self.lane_slot = self.lane_junction * 2 + self.lane_group
+
+    def __len__(self):
+        return len(self.tl_ids)
+
+    @classmethod
+    def discover(cls, conn, tl_ids=None):
+        """Every traffic light (or `tl_ids`) with its incoming lanes, from TraCI."""
+        tl_ids = list(tl_ids if tl_ids is not None else conn.trafficlight.getIDList())
+        lane_ids, lane_junction, lane_group, phases = [], [], [], []
+        for j, tl_id in enumerate(tl_ids):
+            # getControlledLanes mengulang lajur untuk setiap link; pertahankan urutan pertama
+            lanes = list(dict.fromkeys(conn.trafficlight.getControlledLanes(tl_id)))
+            groups = {lane: approach_group(conn.lane.getShape(lane)) for lane in lanes}
+            lane_ids += lanes
+            lane_junction += [j] * len(lanes)
+            lane_group += [groups[lane] for lane in lanes]
+            phases.append(cycle_phases(conn, tl_id, groups))
+        return cls(tl_ids, lane_ids, lane_junction, lane_group, phases)
+
+    def group_sums(self, lane_values):
+        """Sums a per-lane array into (J,) NS and (J,) EW totals."""
+        sums = np.bincount(self.lane_slot, weights=lane_values, minlength=2 * len(self))
+        return sums[NS::2], sums[EW::2]
+
+
+class MultiIntersectionCSP:
+    """
+    CSP green-split controller for every signalized junction of a network.
+
+    Junctions are discovered from TraCI at start. Each one runs its own phase clock
+    (position in the NS green / yellow / EW green / yellow cycle and the time the
+    current phase ends); the simulation advances one step at a time and only the
+    junctions whose phase expired are touched. Junctions starting a new cycle at the
+    same step are planned together with one green_solver.solve_batch call. The
+    junction programs are reinstalled with phases that never end on their own, so
+    a phase switch is a single setPhase call.
+    """
+
+    def __init__(self, config_file=None, label='multi_csp', backend='libsumo', sumo_args=None,
+                 port=None, tl_ids=None, profiler=None, metrics_mode='traci', output_dir='.', fast_forward=False):
+        if fast_forward and metrics_mode != 'tripinfo':
+            raise ValueError("fast_forward needs metrics_mode='tripinfo' (vehicles are not polled per step)")
+        self.config_file = config_file or SumoEnv.config_file
+        self.label = label
+        self.backend = 'libsumo' if backend == 'libsumo' and _libsumo_available() else 'traci'
+        self.port = port
+        self.tl_ids = tl_ids # None = semua lampu lalu lintas di jaringan
+        # Lompat langsung ke akhir fase terdekat di antara semua simpang, satu simulationStep(targetTime)
+        self.fast_forward = fast_forward
+        # Mode tripinfo: hanya output perjalanan (detector.add.xml khusus simpang tunggal)
+        self.metrics_mode = metrics_mode
+        self.tripinfo_path = None
+        output_options = []
+        if metrics_mode == 'tripinfo':
+            output_options, self.tripinfo_path, _ = tripinfo.output_args(output_dir, label, detector_file=None)
+        self.sumoCmd = [sumo_binary(), '-c', self.config_file] \
+            + output_options + list(sumo_args or [])
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        self.traci = None
+        self.layout = None
+        self.metrics = None
+
+        self.min_green = 20
+        self.max_green = 60
+        self.yellow_time = 5
+        self.green_step = 1
+
+        # Bobot fungsi biaya, sama dengan TrafficLightCSP (profil weight_tuner.py lewat load_weights)
+        self.set_weights(DEFAULT_WEIGHTS)
+
+        self.step = 0
+        self.wall_time = 0.0
+        self.decisions = 0
+        self.decision_time = 0.0
+        self.vehicle_stats = VehicleStats()
+        self.trip_summary = None
+
+    def cost_weights(self):
+        return {name: getattr(self, name) for name in WEIGHT_NAMES}
+
+    def set_weights(self, weights):
+        """Sets cost weights and min_green / max_green from a {name: value} dict, as TrafficLightCSP.set_weights."""
+        known = WEIGHT_NAMES + TIMING_NAMES
+        unknown = set(weights) - set(known)
+        if unknown:
+            raise ValueError(f"Unknown cost weight(s) {sorted(unknown)}, expected any of {known}")
+        for name, value in weights.items():
+            setattr(self, name, int(value) if name in TIMING_NAMES else float(value))
+
+    def load_weights(self, path):
+        """Loads a weight profile written by weight_tuner.py; returns the whole profile dict."""
+        with open(path) as f:
+            profile = json.load(f)
+        self.set_weights(profile['weights'])
+        return profile
+
+    def start(self):
+        self.close()
+        self.trip_summary = None
+        # Setiap run mulai dari nol, juga saat instance yang sama dijalankan lagi
+        self.step = 0
+        self.decisions = 0
+        self.decision_time = 0.0
+        self.vehicle_stats.reset()
+        self.traci = self.profiler.wrap_traci(start_sumo(self.sumoCmd, self.backend, self.label, self.port))
+        self.layout = JunctionLayout.discover(self.traci, self.tl_ids)
+        self._hold_programs()
+        self.metrics = LaneMetrics(self.layout.lane_ids, track_vehicles=self.metrics_mode == 'traci')
+        self.metrics.start(self.traci)
+
+        n = len(self.layout)
+        # Jam fase per simpang: mulai di posisi terakhir siklus yang sudah habis,
+        # sehingga langkah pertama langsung membuka siklus baru (dengan rencana baru)
+        self.cycle_pos = np.full(n, CYCLE_LENGTH - 1, dtype=np.int64)
+        self.phase_end = np.zeros(n, dtype=np.float64)
+        self.durations = np.zeros((n, CYCLE_LENGTH), dtype=np.int64)
+        self.durations[:, 1] = self.durations[:, 3] = self.yellow_time
+        self.durations[self.layout.cycle_phases < 0] = 0
+
+    def close(self):
+        if self.traci is not None:
+            try:
+                self.traci.close()
+            except Exception:
+                pass
+            self.traci = None
+
+    def _hold_programs(self):
+        """
+        Reinstalls the running program of every junction with every phase lasting
+        HOLD_DURATION: SUMO then never switches on its own and the phase clocks only
+        need setPhase, not setPhase + setPhaseDuration (one TraCI round trip less per
+        switch).
+        """
+        tl = self.traci.trafficlight
+        for tl_id in self.layout.tl_ids:
+            program = tl.getProgram(tl_id)
+            logic = next(logic for logic in tl.getAllProgramLogics(tl_id) if logic.programID == program)
+            phases = [tl.Phase(HOLD_DURATION, phase.state) for phase in logic.phases]
+            tl.setProgramLogic(tl_id, tl.Logic(program, 0, tl.getPhase(tl_id), phases))
+
+    def _plan(self, junctions):
+        """Solves the green split of `junctions` in one batch and stores it in durations."""
+        metrics = self.metrics
+        ns_count, ew_count = self.layout.group_sums(metrics.lane_vehicle_number)
+        ns_wait, ew_wait = self.layout.group_sums(metrics.lane_waiting_time)
+        start = time.perf_counter()
+        ns_green, ew_green, _, feasible = solve_batch(
+            ns_count[junctions], ew_count[junctions], ns_wait[junctions], ew_wait[junctions],
+            self.cost_weights(), self.min_green, self.max_green, self.green_step)
+        self.decision_time += time.perf_counter() - start
+        self.decisions += 1
+        # Tanpa solusi: gunakan min_green untuk kedua arah, seperti TrafficLightCSP
+        self.durations[junctions, 0] = np.where(feasible, ns_green, self.min_green)
+        self.durations[junctions, 2] = np.where(feasible, ew_green, self.min_green)
+
+    def _advance_clocks(self, now):
+        """Moves every junction whose phase ended to its next phase; returns how many changed."""
+        changed = 0
+        while True:
+            due = np.flatnonzero(self.phase_end <= now)
+            if due.size == 0:
+                return changed
+            pos = (self.cycle_pos[due] + 1) % CYCLE_LENGTH
+            self.cycle_pos[due] = pos
+            new_cycle = due[pos == 0]
+            if new_cycle.size:
+                with self.profiler.stage('multi.decision'):
+                    self._plan(new_cycle)
+            durations = self.durations[due, pos]
+            self.phase_end[due] = now + durations
+            active = durations > 0 # Fase kuning yang tidak ada dilewati
+            set_phase = self.traci.trafficlight.setPhase
+            tl_ids = self.layout.tl_ids
+            for j, phase in zip(due[active].tolist(), self.layout.cycle_phases[due[active], pos[active]].tolist()):
+                set_phase(tl_ids[j], phase)
+            changed += int(active.sum())
+
+    def _account_vehicles(self):
+        metrics = self.metrics
+        self.vehicle_stats.depart(metrics.departed_ids, metrics.time)
+        self.vehicle_stats.add_waiting(metrics.vehicle_waiting_time.keys(), metrics.vehicle_waiting_time.values())
+        self.vehicle_stats.arrive(metrics.arrived_ids, metrics.time)
+
+    def run_simulation(self, total_steps):
+        try:
+            self.start()
+            print(f"Controlling {len(self.layout)} junction(s), {len(self.layout.lane_ids)} incoming lanes")
+            start_time = time.perf_counter()
+            self._advance_clocks(self.metrics.time)
+            while self.step < total_steps:
+                with self.profiler.stage('multi.simulation_step'):
+                    if self.fast_forward:
+                        steps = int(max(1, min(self.phase_end.min() - self.metrics.time, total_steps - self.step)))
+                        self.traci.simulationStep(self.metrics.time + steps)
+                    else:
+                        steps = 1
+                        self.traci.simulationStep()
+                    self.metrics.update()
+                self.step += steps
+                if self.metrics.track_vehicles:
+                    with self.profiler.stage('multi.vehicle_accounting'):
+                        self._account_vehicles()
+                with self.profiler.stage('multi.phase_clocks'):
+                    self._advance_clocks(self.metrics.time)
+            self.wall_time = time.perf_counter() - start_time
+
+            summary = self.summary()
+            if self.metrics.track_vehicles:
+                print(f"\n--- Simulation Summary (Multi-intersection CSP) ---")
+                print(f"Simulation ended at step {self.step}. Total vehicles arrived: {summary['vehicles_arrived']}")
+                print(f"Average waiting time per vehicle: {summary['avg_waiting_time']:.2f}s, "
+                      f"average travel time per vehicle: {summary['avg_travel_time']:.2f}s")
+            else:
+                print(f"\nSimulation ended at step {self.step}, trip statistics follow once SUMO has written them")
+            print(f"Decisions: {self.decisions} batch solves, {self.decision_time * 1e3:.1f} ms total")
+            print(f"Wall-clock: {self.wall_time:.2f}s ({summary['steps_per_second']:.1f} steps/s)")
+            if self.profiler.enabled:
+                self.profiler.print_report()
+        finally:
+            self.close()
+            self.profiler.close()
+        # SUMO menulis tripinfo saat ditutup
+        if self.metrics_mode == 'tripinfo' and os.path.exists(self.tripinfo_path):
+            self.trip_summary = tripinfo.read_tripinfo(self.tripinfo_path)
+            tripinfo.print_summary(self.trip_summary, "Multi-intersection CSP")
+        return self.summary()
+
+    def summary(self):
+        if self.trip_summary is not None:
+            row = tripinfo.summary_row(self.trip_summary, 'multi_csp', self.step, self.wall_time)
+            row.update(junctions=len(self.layout) if self.layout is not None else 0,
+                       decisions=self.decisions, decision_time=self.decision_time)
+            return row
+        trips = self.vehicle_stats.summary()
+        arrived = trips['arrived']
+        total_waiting_time = self.vehicle_stats.total_waiting_time
+        total_travel_time = self.vehicle_stats.total_travel_time
+        return {
+            'controller': 'multi_csp',
+            'junctions': len(self.layout) if self.layout is not None else 0,
+            'steps': self.step,
+            'vehicles_arrived': arrived,
+            'total_waiting_time': total_waiting_time,
+            'avg_waiting_time': total_waiting_time / arrived if arrived > 0 else 0.0,
+            'total_travel_time': total_travel_time,
+            'avg_travel_time': total_travel_time / arrived if arrived > 0 else 0.0,
+            'travel_time_p50': trips['travel_time_p50'],
+            'travel_time_p90': trips['travel_time_p90'],
+            'travel_time_p99': trips['travel_time_p99'],
+            'throughput': arrived / self.step if self.step > 0 else 0.0,
+            'decisions': self.decisions,
+            'decision_time': self.decision_time,
+            'wall_time': self.wall_time,
+            'steps_per_second': self.step / self.wall_time if self.wall_time > 0 else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    controller = MultiIntersectionCSP()
+    controller.run_simulation(total_steps=500)
@@ -1,148 +1,176 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+"""
+Perbandingan controller dari results_store (SQLite), bukan dari angka ringkasan yang disalin manual.
+
+KPI per run (run_metrics) dan deret per langkah (series) diagregasi dengan SQL per kelompok
+(default: per controller), dengan rata-rata dan interval kepercayaan antar run; deret tidak
+pernah dimuat utuh ke memori. Isi database dengan `python traffic_light_csp.py`,
+`python statis.py` atau `python batch_runner.py`.
+
+    python perbandingan.py --seeds 23 24 25 --steps 500
+    python perbandingan.py --group-by controller scale --metrics avg_waiting_time --no-plot
+"""
+import argparse
+import os
 import numpy as np
-
-# --- 1. Load Data dari File Log ---
-try:
-    # Load data untuk sistem Adaptif (CSP)
-    df_adaptive = pd.read_csv('queue_length.txt')
-    # Rename columns for clarity and consistency if needed for plotting
-    df_adaptive.rename(columns={
-        'total_halting_vehicles': 'halting_vehicles',
-        'ns_avg_wait_current': 'ns_avg_waiting_time',
-        'ew_avg_wait_current': 'ew_avg_waiting_time'
-    }, inplace=True)
-
-    # Load data untuk sistem Statis
-    df_static = pd.read_csv('static_queue_length.txt')
-    # Rename columns for clarity and consistency if needed for plotting
-    df_static.rename(columns={
-        'queue_length': 'halting_vehicles', # Use a common name for plotting
-    }, inplace=True)
-
-except FileNotFoundError:
-    print("Error: Pastikan file 'queue_length.txt' dan 'static_queue_length.txt' berada di direktori yang sama.")
-    exit()
-
-# --- 2. Siapkan Data Ringkasan (dari output konsol sebelumnya) ---
-# Data Ringkasan untuk CSP Adaptif
-csp_summary = {
-    "Total vehicles departed": 1158,
-    "Average waiting time per vehicle": 533.90,
-    "Average travel time per vehicle": 50.71,
-    "Throughput": 1.1580,
-}
-
-# Data Ringkasan untuk Statis
-static_summary = {
-    "Total vehicles departed": 1132,
-    "Average waiting time per vehicle": 544.92,
-    "Average travel time per vehicle": 53.56,
-    "Throughput": 1.1320,
-}
-
-# --- 3. Buat Grafik Perbandingan Time Series ---
-
-plt.figure(figsize=(15, 10))
-
-# Plot Kepadatan Antrean (Halting Vehicles)
-plt.subplot(2, 1, 1) # 2 baris, 1 kolom, plot ke-1
-plt.plot(df_adaptive['step'], df_adaptive['halting_vehicles'], label='CSP Adaptif', color='blue', alpha=0.7)
-plt.plot(df_static['step'], df_static['halting_vehicles'], label='Statis', color='red', alpha=0.7, linestyle='--')
-plt.title('Perbandingan Kepadatan Antrean (Halting Vehicles) Seiring Waktu')
-plt.xlabel('Langkah Simulasi')
-plt.ylabel('Jumlah Kendaraan Berhenti')
-plt.legend()
-plt.grid(True, linestyle=':', alpha=0.6)
-plt.ylim(bottom=0) # Pastikan Y-axis mulai dari 0
-
-# Plot Waktu Tunggu Kumulatif (per langkah)
-# Note: total_waiting_time_step adalah waktu tunggu kumulatif dari semua kendaraan yang berhenti pada langkah itu.
-# Bukan waktu tunggu kumulatif sepanjang simulasi.
-# Jika ingin total kumulatif sepanjang simulasi, perlu dihitung ulang dari data per kendaraan.
-# Namun, untuk perbandingan dinamika per langkah, ini sudah cukup.
-plt.subplot(2, 1, 2) # 2 baris, 1 kolom, plot ke-2
-plt.plot(df_adaptive['step'], df_adaptive['total_waiting_time_step'], label='CSP Adaptif', color='blue', alpha=0.7)
-plt.plot(df_static['step'], df_static['waiting_time'], label='Statis', color='red', alpha=0.7, linestyle='--') # static log uses 'waiting_time'
-plt.title('Perbandingan Total Waktu Tunggu per Langkah')
-plt.xlabel('Langkah Simulasi')
-plt.ylabel('Total Waktu Tunggu (detik) per Langkah')
-plt.legend()
-plt.grid(True, linestyle=':', alpha=0.6)
-plt.ylim(bottom=0)
-plt.tight_layout()
-plt.show()
-
-# --- 4. Buat Grafik Perbandingan Bar Chart untuk Metrik Kunci ---
-
-metrics = {
-    'Total Kendaraan Berangkat': (csp_summary['Total vehicles departed'], static_summary['Total vehicles departed']),
-    'Waktu Tunggu Rata-Rata per Kendaraan': (csp_summary['Average waiting time per vehicle'], static_summary['Average waiting time per vehicle']),
-    'Waktu Perjalanan Rata-Rata per Kendaraan': (csp_summary['Average travel time per vehicle'], static_summary['Average travel time per vehicle']),
-    'Throughput (kendaraan/langkah)': (csp_summary['Throughput'], static_summary['Throughput']),
+from results_store import DEFAULT_DB, RUN_COLUMNS, ResultsStore
+
+# KPI ringkasan yang dibandingkan (nama di run_metrics -> label grafik)
+SUMMARY_METRICS = {
+    'vehicles_arrived': 'Total Kendaraan Tiba',
+    'avg_waiting_time': 'Waktu Tunggu Rata-Rata per Kendaraan',
+    'avg_travel_time': 'Waktu Perjalanan Rata-Rata per Kendaraan',
+    'throughput': 'Throughput (kendaraan/langkah)',
 }
 
-metric_names = list(metrics.keys())
-csp_values = [metrics[name][0] for name in metric_names]
-static_values = [metrics[name][1] for name in metric_names]
-
-x = np.arange(len(metric_names)) # Posisi label di x-axis
-width = 0.35 # Lebar bar
-
-fig, ax = plt.subplots(figsize=(12, 7))
-rects1 = ax.bar(x - width/2, csp_values, width, label='CSP Adaptif', color='skyblue')
-rects2 = ax.bar(x + width/2, static_values, width, label='Statis', color='lightcoral')
-
-# Fungsi untuk menambahkan nilai di atas bar
-def autolabel(rects):
-    for rect in rects:
-        height = rect.get_height()
-        ax.annotate(f'{height:.2f}',
-                    xy=(rect.get_x() + rect.get_width() / 2, height),
-                    xytext=(0, 3),  # 3 points vertical offset
-                    textcoords="offset points",
-                    ha='center', va='bottom')
-
-autolabel(rects1)
-autolabel(rects2)
-
-ax.set_ylabel('Nilai Metrik')
-ax.set_title('Perbandingan Metrik Performa Utama')
-ax.set_xticks(x)
-ax.set_xticklabels(metric_names, rotation=20, ha='right')
-ax.legend()
-ax.grid(axis='y', linestyle=':', alpha=0.7)
-plt.tight_layout()
-plt.show()
-
-
-# --- 5. Buat Grafik Perbandingan Waktu Tunggu Spesifik Jalur (Time Series) ---
-
-plt.figure(figsize=(15, 10))
-
-# Waktu Tunggu NS
-plt.subplot(2, 1, 1)
-plt.plot(df_adaptive['step'], df_adaptive['ns_avg_waiting_time'], label='CSP Adaptif NS', color='blue', alpha=0.7)
-plt.plot(df_static['step'], df_static['ns_avg_waiting_time'], label='Statis NS', color='skyblue', linestyle='--')
-plt.title('Perbandingan Rata-rata Waktu Tunggu NS per Langkah')
-plt.xlabel('Langkah Simulasi')
-plt.ylabel('Waktu Tunggu Rata-rata (detik)')
-plt.legend()
-plt.grid(True, linestyle=':', alpha=0.6)
-plt.ylim(bottom=0)
-
-# Waktu Tunggu EW
-plt.subplot(2, 1, 2)
-plt.plot(df_adaptive['step'], df_adaptive['ew_avg_waiting_time'], label='CSP Adaptif EW', color='red', alpha=0.7)
-plt.plot(df_static['step'], df_static['ew_avg_waiting_time'], label='Statis EW', color='lightcoral', linestyle='--')
-plt.title('Perbandingan Rata-rata Waktu Tunggu EW per Langkah')
-plt.xlabel('Langkah Simulasi')
-plt.ylabel('Waktu Tunggu Rata-rata (detik)')
-plt.legend()
-plt.grid(True, linestyle=':', alpha=0.6)
-plt.ylim(bottom=0)
-plt.tight_layout()
-plt.show()
-
-print("\nGrafik perbandingan telah dibuat dan ditampilkan.")
-print("Periksa jendela pop-up grafik.")
\ No newline at end of file
+# Grafik deret waktu: (judul figure, [(kolom series, judul subplot, label sumbu y)])
+SERIES_FIGURES = [
+    ('time_series', [
+        ('halting_vehicles', 'Perbandingan Kepadatan Antrean (Halting Vehicles) Seiring Waktu',
+         'Jumlah Kendaraan Berhenti'),
+        ('waiting_time', 'Perbandingan Total Waktu Tunggu per Langkah', 'Total Waktu Tunggu (detik) per Langkah'),
+    ]),
+    ('approach_wait', [
+        ('ns_avg_wait', 'Perbandingan Rata-rata Waktu Tunggu NS per Langkah', 'Waktu Tunggu Rata-rata (detik)'),
+        ('ew_avg_wait', 'Perbandingan Rata-rata Waktu Tunggu EW per Langkah', 'Waktu Tunggu Rata-rata (detik)'),
+    ]),
+]
+
+CONTROLLER_LABELS = {'csp': 'CSP Adaptif', 'static': 'Statis'}
+
+
+def group_label(group_by, values):
+    """Label of a group of runs, e.g. 'CSP Adaptif' or 'CSP Adaptif, scale=2.0'."""
+    parts = []
+    for name, value in zip(group_by, values):
+        if name == 'controller':
+            parts.append(CONTROLLER_LABELS.get(value, value))
+        else:
+            parts.append(f"{name}={value}")
+    return ', '.join(parts)
+
+
+def print_table(store, metrics, group_by, confidence, filters):
+    """Mean +- CI half width of every metric per group; returns {metric: metric_stats() rows}."""
+    stats = {metric: store.metric_stats(metric, group_by, confidence, **filters) for metric in metrics}
+    print(f"\n--- Perbandingan KPI (rata-rata +- IK {confidence:.0%} antar run) ---")
+    for metric, rows in stats.items():
+        print(f"{metric}:")
+        for row in rows:
+            label = group_label(group_by, [row[name] for name in group_by])
+            ci = f" +- {row['ci']:.2f}" if not np.isnan(row['ci']) else ""
+            print(f"  {label:>32}: {row['mean']:.2f}{ci} (n={row['n']})")
+    return stats
+
+
+def plot_metrics(stats, group_by, confidence, save_dir=None):
+    """Grouped bar chart of the KPIs with confidence intervals as error bars."""
+    import matplotlib.pyplot as plt
+
+    metric_names = [metric for metric in stats if stats[metric]]
+    groups = sorted({tuple(row[name] for name in group_by) for metric in metric_names for row in stats[metric]})
+    x = np.arange(len(metric_names)) # Posisi label di x-axis
+    width = 0.8 / max(len(groups), 1) # Lebar bar
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    for k, group in enumerate(groups):
+        values, errors = [], []
+        for metric in metric_names:
+            row = next((r for r in stats[metric] if tuple(r[name] for name in group_by) == group), None)
+            values.append(row['mean'] if row else np.nan)
+            errors.append(row['ci'] if row and not np.isnan(row['ci']) else 0.0)
+        rects = ax.bar(x - 0.4 + width * (k + 0.5), values, width, yerr=errors, capsize=4,
+                       label=group_label(group_by, group))
+        # Nilai di atas bar
+        for rect, value in zip(rects, values):
+            ax.annotate(f'{value:.2f}', xy=(rect.get_x() + rect.get_width() / 2, rect.get_height()),
+                        xytext=(0, 3), textcoords="offset points", ha='center', va='bottom')
+
+    ax.set_ylabel('Nilai Metrik')
+    ax.set_title(f'Perbandingan Metrik Performa Utama (IK {confidence:.0%})')
+    ax.set_xticks(x)
+    ax.set_xticklabels([SUMMARY_METRICS.get(m, m) for m in metric_names], rotation=20, ha='right')
+    ax.legend()
+    ax.grid(axis='y', linestyle=':', alpha=0.7)
+    plt.tight_layout()
+    _show(fig, 'metrics', save_dir)
+
+
+def plot_series(store, group_by, bucket, confidence, filters, save_dir=None):
+    """Per-step means across runs with a shaded confidence band, one figure per SERIES_FIGURES entry."""
+    import matplotlib.pyplot as plt
+
+    for name, panels in SERIES_FIGURES:
+        fig = plt.figure(figsize=(15, 10))
+        for i, (column, title, ylabel) in enumerate(panels):
+            plt.subplot(len(panels), 1, i + 1)
+            for group, band in store.series_stats(column, bucket, group_by, confidence, **filters).items():
+                step = np.array(band['step'])
+                mean = np.array(band['mean'])
+                ci = np.nan_to_num(np.array(band['ci'], dtype=np.float64))
+                line, = plt.plot(step, mean, label=group_label(group_by, group), alpha=0.8)
+                plt.fill_between(step, mean - ci, mean + ci, color=line.get_color(), alpha=0.2)
+            plt.title(title)
+            plt.xlabel('Langkah Simulasi')
+            plt.ylabel(ylabel)
+            plt.legend()
+            plt.grid(True, linestyle=':', alpha=0.6)
+            plt.ylim(bottom=0) # Pastikan Y-axis mulai dari 0
+        plt.tight_layout()
+        _show(fig, name, save_dir)
+
+
+def _show(fig, name, save_dir):
+    import matplotlib.pyplot as plt
+    if save_dir is None:
+        plt.show()
+        return
+    os.makedirs(save_dir, exist_ok=True)
+    fig.savefig(os.path.join(save_dir, f"{name}.png"))
+    plt.close(fig)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare controllers over the runs in the results store.")
+    parser.add_argument('--db', default=DEFAULT_DB, help="results_store SQLite file")
+    parser.add_argument('--metrics', nargs='+', default=list(SUMMARY_METRICS), help="run_metrics names to compare")
+    parser.add_argument('--group-by', nargs='+', default=['controller'], choices=RUN_COLUMNS)
+    parser.add_argument('--controllers', nargs='+', default=None)
+    parser.add_argument('--seeds', nargs='+', type=int, default=None)
+    parser.add_argument('--scales', nargs='+', type=float, default=None)
+    parser.add_argument('--steps', nargs='+', type=int, default=None, help="Step budgets")
+    parser.add_argument('--scenario', nargs='+', default=None, help="Scenario hashes")
+    parser.add_argument('--metrics-mode', nargs='+', default=None, choices=('traci', 'tripinfo'),
+                        help="KPI source of the runs (traci polling or SUMO tripinfo output)")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--bucket', type=int, default=10, help="Steps per point of the time-series plots")
+    parser.add_argument('--no-plot', action='store_true', help="Print the KPI table only")
+    parser.add_argument('--save-dir', default=None, help="Save the figures as PNG instead of showing them")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} not found: run traffic_light_csp.py, statis.py or batch_runner.py first")
+    filters = {'controller': args.controllers, 'seed': args.seeds, 'scale': args.scales, 'steps': args.steps,
+               'scenario': args.scenario, 'metrics_mode': args.metrics_mode}
+    group_by = list(args.group_by)
+    with ResultsStore(args.db) as store:
+        runs = store.runs(**filters)
+        if not runs:
+            print("Tidak ada run yang cocok di results store.")
+            return
+        print(f"{len(runs)} run dari {args.db}")
+        # KPI mode traci dan tripinfo diukur berbeda (mis. waitingTime per trip vs. waktu tunggu
+        # akumulasi), jadi keduanya tidak pernah dirata-ratakan dalam satu kelompok
+        if 'metrics_mode' not in group_by and len({run['metrics_mode'] for run in runs}) > 1:
+            group_by.append('metrics_mode')
+            print("Run dengan metrics_mode berbeda ditemukan: dikelompokkan juga per metrics_mode.")
+        stats = print_table(store, args.metrics, group_by, args.confidence, filters)
+        if args.no_plot:
+            return
+        plot_series(store, group_by, args.bucket, args.confidence, filters, args.save_dir)
+        plot_metrics(stats, group_by, args.confidence, args.save_dir)
+
+    print("\nGrafik perbandingan telah dibuat dan ditampilkan.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+
+
+class PlanCache:
+    """
+    LRU cache of signal plans keyed on the quantized intersection state.
+
+    The key is the dominant direction followed by the NS/EW vehicle counts and
+    waiting-time sums, each divided into buckets (count_bucket / waiting_bucket;
+    None drops the field from the key). The direction (ns > ew, ew > ns or equal)
+    picks the feasible set and the imbalance penalty of the green_solver cost, so it
+    is always part of the key: a bucket never mixes states the solver treats
+    differently. Entries are only valid for one set of weights and green bounds: the
+    caller passes that signature to validate() and the cache clears itself when it
+    changes.
+    """
+
+    def __init__(self, maxsize=1024, count_bucket=5, waiting_bucket=100.0):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.count_bucket = count_bucket
+        self.waiting_bucket = waiting_bucket
+        self._plans = OrderedDict()
+        self._signature = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._plans)
+
+    def _bucket(self, value, size):
+        if size is None:
+            return None
+        return int(value // size)
+
+    def key(self, ns_vehicle_count, ew_vehicle_count, ns_waiting_time, ew_waiting_time):
+        """(direction: 1 NS has more vehicles / -1 EW / 0 equal, bucketed counts, bucketed waiting times)."""
+        return (
+            (ns_vehicle_count > ew_vehicle_count) - (ns_vehicle_count < ew_vehicle_count),
+            self._bucket(ns_vehicle_count, self.count_bucket),
+            self._bucket(ew_vehicle_count, self.count_bucket),
+            self._bucket(ns_waiting_time, self.waiting_bucket),
+            self._bucket(ew_waiting_time, self.waiting_bucket),
+        )
+
+    def validate(self, signature):
+        """Drops every entry if the weights / green bounds changed since the last call."""
+        if signature != self._signature:
+            if self._plans:
+                self.invalidations += 1
+            self._plans.clear()
+            self._signature = signature
+
+    def lookup(self, key):
+        """Returns (found, plan). plan is (ns_green, ew_green) or None for an infeasible state."""
+        try:
+            plan = self._plans[key]
+        except KeyError:
+            self.misses += 1
+            return False, None
+        self._plans.move_to_end(key)
+        self.hits += 1
+        return True, plan
+
+    def store(self, key, plan):
+        self._plans[key] = plan
+        self._plans.move_to_end(key)
+        if len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._plans.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._plans),
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
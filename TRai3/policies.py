@@ -0,0 +1,145 @@
+"""
+Signal policies for controller_harness.ControllerHarness.
+
+A policy sees one controller_harness.Observation per simulated second of green
+and returns the direction (NS = 0 or EW = 1) that should be green; the harness
+handles the yellow phase and all metrics. select() must stay O(1) on top of the
+O(lanes) observation, so a policy can decide every step.
+"""
+import numpy as np
+
+from controller_harness import EW, NS, START
+from green_solver import DEFAULT_WEIGHTS, solve_vectorized
+
+
+class Policy:
+    """Base class: `name` labels the log file and the runs in the results store."""
+    name = None
+
+    def __init__(self):
+        self.greens = (np.nan, np.nan) # Hijau NS/EW yang direncanakan (live_metrics), NaN jika tidak ada rencana
+
+    def reset(self, obs):
+        """Called once before the first step of a run."""
+
+    def select(self, obs):
+        raise NotImplementedError
+
+    def params(self):
+        """Settings recorded with each run in the results store."""
+        return {}
+
+
+class FixedTimePolicy(Policy):
+    """Fixed cycle: green_ew seconds EW, then green_ns seconds NS (the static controller's signal_cycle)."""
+    name = 'fixed_time'
+
+    def __init__(self, green_ns=60, green_ew=60):
+        super().__init__()
+        self.greens = (green_ns, green_ew)
+
+    def select(self, obs):
+        return 1 - obs.green if obs.elapsed >= self.greens[obs.green] else obs.green
+
+    def params(self):
+        return {'green_ns': self.greens[NS], 'green_ew': self.greens[EW]}
+
+
+class CspPolicy(FixedTimePolicy):
+    """
+    The CSP green split, solved once per cycle when the cycle's first direction
+    turns green (green_solver, same cost and feasibility rules as TrafficLightCSP)
+    and then run as a fixed cycle. The cycle is the same controller_harness.signal_cycle
+    TrafficLightCSP runs; only the decision points differ, since TrafficLightCSP
+    re-plans at step 1 and multiples of 50 and lets the SUMO program run in between.
+    """
+    name = 'csp_cycle'
+
+    def __init__(self, min_green=20, max_green=60, weights=None):
+        super().__init__(min_green, min_green)
+        self.min_green = min_green
+        self.max_green = max_green
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.solves = 0
+
+    def reset(self, obs):
+        self.solves = 0
+
+    def select(self, obs):
+        if obs.green == START and obs.elapsed == 0:
+            plan = solve_vectorized(obs.vehicles[NS], obs.vehicles[EW], obs.waiting[NS], obs.waiting[EW],
+                                    self.weights, self.min_green, self.max_green)
+            self.greens = plan[:2] if plan is not None else (self.min_green, self.min_green)
+            self.solves += 1
+        return super().select(obs)
+
+    def params(self):
+        return dict(self.weights, min_green=self.min_green, max_green=self.max_green)
+
+
+class MaxPressurePolicy(Policy):
+    """
+    Max-pressure: after min_green, green goes to the direction with the larger
+    pressure (halting vehicles upstream minus downstream). The outgoing edges of
+    this intersection leave the network, so the pressure is the incoming queue;
+    ties keep the current green.
+    """
+    name = 'max_pressure'
+
+    def __init__(self, min_green=20):
+        super().__init__()
+        self.min_green = min_green # Setiap pergantian memakan waktu kuning, jadi jangan terlalu pendek
+
+    def select(self, obs):
+        if obs.elapsed < self.min_green:
+            return obs.green
+        other = 1 - obs.green
+        return other if obs.queue[other] > obs.queue[obs.green] else obs.green
+
+    def params(self):
+        return {'min_green': self.min_green}
+
+
+class ActuatedPolicy(Policy):
+    """
+    Gap-based actuated control, with the approach lanes (about 120 m) as the
+    detection zone: the green is extended while vehicles keep coming and ends
+    (gap-out) once its approach has been empty for `gap` seconds, or at max_green
+    (max-out). It only switches when the other direction has a vehicle on its
+    approach; otherwise the green rests.
+    """
+    name = 'actuated'
+
+    def __init__(self, min_green=10, max_green=60, gap=3):
+        super().__init__()
+        self.min_green = min_green
+        self.max_green = max_green
+        self.gap = gap
+        self._gap_time = 0 # Detik tanpa kendaraan di pendekat yang hijau
+        self.gap_outs = 0
+        self.max_outs = 0
+
+    def reset(self, obs):
+        self._gap_time = 0
+        self.gap_outs = self.max_outs = 0
+
+    def select(self, obs):
+        if obs.elapsed == 0:
+            self._gap_time = 0
+        self._gap_time = 0 if obs.vehicles[obs.green] > 0 else self._gap_time + 1
+        other = 1 - obs.green
+        if obs.elapsed < self.min_green or obs.vehicles[other] == 0:
+            return obs.green
+        if obs.elapsed >= self.max_green:
+            self.max_outs += 1
+            return other
+        if self._gap_time >= self.gap:
+            self.gap_outs += 1
+            return other
+        return obs.green
+
+    def params(self):
+        return {'min_green': self.min_green, 'max_green': self.max_green, 'gap': self.gap}
+
+
+POLICIES = {policy.name: policy for policy in (FixedTimePolicy, CspPolicy, MaxPressurePolicy, ActuatedPolicy)}
@@ -0,0 +1,241 @@
+"""
+SQLite store of experiment results.
+
+One row per run in `runs` (controller, seed, scale, step budget, scenario hash,
+parameters such as the CSP weights), the scalar KPIs of its summary in
+`run_metrics` and the per-step log in `series`, keyed by (run_id, step).
+Controllers write to it when their `results_store` attribute is set;
+perbandingan.py aggregates over it with SQL, so series are never loaded whole.
+"""
+import datetime
+import json
+import math
+import os
+import sqlite3
+from statistics import NormalDist
+
+import checkpoint
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.db')
+
+# Kolom deret per langkah yang sama untuk semua controller; kolom yang tidak dicatat controller tetap NULL
+SERIES_COLUMNS = ('halting_vehicles', 'waiting_time', 'ns_queue', 'ew_queue', 'ns_avg_wait', 'ew_avg_wait')
+RUN_COLUMNS = ('controller', 'seed', 'scale', 'steps', 'scenario', 'metrics_mode', 'backend', 'fast_forward',
+               'warm_start')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    controller TEXT NOT NULL,
+    seed INTEGER,
+    scale REAL,
+    steps INTEGER,
+    scenario TEXT,
+    metrics_mode TEXT,
+    backend TEXT,
+    fast_forward INTEGER,
+    warm_start INTEGER,
+    params TEXT,
+    created TEXT,
+    finished INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_by_controller ON runs (controller, scenario, seed);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS run_metrics_by_name ON run_metrics (name, run_id);
+CREATE TABLE IF NOT EXISTS series (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    step INTEGER NOT NULL,
+    {', '.join(f'{name} REAL' for name in SERIES_COLUMNS)},
+    PRIMARY KEY (run_id, step)
+) WITHOUT ROWID;
+"""
+
+
+def t_critical(df, confidence=0.95):
+    """Two-sided Student t critical value; exact for df 1 and 2, Hill's expansion above (error < 1%)."""
+    p = 0.5 + confidence / 2
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) * math.sqrt(2 / (4 * p * (1 - p)))
+    z = NormalDist().inv_cdf(p)
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * df ** 4))
+
+
+def confidence_interval(n, total, total_sq, confidence=0.95):
+    """(mean, half width) from a count, sum and sum of squares; the half width is nan below two samples."""
+    if n == 0:
+        return math.nan, math.nan
+    mean = total / n
+    if n < 2:
+        return mean, math.nan
+    variance = max(total_sq - n * mean * mean, 0.0) / (n - 1)
+    return mean, t_critical(n - 1, confidence) * math.sqrt(variance / n)
+
+
+def _option(sumo_args, name, default, cast):
+    args = list(sumo_args)
+    return cast(args[args.index(name) + 1]) if name in args[:-1] else default
+
+
+def run_metadata(env, controller, steps, **extra):
+    """runs-table fields of a run on `env`; SUMO's default seed (23) and scale (1) apply when not given."""
+    meta = {
+        'controller': controller,
+        'seed': _option(env.sumo_args, '--seed', 23, int),
+        'scale': _option(env.sumo_args, '--scale', 1.0, float),
+        'steps': steps,
+        'scenario': checkpoint.scenario_key(env.config_file),
+        'metrics_mode': env.metrics_mode,
+        'backend': env.backend,
+        'warm_start': env.warmup_steps if env.warm_start else 0,
+    }
+    meta.update(extra)
+    return meta
+
+
+class ResultsStore:
+    """
+    Runs, KPIs and per-step series in one SQLite file.
+
+    Several processes may write to the same file (batch_runner workers): the
+    database runs in WAL mode and every write is a short transaction. A run is only
+    seen by the queries once finish_run() has marked it finished.
+    """
+
+    def __init__(self, path=DEFAULT_DB, timeout=60.0):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def begin_run(self, meta, params=None):
+        """Registers a run (`meta` fields from RUN_COLUMNS) and returns its run_id."""
+        unknown = set(meta) - set(RUN_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown run field(s) {sorted(unknown)}, expected any of {RUN_COLUMNS}")
+        fields = dict(meta, params=json.dumps(params or {}, sort_keys=True),
+                      created=datetime.datetime.now().isoformat(timespec='seconds'))
+        with self._conn:
+            cursor = self._conn.execute(
+                f"INSERT INTO runs ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})",
+                list(fields.values()))
+        return cursor.lastrowid
+
+    def series_writer(self, run_id, column_map):
+        """
+        MetricsSink on_flush callback storing the flushed rows of `run_id`.
+        column_map maps log column names to SERIES_COLUMNS ('step' maps to itself).
+        """
+        names = [name for name in column_map if name != 'step']
+        targets = [column_map[name] for name in names]
+        unknown = set(targets) - set(SERIES_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown series column(s) {sorted(unknown)}, expected any of {SERIES_COLUMNS}")
+        sql = (f"INSERT OR REPLACE INTO series (run_id, step, {', '.join(targets)}) "
+               f"VALUES (?, ?, {', '.join('?' * len(targets))})")
+
+        def write(rows):
+            columns = [rows['step'].tolist()] + [rows[name].tolist() for name in names]
+            with self._conn:
+                self._conn.executemany(sql, ((run_id,) + values for values in zip(*columns)))
+        return write
+
+    def finish_run(self, run_id, summary):
+        """Stores the numeric fields of a controller summary() and marks the run finished."""
+        metrics = [(run_id, name, float(value)) for name, value in summary.items()
+                   if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO run_metrics VALUES (?, ?, ?)", metrics)
+            self._conn.execute("UPDATE runs SET finished = 1 WHERE run_id = ?", (run_id,))
+
+    @staticmethod
+    def _where(filters):
+        """WHERE clause over finished runs; a filter value may be a list (IN)."""
+        clauses, args = ['r.finished = 1'], []
+        for name, value in filters.items():
+            if name not in RUN_COLUMNS:
+                raise ValueError(f"Cannot filter on '{name}', expected any of {RUN_COLUMNS}")
+            if value is None:
+                continue
+            values = list(value) if isinstance(value, (list, tuple)) else [value]
+            clauses.append(f"r.{name} IN ({', '.join('?' * len(values))})")
+            args += values
+        return ' AND '.join(clauses), args
+
+    def runs(self, **filters):
+        """Finished runs matching `filters` (RUN_COLUMNS) as dicts, params decoded."""
+        where, args = self._where(filters)
+        cursor = self._conn.execute(f"SELECT * FROM runs r WHERE {where} ORDER BY r.run_id", args)
+        names = [d[0] for d in cursor.description]
+        rows = [dict(zip(names, row)) for row in cursor]
+        for row in rows:
+            row['params'] = json.loads(row['params'])
+        return rows
+
+    def metric_names(self):
+        return [name for (name,) in self._conn.execute("SELECT DISTINCT name FROM run_metrics ORDER BY name")]
+
+    def metric_stats(self, metric, group_by=('controller',), confidence=0.95, **filters):
+        """
+        Mean and confidence interval of one KPI per group of runs, aggregated in SQL.
+        Returns [{group fields..., 'n', 'mean', 'ci'}] where ci is the half width.
+        """
+        where, args = self._where(filters)
+        group = ', '.join(f"r.{name}" for name in group_by)
+        cursor = self._conn.execute(
+            f"SELECT {group}, COUNT(m.value), SUM(m.value), SUM(m.value * m.value) "
+            f"FROM run_metrics m JOIN runs r USING (run_id) "
+            f"WHERE m.name = ? AND {where} GROUP BY {group} ORDER BY {group}", [metric] + args)
+        result = []
+        for row in cursor:
+            mean, ci = confidence_interval(*row[len(group_by):], confidence=confidence)
+            result.append(dict(zip(group_by, row), n=row[len(group_by)], mean=mean, ci=ci))
+        return result
+
+    def series_stats(self, column, bucket=10, group_by=('controller',), confidence=0.95, **filters):
+        """
+        Per-step mean and confidence band of a series column across runs, per group.
+
+        Steps are averaged per run into buckets of `bucket` steps first (one value per
+        run and bucket), so every run weighs the same. Returns
+        {group tuple: {'step': [...], 'n': [...], 'mean': [...], 'ci': [...]}}.
+        """
+        if column not in SERIES_COLUMNS:
+            raise ValueError(f"Unknown series column '{column}', expected any of {SERIES_COLUMNS}")
+        where, args = self._where(filters)
+        group = ', '.join(f"r.{name}" for name in group_by)
+        cursor = self._conn.execute(
+            f"SELECT {group}, b.bucket, COUNT(b.value), SUM(b.value), SUM(b.value * b.value) FROM ("
+            f"  SELECT run_id, step / ? * ? AS bucket, AVG({column}) AS value FROM series"
+            f"  WHERE {column} IS NOT NULL GROUP BY run_id, bucket"
+            f") b JOIN runs r USING (run_id) WHERE {where} "
+            f"GROUP BY {group}, b.bucket ORDER BY {group}, b.bucket", [bucket, bucket] + args)
+        result = {}
+        for row in cursor:
+            key = tuple(row[:len(group_by)])
+            band = result.setdefault(key, {'step': [], 'n': [], 'mean': [], 'ci': []})
+            mean, ci = confidence_interval(*row[len(group_by) + 1:], confidence=confidence)
+            band['step'].append(row[len(group_by)])
+            band['n'].append(row[len(group_by) + 1])
+            band['mean'].append(mean)
+            band['ci'].append(ci)
+        return result
@@ -1,14 +1,51 @@
-import traci
+import os
 import sys
+import time
 import numpy as np
 from sumoenv import SumoEnv # Pastikan sumoenv.py ada dan benar
+from metrics_sink import MetricsSink
+from vehicle_stats import VehicleStats
+import results_store
+from controller_harness import EW_LANES, NS_LANES, signal_cycle, summary_dict
+import tripinfo
+
+# Kolom log statis (nama, format CSV) - dibaca oleh perbandingan.py
+LOG_COLUMNS = [
+    ('step', 'd'),
+    ('queue_length', 'd'),
+    ('waiting_time', ''),
+    ('ns_avg_waiting_time', '.2f'),
+    ('ew_avg_waiting_time', '.2f'),
+]
+
+# Kolom log -> kolom deret results_store (antrean per arah tidak dicatat oleh controller statis)
+STORE_COLUMNS = {
+    'step': 'step',
+    'queue_length': 'halting_vehicles',
+    'waiting_time': 'waiting_time',
+    'ns_avg_waiting_time': 'ns_avg_wait',
+    'ew_avg_waiting_time': 'ew_avg_wait',
+}
 
 class TrafficLightStatic:
-    def __init__(self):
-        self.env = SumoEnv(label='static_sim', gui_f=True) # Label yang berbeda untuk sim statis
+    def __init__(self, use_subscriptions=True, backend='libsumo', env=None, profiler=None, fast_forward=False,
+                 gui_f=False):
+        if env is None:
+            env = SumoEnv(label='static_sim', gui_f=gui_f, use_subscriptions=use_subscriptions,
+                          backend=backend) # Label yang berbeda untuk sim statis
+        if profiler is not None:
+            env.profiler = profiler
+        if fast_forward and env.metrics_mode != 'tripinfo':
+            raise ValueError("fast_forward needs an env with metrics_mode='tripinfo' (vehicles are not polled per step)")
+        self.env = env
+        # Siklus statis diprogram sekali ke SUMO; satu simulationStep(targetTime) per fase
+        self.fast_forward = fast_forward
+        self.profiler = env.profiler # Timer per tahap; NULL_PROFILER jika tidak diaktifkan
         self.tl_id = "gneJ00"
-        self.ns_lanes = ['-gneE0_0', '-gneE0_1', '-gneE0_2', '-gneE2_0', '-gneE2_1', '-gneE2_2']
-        self.ew_lanes = ['-gneE1_0', '-gneE1_1', '-gneE1_2', '-gneE3_0', '-gneE3_1', '-gneE3_2']
+        self.ns_lanes = list(NS_LANES)
+        self.ew_lanes = list(EW_LANES)
+        self.ns_lane_idx = self.env.metrics.lane_indices(self.ns_lanes)
+        self.ew_lane_idx = self.env.metrics.lane_indices(self.ew_lanes)
         
         # Pengaturan lampu lalu lintas statis
         self.green_ns = 60 # Durasi lampu hijau untuk arah North-South
@@ -17,10 +54,19 @@ class TrafficLightStatic:
         self.red_time = 0 # Asumsi TraCI mengelola waktu merah antar fase dengan baik, atau bisa 2-3s jika diperlukan
 
         self.step = 0
-        self.total_vehicles_departed = 0
+        self.wall_time = 0.0
+        self.total_vehicles_arrived = 0
         self.total_waiting_time = 0.0
-        self.vehicle_travel_times = {}
-        self.vehicle_departure_times = {}
+        # Langkah berangkat per kendaraan aktif + agregat waktu perjalanan (lihat vehicle_stats.py)
+        self.vehicle_stats = VehicleStats()
+        # Ringkasan tripinfo.read_tripinfo() jika env berjalan dengan metrics_mode='tripinfo'
+        self.trip_summary = None
+        # Opsional: results_store.ResultsStore yang mencatat metadata, KPI dan deret per langkah setiap run
+        self.results_store = None
+        self._run_id = None
+        # Opsional: live_metrics.LiveMetricsWriter, menerima satu baris per langkah yang dicatat (lihat live_metrics.py)
+        self.live_metrics = None
+        self._phase = 0
         
         # Metrik untuk logging
         self.current_ns_waiting_time = 0.0
@@ -30,27 +76,25 @@ class TrafficLightStatic:
 
         # Batas langkah simulasi untuk perbandingan yang adil
         self.max_simulation_steps = 500 # === PASTIKAN NILAI INI SAMA DENGAN CSP ===
+        self.log_path = 'static_queue_length.txt'
+        self.log_formats = ('csv',) # Tambahkan 'npz' / 'parquet' untuk output kolom biner
+        self._sink = None
 
     def _update_vehicle_metrics(self):
         """Updates vehicle departure and travel times."""
+        metrics = self.env.metrics
         # Update departure times for newly arrived vehicles in the simulation
-        for veh_id in traci.vehicle.getIDList():
-            if veh_id not in self.vehicle_departure_times:
-                self.vehicle_departure_times[veh_id] = self.step
+        self.vehicle_stats.observe(metrics.vehicle_ids, self.step)
 
         # Calculate travel times for vehicles that have arrived at their destination
-        arrived_vehicles = traci.simulation.getArrivedIDList()
-        for veh_id in arrived_vehicles:
-            if veh_id in self.vehicle_departure_times:
-                travel_time = self.step - self.vehicle_departure_times[veh_id]
-                self.vehicle_travel_times[veh_id] = travel_time
-                del self.vehicle_departure_times[veh_id]
+        self.vehicle_stats.arrive(metrics.arrived_ids, self.step)
 
     def _get_current_lane_metrics(self):
         """
         Collects real-time queue lengths (halting vehicles) and average waiting times per lane.
         This runs at the beginning of each cycle to get current state (for logging purposes only in static).
         """
+        metrics = self.env.metrics
         ns_queue = 0
         ew_queue = 0
         ns_waiting_sum = 0.0
@@ -58,18 +102,28 @@ class TrafficLightStatic:
         ns_vehicle_count_for_avg_wait = 0 
         ew_vehicle_count_for_avg_wait = 0
 
-        for lane in self.ns_lanes:
-            ns_queue += traci.lane.getLastStepHaltingNumber(lane)
-            current_lane_vehicles = traci.lane.getLastStepVehicleIDs(lane)
+        if not metrics.track_vehicles:
+            # Tanpa subscription kendaraan: waktu tunggu lajur = jumlah waktu tunggu kendaraannya
+            ns_count = int(metrics.lane_vehicle_number[self.ns_lane_idx].sum())
+            ew_count = int(metrics.lane_vehicle_number[self.ew_lane_idx].sum())
+            self.current_ns_waiting_time = float(metrics.lane_waiting_time[self.ns_lane_idx].sum()) / ns_count if ns_count > 0 else 0.0
+            self.current_ew_waiting_time = float(metrics.lane_waiting_time[self.ew_lane_idx].sum()) / ew_count if ew_count > 0 else 0.0
+            self.current_ns_queue_length = int(metrics.lane_halting_number[self.ns_lane_idx].sum())
+            self.current_ew_queue_length = int(metrics.lane_halting_number[self.ew_lane_idx].sum())
+            return
+
+        for i in self.ns_lane_idx:
+            ns_queue += int(metrics.lane_halting_number[i])
+            current_lane_vehicles = metrics.lane_vehicle_ids[i]
             for veh_id in current_lane_vehicles:
-                ns_waiting_sum += traci.vehicle.getWaitingTime(veh_id)
+                ns_waiting_sum += metrics.vehicle_waiting_time[veh_id]
                 ns_vehicle_count_for_avg_wait += 1
         
-        for lane in self.ew_lanes:
-            ew_queue += traci.lane.getLastStepHaltingNumber(lane)
-            current_lane_vehicles = traci.lane.getLastStepVehicleIDs(lane)
+        for i in self.ew_lane_idx:
+            ew_queue += int(metrics.lane_halting_number[i])
+            current_lane_vehicles = metrics.lane_vehicle_ids[i]
             for veh_id in current_lane_vehicles:
-                ew_waiting_sum += traci.vehicle.getWaitingTime(veh_id)
+                ew_waiting_sum += metrics.vehicle_waiting_time[veh_id]
                 ew_vehicle_count_for_avg_wait += 1
 
         self.current_ns_waiting_time = (ns_waiting_sum / ns_vehicle_count_for_avg_wait) if ns_vehicle_count_for_avg_wait > 0 else 0.0
@@ -79,80 +133,143 @@ class TrafficLightStatic:
         self.current_ew_queue_length = ew_queue
 
 
+    def _advance_phase(self, phase_duration):
+        """Fast-forward: the (already programmed) phase in one call, one log row for its last step."""
+        steps = min(int(phase_duration), self.max_simulation_steps - self.step)
+        if steps <= 0:
+            return
+        with self.profiler.stage('static.simulation_step'):
+            self.env.fast_forward(steps)
+        self.step += steps - 1
+        total_halting_vehicles_current_step = int(self.env.metrics.lane_halting_number[self.ns_lane_idx + self.ew_lane_idx].sum())
+        with self.profiler.stage('static.lane_metrics'):
+            self._get_current_lane_metrics()
+        current_total_waiting_time_step = self.env.get_waiting_time()
+        with self.profiler.stage('static.log'):
+            self._sink.append(self.step, total_halting_vehicles_current_step, current_total_waiting_time_step,
+                              self.current_ns_waiting_time, self.current_ew_waiting_time)
+            self._publish_live(total_halting_vehicles_current_step, current_total_waiting_time_step)
+        self.step += 1
+
+    def _publish_live(self, halting_vehicles, waiting_time):
+        if self.live_metrics is not None:
+            self.live_metrics.publish(self.step, halting_vehicles, waiting_time, self.current_ns_queue_length,
+                                      self.current_ew_queue_length, self.current_ns_waiting_time,
+                                      self.current_ew_waiting_time, self._phase, self.green_ns, self.green_ew)
+
     def _run_phase(self, phase_duration, phase_id):
         """Helper to run a traffic light phase and update metrics and log."""
+        self._phase = phase_id
+        if self.fast_forward:
+            self._advance_phase(phase_duration)
+            return
         self.env.set_traffic_light_phase(phase_id, phase_duration)
         for _ in range(int(phase_duration)):
             # === PENTING: Pengecekan untuk menghentikan simulasi jika mencapai batas langkah ===
             if self.step >= self.max_simulation_steps:
                 break 
             
-            self.env.simulation_step()
-            self._update_vehicle_metrics()
+            with self.profiler.stage('static.simulation_step'):
+                self.env.simulation_step()
+            if self.env.metrics.track_vehicles: # Mode tripinfo: dibaca dari output SUMO setelah simulasi
+                with self.profiler.stage('static.vehicle_accounting'):
+                    self._update_vehicle_metrics()
             
-            total_halting_vehicles_current_step = sum(traci.lane.getLastStepHaltingNumber(lane) for lane in self.ns_lanes + self.ew_lanes)
+            total_halting_vehicles_current_step = int(self.env.metrics.lane_halting_number[self.ns_lane_idx + self.ew_lane_idx].sum())
             current_total_waiting_time_step = self.env.get_waiting_time() # Total waiting time at intersection for this step
 
             self.total_waiting_time += current_total_waiting_time_step
             
             # Mendapatkan metrik untuk logging
-            self._get_current_lane_metrics()
+            with self.profiler.stage('static.lane_metrics'):
+                self._get_current_lane_metrics()
 
-            with open('static_queue_length.txt', 'a') as f:
-                f.write(f"{self.step},{total_halting_vehicles_current_step},{current_total_waiting_time_step},"
-                        f"{self.current_ns_waiting_time:.2f},{self.current_ew_waiting_time:.2f}\n")
+            with self.profiler.stage('static.log'):
+                self._sink.append(self.step, total_halting_vehicles_current_step, current_total_waiting_time_step,
+                                  self.current_ns_waiting_time, self.current_ew_waiting_time)
+                self._publish_live(total_halting_vehicles_current_step, current_total_waiting_time_step)
             self.step += 1
 
     def run(self):
         self.env.reset()
-        # Header untuk file log statis
-        with open('static_queue_length.txt', 'w') as f:
-            f.write("step,queue_length,waiting_time,ns_avg_waiting_time,ew_avg_waiting_time\n")
+        self.trip_summary = None
+        on_flush = None
+        if self.results_store is not None:
+            self._run_id = self.results_store.begin_run(
+                results_store.run_metadata(self.env, 'static', self.max_simulation_steps,
+                                           fast_forward=int(self.fast_forward)),
+                params={'green_ns': self.green_ns, 'green_ew': self.green_ew, 'yellow_time': self.yellow_time})
+            on_flush = self.results_store.series_writer(self._run_id, STORE_COLUMNS)
+        # Log statis ditulis per batch, bukan buka/tutup file setiap langkah
+        self._sink = MetricsSink(self.log_path, LOG_COLUMNS, formats=self.log_formats, on_flush=on_flush)
+        # Fase 0 (hijau EW), 1 (kuning), 2 (hijau NS), 3 (kuning): lihat controller_harness.GREEN_PHASE
+        cycle = signal_cycle(self.green_ns, self.green_ew, self.yellow_time)
+        if self.fast_forward: # Durasi statis tidak pernah berubah: program siklus cukup sekali
+            self.env.program_cycle([duration for _, duration in cycle])
 
         try:
+            start_time = time.perf_counter()
             # === PENTING: Mengubah kondisi while loop untuk berhenti pada jumlah langkah yang sama ===
             while self.step < self.max_simulation_steps:
-                self.total_vehicles_departed = len(self.vehicle_travel_times)
-                print(f"Total vehicles departed: {self.total_vehicles_departed}")
+                self.total_vehicles_arrived = self.vehicle_stats.arrived
+                print(f"Total vehicles arrived: {self.total_vehicles_arrived}")
                 print(f"Step {self.step}: Static timing - NS: {self.green_ns}s, EW: {self.green_ew}s")
                 
                 # Jalankan fase lalu lintas statis
-                self._run_phase(self.green_ns, 0) # Phase 0: NS Green
-                if self.step >= self.max_simulation_steps: break # Pengecekan setelah fase
-                
-                self._run_phase(self.yellow_time, 1) # Phase 1: Yellow NS
-                if self.step >= self.max_simulation_steps: break
-                
-                self._run_phase(self.green_ew, 2) # Phase 2: EW Green
-                if self.step >= self.max_simulation_steps: break
-                
-                self._run_phase(self.yellow_time, 3) # Phase 3: Yellow EW
-                if self.step >= self.max_simulation_steps: break
+                for phase_id, phase_duration in cycle:
+                    self._run_phase(phase_duration, phase_id)
+                    if self.step >= self.max_simulation_steps: break # Pengecekan setelah fase
+
+            self.wall_time = time.perf_counter() - start_time
 
             # Hitung dan cetak metrik performa akhir
-            if self.total_vehicles_departed > 0:
-                avg_waiting_time = self.total_waiting_time / self.total_vehicles_departed
-                total_travel_time = sum(self.vehicle_travel_times.values())
-                avg_travel_time = total_travel_time / self.total_vehicles_departed if self.total_vehicles_departed > 0 else 0
-                throughput = self.total_vehicles_departed / self.step if self.step > 0 else 0
+            if self.env.metrics_mode == 'tripinfo':
+                print(f"\nSimulation ended at step {self.step}, trip statistics follow once SUMO has written them")
+                print(f"Wall-clock: {self.wall_time:.2f}s ({self.step / self.wall_time:.1f} steps/s)")
+            elif self.total_vehicles_arrived > 0:
+                avg_waiting_time = self.total_waiting_time / self.total_vehicles_arrived
+                total_travel_time = self.vehicle_stats.total_travel_time
+                avg_travel_time = total_travel_time / self.total_vehicles_arrived if self.total_vehicles_arrived > 0 else 0
+                throughput = self.total_vehicles_arrived / self.step if self.step > 0 else 0
                 # Efisiensi siklus tidak relevan di sini karena tidak ada "siklus" adaptif
                 
                 print(f"\n--- Simulation Summary (Static Traffic Light) ---")
-                print(f"Simulation ended at step {self.step}. Total vehicles departed: {self.total_vehicles_departed}")
+                print(f"Simulation ended at step {self.step}. Total vehicles arrived: {self.total_vehicles_arrived}")
                 print(f"Total waiting time: {self.total_waiting_time:.2f}s, Average waiting time per vehicle: {avg_waiting_time:.2f}s")
                 print(f"Total travel time: {total_travel_time:.2f}s, Average travel time per vehicle: {avg_travel_time:.2f}s")
                 print(f"Throughput: {throughput:.4f} vehicles/step")
+                print(f"Wall-clock: {self.wall_time:.2f}s ({self.step / self.wall_time:.1f} steps/s)")
             else:
-                print("No vehicles departed during the simulation.")
+                print("No vehicles arrived during the simulation.")
+            if self.profiler.enabled:
+                self.profiler.print_report()
         except Exception as e:
+            self._run_id = None # Run yang gagal tidak ditandai selesai di results_store
             print(f"Simulation terminated with error: {e}")
             import traceback
             traceback.print_exc()
         finally:
+            self._sink.close()
             self.env.close()
+            self.profiler.close()
             print("TraCI connection closed successfully")
             sys.stdout.flush()
+        # SUMO menulis tripinfo saat ditutup
+        if self.env.metrics_mode == 'tripinfo' and os.path.exists(self.env.tripinfo_path):
+            self.trip_summary = self.env.read_trips()
+            tripinfo.print_summary(self.trip_summary, "Static Traffic Light")
+        summary = self.summary()
+        if self._run_id is not None:
+            self.results_store.finish_run(self._run_id, summary)
+            self._run_id = None
+        return summary
+
+    def summary(self):
+        """KPI of the last run as a dict (same fields as the printed summary)."""
+        return summary_dict('static', self.step, self.wall_time, self.total_vehicles_arrived,
+                            self.total_waiting_time, self.vehicle_stats, self.trip_summary)
 
 if __name__ == "__main__":
-    static_sim = TrafficLightStatic()
-    static_sim.run()
\ No newline at end of file
+    # Sama dengan `python cli.py run static` (opsi: --steps, --gui, ...)
+    from cli import main
+    sys.exit(main(['run', 'static'] + sys.argv[1:]))
\ No newline at end of file
@@ -1,14 +1,62 @@
+import functools
 import os
+import shutil
 import sys
 import numpy as np
 import traci
+from lane_metrics import DetectorMetrics, LaneMetrics, PollingLaneMetrics, add_lane_occupancy
+from instrumentation import NULL_PROFILER
+import checkpoint
+import tripinfo
+
+
+@functools.lru_cache(maxsize=None)
+def sumo_home():
+    """
+    SUMO installation directory, resolved on first use (not at import): $SUMO_HOME,
+    else the eclipse-sumo pip package, else the install the `sumo` on PATH belongs to.
+    Also puts SUMO's tools on sys.path and sets SUMO_HOME for child processes.
+    """
+    home = os.environ.get('SUMO_HOME')
+    if not home:
+        try:
+            import sumo
+            home = sumo.SUMO_HOME
+        except ImportError:
+            binary = shutil.which('sumo')
+            if binary is not None:
+                home = os.path.dirname(os.path.dirname(os.path.realpath(binary)))
+    if not home:
+        raise RuntimeError("SUMO not found: please declare environment variable 'SUMO_HOME'")
+    os.environ.setdefault('SUMO_HOME', home)
+    tools = os.path.join(home, 'tools')
+    if tools not in sys.path:
+        sys.path.append(tools)
+    return home
+
+
+def sumo_binary(gui=False):
+    """Path of the sumo (or sumo-gui) executable."""
+    return os.path.join(sumo_home(), 'bin', 'sumo-gui' if gui else 'sumo')
+
+
+def _libsumo_available():
+    try:
+        import libsumo
+    except ImportError:
+        return False
+    return True
+
+
+def start_sumo(sumo_cmd, backend='libsumo', label='default', port=None):
+    """Starts SUMO and returns the handle to drive it: the libsumo module or a TraCI connection."""
+    if backend == 'libsumo':
+        import libsumo
+        libsumo.start(sumo_cmd)
+        return libsumo
+    traci.start(sumo_cmd, port=port, label=label)
+    return traci.getConnection(label)
 
-# Setup SUMO tools path
-if 'SUMO_HOME' in os.environ:
-    tools = os.path.join(os.environ['SUMO_HOME'], 'tools')
-    sys.path.append(tools)
-else:
-    sys.exit("please declare environment variable 'SUMO_HOME'")
 
 class SumoEnv:
     place_len = 7.5
@@ -21,35 +69,119 @@ class SumoEnv:
         '-gneE3_0','-gneE3_1','-gneE3_2'
     ]
 
-    def __init__(self, label='default', gui_f=False):
+    backends = ('libsumo', 'traci')
+    metrics_modes = ('traci', 'tripinfo')
+    observations = ('lanes', 'detectors')
+
+    config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intersection.sumocfg')
+
+    def __init__(self, label='default', gui_f=False, use_subscriptions=True, backend='libsumo',
+                 sumo_args=None, port=None, profiler=None, metrics_mode='traci', output_dir='.',
+                 warm_start=False, warmup_steps=300, checkpoint_dir=checkpoint.CHECKPOINT_DIR, config_file=None,
+                 observation='lanes'):
+        if backend not in self.backends:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {self.backends}")
+        if metrics_mode not in self.metrics_modes:
+            raise ValueError(f"Unknown metrics mode '{metrics_mode}', expected one of {self.metrics_modes}")
+        if observation not in self.observations:
+            raise ValueError(f"Unknown observation '{observation}', expected one of {self.observations}")
         self.label = label
         self.ncars = 0
-        exe = 'sumo-gui' if gui_f else 'sumo'
-        sumoBinary = os.path.join(os.environ['SUMO_HOME'], 'bin', exe)
-        self.sumoCmd = [sumoBinary, '-c', 'intersection.sumocfg']
+        if config_file is not None: # Mis. skenario dari demand_generator.scenario() (jaringan yang sama)
+            self.config_file = config_file
+        # libsumo menjalankan SUMO di dalam proses ini (tanpa socket); tidak mendukung GUI
+        self.backend = 'libsumo' if backend == 'libsumo' and not gui_f and _libsumo_available() else 'traci'
+        self.traci = None # Handle backend aktif (modul libsumo atau koneksi TraCI), diisi oleh reset()
+        self._base_logic = None # Program '0' asli dari jaringan, disimpan oleh program_cycle()
+        self.port = port # Port TraCI; None = pilih port bebas secara otomatis
+        # instrumentation.Profiler untuk menghitung/menimbang setiap panggilan TraCI; None = nonaktif
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        # 'traci': statistik perjalanan dari polling kendaraan setiap langkah;
+        # 'tripinfo': SUMO menulis tripinfo + output detektor e1 ke output_dir, dibaca setelah close()
+        self.metrics_mode = metrics_mode
+        self.tripinfo_path = None
+        self.detector_path = None
+        output_options = []
+        if metrics_mode == 'tripinfo':
+            output_options, self.tripinfo_path, self.detector_path = tripinfo.output_args(output_dir, label)
+        # 'detectors': controller membaca loop induksi e1 (detector.add.xml, satu per lajur masuk) alih-alih
+        # lajur/kendaraan; self.detectors berurutan seperti lane_ids, jadi indeks lajur juga berlaku
+        self.observation = observation
+        self.detectors = None
+        if observation == 'detectors':
+            if self.detector_path is None:
+                output_options, self.detector_path = tripinfo.detector_args(output_dir, label)
+            ids = tripinfo.detector_ids()
+            self.detectors = DetectorMetrics([ids[lane] for lane in self.lane_ids])
+        # Metrik lajur/kendaraan per langkah; polling hanya untuk perbandingan kecepatan
+        metrics_cls = LaneMetrics if use_subscriptions else PollingLaneMetrics
+        self.metrics = metrics_cls(self.lane_ids, track_vehicles=metrics_mode == 'traci')
+        # Warm start: reset() memuat state jaringan setelah warmup_steps detik (program lampu bawaan),
+        # disimpan sekali per skenario + opsi SUMO di checkpoint_dir
+        self.warm_start = warm_start
+        self.warmup_steps = warmup_steps
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_path = None
+        self.sumo_args = list(sumo_args or [])
+        self.sumoCmd = [sumo_binary(gui_f), '-c', self.config_file] + output_options + self.sumo_args
     
-    def reset(self):
+    def reset(self, warm_start=None):
+        """
+        Starts a fresh simulation and returns the first state. With warm_start (default:
+        the constructor's) the run starts from the cached warm-up checkpoint instead of
+        an empty network; vehicles already inside have no departure in this run.
+        """
         self.ncars = 0
 
         # Cegah error jika traci sudah terhubung sebelumnya
-        if traci.isLoaded():
-            try:
-                traci.close()
-            except:
-                pass
+        self.close()
+
+        sumo_cmd = self.sumoCmd
+        if self.warm_start if warm_start is None else warm_start:
+            self.checkpoint_path = self._checkpoint()
+            sumo_cmd = sumo_cmd + ['--load-state', self.checkpoint_path]
+        self.traci = self.profiler.wrap_traci(start_sumo(sumo_cmd, self.backend, self.label, self.port))
+        self._base_logic = None
 
-        traci.start(self.sumoCmd, label=self.label)
-        traci.trafficlight.setProgram('gneJ00', '0')  # pastikan program id = '0'
-        traci.simulationStep()
+        self.traci.trafficlight.setProgram('gneJ00', '0')  # pastikan program id = '0'
+        self.traci.simulationStep()
+        self.metrics.start(self.traci)
+        if self.detectors is not None:
+            self.detectors.start(self.traci)
         return self.get_state()
 
+    def _checkpoint(self):
+        """checkpoint.ensure_checkpoint() for this scenario: warm-up runs headless and writes no outputs."""
+        key = checkpoint.scenario_key(self.config_file, self.sumo_args, self.warmup_steps)
+        warmup_cmd = [sumo_binary(), '-c', self.config_file] + self.sumo_args
+        backend = 'libsumo' if _libsumo_available() else 'traci'
+        return checkpoint.ensure_checkpoint(
+            warmup_cmd, key, self.warmup_steps,
+            lambda cmd: start_sumo(cmd, backend, f"{self.label}_warmup", self.port),
+            self.checkpoint_dir)
+
     def get_state(self):
+        """
+        Batched state vector: vehicle positions come from the lane/vehicle
+        subscriptions, projection and binning are NumPy array ops. Bit-identical
+        to get_state_loop().
+        """
+        state = np.zeros(self.lane_len * 12 + 4, dtype=np.float32)
+        ilane, xy = self.metrics.lane_positions()
+        add_lane_occupancy(state, ilane, xy, self.lane_len, self.place_offset, self.place_len)
+
+        phase = self.traci.trafficlight.getPhase('gneJ00')
+        state[self.lane_len * 12 : self.lane_len * 12 + 4] = np.eye(4)[phase]
+        return state
+
+    def get_state_loop(self):
+        """Reference implementation: one getPosition round trip per vehicle."""
         state = np.zeros(self.lane_len * 12 + 4, dtype=np.float32)
         for ilane in range(12):
             lane_id = self.lane_ids[ilane]
-            cars = traci.lane.getLastStepVehicleIDs(lane_id)
+            cars = self.traci.lane.getLastStepVehicleIDs(lane_id)
             for icar in cars:
-                xcar, ycar = traci.vehicle.getPosition(icar)
+                xcar, ycar = self.traci.vehicle.getPosition(icar)
                 if ilane < 3:
                     pos = (ycar - self.place_offset) / self.place_len
                 elif ilane < 6:
@@ -65,21 +197,75 @@ class SumoEnv:
                 state[ilane * self.lane_len + ipos] += 1. - pos + ipos
                 state[ilane * self.lane_len + ipos + 1] += pos - ipos
 
-        phase = traci.trafficlight.getPhase('gneJ00')
+        phase = self.traci.trafficlight.getPhase('gneJ00')
         state[self.lane_len * 12 : self.lane_len * 12 + 4] = np.eye(4)[phase]
         return state
 
+    def read_trips(self, approaches=None):
+        """tripinfo.read_tripinfo() of the last run; only in tripinfo mode, after close()."""
+        if self.metrics_mode != 'tripinfo':
+            raise RuntimeError("Trip output is only written in metrics_mode='tripinfo'")
+        return tripinfo.read_tripinfo(self.tripinfo_path, approaches)
+
+    def read_detectors(self):
+        """tripinfo.read_detectors() of the e1 output of the last run (tripinfo or detector mode, after close())."""
+        if self.detector_path is None:
+            raise RuntimeError("Detector output is only written in metrics_mode='tripinfo' or observation='detectors'")
+        return tripinfo.read_detectors(self.detector_path)
+
     def get_waiting_time(self):
-        return sum(traci.lane.getWaitingTime(lane_id) for lane_id in self.lane_ids)
+        return float(self.metrics.lane_waiting_time.sum())
 
     def set_traffic_light_phase(self, phase, duration):
-        traci.trafficlight.setPhase('gneJ00', phase)
-        traci.trafficlight.setPhaseDuration('gneJ00', duration)
+        self.traci.trafficlight.setPhase('gneJ00', phase)
+        self.traci.trafficlight.setPhaseDuration('gneJ00', duration)
+
+    def program_cycle(self, durations, append_base=False):
+        """
+        Replaces program '0' with one cycle of `durations`, one per phase in program
+        order (EW green / yellow / NS green / yellow, see controller_harness.signal_cycle),
+        and starts it at phase 0, so SUMO switches the phases by itself.
+        Without append_base the cycle repeats; with it the original phases follow
+        once, as they do after a cycle set phase by phase with set_traffic_light_phase().
+        """
+        if self._base_logic is None:
+            self._base_logic = next(logic for logic in self.traci.trafficlight.getAllProgramLogics('gneJ00')
+                                    if logic.programID == '0')
+        base = self._base_logic
+        # Kelas Phase/Logic diambil dari hasil backend (libsumo dan traci memakai kelas berbeda)
+        phase_cls, logic_cls = type(base.phases[0]), type(base)
+        phases = [phase_cls(duration, phase.state) for duration, phase in zip(durations, base.phases)]
+        if append_base:
+            phases += [phase_cls(phase.duration, phase.state) for phase in base.phases]
+        self.traci.trafficlight.setProgramLogic('gneJ00', logic_cls('0', base.type, 0, phases))
+        self.traci.trafficlight.setPhase('gneJ00', 0) # setProgramLogic saja tidak memulai ulang fase aktif
+
+    def fast_forward(self, steps):
+        """
+        Advances `steps` simulated seconds with a single simulationStep(targetTime)
+        call and reads the metrics once, for the last step. Vehicles departing or
+        arriving in between are not seen by the metrics (use metrics_mode='tripinfo').
+        """
+        self.traci.simulationStep(self.metrics.time + steps)
+        with self.profiler.stage('env.metrics_update'):
+            self.metrics.update()
+        if self.detectors is not None: # Hanya langkah terakhir yang terbaca: perkiraan kasar
+            with self.profiler.stage('env.detector_update'):
+                self.detectors.update(steps)
 
     def simulation_step(self):
-        traci.simulationStep()
-        self.ncars += traci.simulation.getDepartedNumber()
+        self.traci.simulationStep()
+        with self.profiler.stage('env.metrics_update'):
+            self.metrics.update()
+        if self.detectors is not None:
+            with self.profiler.stage('env.detector_update'):
+                self.detectors.update()
+        self.ncars += len(self.metrics.departed_ids)
 
     def close(self):
-        if traci.isLoaded():
-            traci.close()
+        if self.traci is not None:
+            try:
+                self.traci.close()
+            except Exception:
+                pass
+            self.traci = None
@@ -0,0 +1,509 @@
+"""
+Pure-NumPy surrogate of the SUMO intersection.
+
+SurrogateEnv exposes the SumoEnv surface the controllers use (reset,
+simulation_step, set_traffic_light_phase, get_state, get_waiting_time, close and
+a LaneMetrics-compatible `metrics` object), so TrafficLightCSP / TrafficLightStatic
+can run on it through their `env=` argument without a SUMO process.
+
+The model is a point-queue per incoming lane: vehicles are inserted from the
+<flow> rates of the route file, drive the approach at the lane speed, join the
+lane queue at the stop line and are discharged at the saturation flow while the
+lane has a green signal (green masks come from the net's tlLogic). A lane holds
+at most length / vehicle_spacing vehicles; further insertions wait, as in SUMO.
+QueueModel is the same model as a fluid without the storage limit, vectorized
+over a batch of signal plans and over time, for fast policy screening.
+
+Speed (this machine): QueueModel runs about 12k simulated seconds per
+millisecond for one plan and about 10k for 1000 plans x 3600 s. SurrogateEnv
+keeps its vehicles in NumPy arrays advanced over all lanes at once; it still
+builds the per-vehicle waiting-time dict the controllers read, which sets its
+speed at about 8k steps/s for 500 steps and 4k steps/s for 1500 steps.
+
+Calibration against SUMO (seed 23, scale 1), from `python surrogate_env.py`.
+Bias is surrogate mean minus SUMO mean, relative to the SUMO mean:
+
+    controller  steps  queue bias      waiting-time bias   corr
+    static        500  +6.0 / 22.1     +161 / 462 (+35%)   0.85-0.90
+    static       1500  +7.6 / 54.2     +53 / 1392 (+4%)    0.83-0.86
+    csp           500  +5.5 / 21.8     +201 / 444 (+45%)   0.83-0.91
+    csp          1500  +22.8 / 53.6    +2415 / 1514        0.65-0.87
+
+The surrogate overestimates queues by 14-43% and the per-direction average
+waits by 23-61% (+101-143% for csp at 1500 steps). Waiting time is counted
+from the moment a vehicle joins the queue, while SUMO resets it whenever a
+queued vehicle creeps forward, so long queues inflate it most.
+
+    python surrogate_env.py --controller static --sumo-log static_queue_length.txt
+"""
+import argparse
+import os
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from lane_metrics import LaneMetrics, add_lane_occupancy
+from instrumentation import NULL_PROFILER
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NET_FILE = os.path.join(BASE_DIR, 'intersection.net.xml')
+ROUTE_FILE = os.path.join(BASE_DIR, 'intersection.rou.xml')
+
+
+def load_network(net_file=NET_FILE, tl_id='gneJ00', lane_ids=None, program_id='0'):
+    """Reads lane geometry and the green mask of every signal phase from a .net.xml."""
+    root = ET.parse(net_file).getroot()
+    lanes = {}
+    for lane in root.iter('lane'):
+        shape = np.array([[float(v) for v in point.split(',')] for point in lane.get('shape').split()])
+        lanes[lane.get('id')] = {
+            'length': float(lane.get('length')),
+            'speed': float(lane.get('speed')),
+            'shape': shape,
+        }
+
+    link_lanes = {}
+    out_lanes = {}
+    for conn in root.iter('connection'):
+        if conn.get('tl') == tl_id:
+            from_lane = f"{conn.get('from')}_{conn.get('fromLane')}"
+            link_lanes[int(conn.get('linkIndex'))] = from_lane
+            out_lanes[from_lane] = f"{conn.get('to')}_{conn.get('toLane')}"
+
+    if lane_ids is None:
+        lane_ids = sorted(set(link_lanes.values()))
+    phases = []
+    for logic in root.iter('tlLogic'):
+        if logic.get('id') == tl_id and logic.get('programID') == program_id:
+            for phase in logic.iter('phase'):
+                state = phase.get('state')
+                green = np.zeros(len(lane_ids), dtype=bool)
+                for link, signal in enumerate(state):
+                    if signal in 'Gg' and link in link_lanes:
+                        green[lane_ids.index(link_lanes[link])] = True
+                phases.append((float(phase.get('duration')), green))
+
+    return {
+        'lane_ids': list(lane_ids),
+        'lanes': lanes,
+        'out_lanes': out_lanes,
+        'phase_durations': np.array([duration for duration, _ in phases]),
+        'green_masks': np.array([green for _, green in phases]),
+    }
+
+
+def load_flow_rates(route_file=ROUTE_FILE, approaches=None):
+    """
+    Demand of every <flow> in a route file as (approach edge, begin, end, veh/s).
+    vehsPerHour, period and probability flows are supported.
+    """
+    flows = []
+    for flow in ET.parse(route_file).getroot().iter('flow'):
+        edge = flow.get('from')
+        if approaches is not None and edge not in approaches:
+            continue
+        if flow.get('vehsPerHour') is not None:
+            rate = float(flow.get('vehsPerHour')) / 3600.
+        elif flow.get('period') is not None:
+            rate = 1. / float(flow.get('period'))
+        elif flow.get('probability') is not None:
+            rate = float(flow.get('probability'))
+        else:
+            continue
+        flows.append((edge, float(flow.get('begin', 0.)), float(flow.get('end', 3600.)), rate))
+    return flows
+
+
+def approach_rates(flows, approaches, horizon, scale=1.0):
+    """(horizon, n_approaches) array of insertion rates in veh/s for every simulated second."""
+    rates = np.zeros((horizon, len(approaches)))
+    t = np.arange(horizon)
+    for edge, begin, end, rate in flows:
+        rates[(t >= begin) & (t < end), approaches.index(edge)] += rate * scale
+    return rates
+
+
+class QueueModel:
+    """
+    Fluid point-queue model of the incoming lanes, vectorized over a batch of
+    signal plans. Arrivals reach the stop line after the approach travel time and
+    leave the queue at the saturation flow while the lane is green.
+    """
+
+    saturation_flow = 0.5 # kendaraan/detik per lajur (headway 2 s)
+
+    def __init__(self, net=None, flows=None, scale=1.0):
+        self.net = net if net is not None else load_network()
+        self.flows = flows if flows is not None else load_flow_rates()
+        self.scale = scale
+        lane_ids = self.net['lane_ids']
+        self.approaches = sorted({lane_id.rsplit('_', 1)[0] for lane_id in lane_ids})
+        self.lane_approach = np.array([self.approaches.index(lane_id.rsplit('_', 1)[0]) for lane_id in lane_ids])
+        self.lanes_per_approach = np.bincount(self.lane_approach)
+        lanes = self.net['lanes']
+        self.travel_steps = np.array([int(round(lanes[l]['length'] / lanes[l]['speed'])) for l in lane_ids])
+        self._lane_classes = {}
+
+    def lane_arrivals(self, horizon):
+        """(horizon, n_lanes) fluid arrivals at the stop line, delayed by the approach travel time."""
+        rates = approach_rates(self.flows, self.approaches, horizon, self.scale)
+        per_lane = rates[:, self.lane_approach] / self.lanes_per_approach[self.lane_approach]
+        arrivals = np.zeros_like(per_lane)
+        for i, delay in enumerate(self.travel_steps):
+            arrivals[delay:, i] = per_lane[:horizon - delay, i]
+        return arrivals
+
+    def lane_classes(self, horizon):
+        """
+        Groups lanes that see the same arrivals and the same green phases, since their queues
+        evolve identically. Returns (representative lane indices, lanes per class, cumulative
+        arrivals of the representatives), cached per horizon.
+        """
+        if horizon not in self._lane_classes:
+            arrivals = self.lane_arrivals(horizon)
+            green_masks = self.net['green_masks']
+            classes = {}
+            for i in range(arrivals.shape[1]):
+                classes.setdefault((arrivals[:, i].tobytes(), green_masks[:, i].tobytes()), []).append(i)
+            first = np.array([lanes[0] for lanes in classes.values()])
+            lane_count = np.array([len(lanes) for lanes in classes.values()], dtype=np.float64)
+            self._lane_classes[horizon] = (first, lane_count, np.cumsum(arrivals[:, first], axis=0))
+        return self._lane_classes[horizon]
+
+    def simulate_plans(self, ns_green, ew_green, yellow_time=5, horizon=3600, chunk=64):
+        """
+        Runs every (ns_green[b], ew_green[b]) cycle plan for `horizon` seconds.
+        Phase order follows the controllers (controller_harness.signal_cycle): 0 (ew_green),
+        1 (yellow), 2 (ns_green), 3 (yellow).
+        Returns per-plan total delay (vehicle-seconds in queue), mean queue and vehicles served.
+
+        The queue recursion q[t] = max(0, q[t-1] + a[t] - c[t]) is evaluated for the whole
+        horizon at once: with S = cumsum(a - c), q[t] = S[t] - min(0, min(S[:t+1])). Lanes with
+        the same arrivals and green phases evolve identically and are simulated once, and plans
+        are processed `chunk` at a time so the (plans, horizon, lanes) arrays stay small.
+        """
+        ns_green = np.atleast_1d(np.asarray(ns_green, dtype=np.int64))
+        ew_green = np.atleast_1d(np.asarray(ew_green, dtype=np.int64))
+        bounds = np.stack([ew_green, ew_green + yellow_time, ew_green + yellow_time + ns_green], axis=1)
+        cycle = bounds[:, 2] + yellow_time
+        first, lane_count, cum_arrivals = self.lane_classes(horizon)
+        capacity = self.net['green_masks'][:, first].astype(np.float64) * self.saturation_flow
+        t = np.arange(horizon)
+
+        delay = np.empty(len(ns_green))
+        final_queue = np.empty(len(ns_green))
+        for lo in range(0, len(ns_green), chunk):
+            hi = min(lo + chunk, len(ns_green))
+            tc = t % cycle[lo:hi, None]
+            phase = (tc >= bounds[lo:hi, 0, None]).astype(np.int64)
+            phase += tc >= bounds[lo:hi, 1, None]
+            phase += tc >= bounds[lo:hi, 2, None]
+            backlog = np.cumsum(capacity[phase], axis=1)
+            np.subtract(cum_arrivals, backlog, out=backlog)
+            floor = np.minimum.accumulate(backlog, axis=1)
+            np.minimum(floor, 0., out=floor)
+            backlog -= floor
+            delay[lo:hi] = backlog.sum(axis=1) @ lane_count
+            final_queue[lo:hi] = backlog[:, -1] @ lane_count
+        return {
+            'total_delay': delay,
+            'mean_queue': delay / horizon,
+            'served': cum_arrivals[-1] @ lane_count - final_queue,
+            'final_queue': final_queue,
+        }
+
+
+class SurrogateEnv:
+    """
+    Drop-in replacement for SumoEnv backed by the point-queue model (no SUMO process).
+    Vehicles live in flat arrays (lane, stop-line time, exit time) and every step is a
+    handful of NumPy operations over all lanes; see the module docstring for its speed
+    and calibration.
+    """
+
+    place_len = 7.5
+    place_offset = 8.50
+    lane_len = 10
+    lane_ids = [
+        '-gneE0_0','-gneE0_1','-gneE0_2',
+        '-gneE1_0','-gneE1_1','-gneE1_2',
+        '-gneE2_0','-gneE2_1','-gneE2_2',
+        '-gneE3_0','-gneE3_1','-gneE3_2'
+    ]
+    saturation_flow = QueueModel.saturation_flow
+    vehicle_spacing = 7.5 # panjang kendaraan + minGap (m)
+    junction_length = 32.0 # panjang lintasan lurus di dalam simpang (m)
+
+    def __init__(self, label='surrogate', seed=23, scale=1.0, net_file=NET_FILE, route_file=ROUTE_FILE):
+        self.label = label
+        self.seed = seed
+        self.scale = scale
+        self.ncars = 0
+        self.traci = None
+        self.profiler = NULL_PROFILER # Dibaca oleh controller (timer per tahap)
+        self.metrics_mode = 'traci' # Statistik perjalanan dihitung per langkah oleh controller
+        self.observation = 'lanes' # Tanpa loop induksi: controller mengamati isi lajur
+        self.detectors = None
+        self.net = load_network(net_file, lane_ids=self.lane_ids)
+        self.approaches = sorted({lane_id.rsplit('_', 1)[0] for lane_id in self.lane_ids})
+        self.flows = load_flow_rates(route_file, self.approaches)
+        self.demand = approach_rates(self.flows, self.approaches, int(max(end for _, _, end, _ in self.flows)), scale)
+        self.metrics = LaneMetrics(self.lane_ids)
+
+        lanes = self.net['lanes']
+        self.approach_lanes = [np.array([i for i, lane_id in enumerate(self.lane_ids) if lane_id.startswith(edge + '_')])
+                               for edge in self.approaches]
+        self.lane_speed = np.array([lanes[l]['speed'] for l in self.lane_ids])
+        lane_length = np.array([lanes[l]['length'] for l in self.lane_ids])
+        self.approach_time = lane_length / self.lane_speed
+        self.lane_storage = np.floor(lane_length / self.vehicle_spacing).astype(np.int64)
+        exit_length = np.array([lanes[self.net['out_lanes'][l]]['length'] for l in self.lane_ids])
+        self.exit_time = (exit_length + self.junction_length) / self.lane_speed
+        # Titik garis henti dan arah mundur sepanjang lajur, untuk posisi kendaraan di get_state
+        shapes = [lanes[l]['shape'] for l in self.lane_ids]
+        self.stop_line = np.array([shape[-1] for shape in shapes])
+        upstream = np.array([shape[0] - shape[-1] for shape in shapes])
+        self.upstream_dir = upstream / np.linalg.norm(upstream, axis=1, keepdims=True)
+
+    def reset(self):
+        self.ncars = 0
+        self.rng = np.random.default_rng(self.seed)
+        self.time = 0.0
+        self.phase = 0
+        self.phase_remaining = self.net['phase_durations'][0]
+        self._insert_credit = np.zeros(len(self.approaches))
+        self._discharge_credit = np.zeros(len(self.lane_ids))
+        self._queued = np.zeros(len(self.lane_ids), dtype=np.int64)
+        self._lane_count = np.zeros(len(self.lane_ids), dtype=np.int64)
+        # Kendaraan disimpan per nomor urut (indeks - _base) sampai tiba; _first = kendaraan
+        # tertua yang belum tiba. Waktu keluar = inf selama kendaraan masih di lajur masuk.
+        self._next_vehicle = 0
+        self._first = 0
+        self._base = 0
+        self._vehicle_lane = np.zeros(256, dtype=np.int64)
+        self._join_time = np.zeros(256)
+        self._exit_time = np.full(256, np.inf)
+        self._vehicle_ids = np.empty(256, dtype=object)
+        self.metrics._reset_values()
+        self.simulation_step()
+        return self.get_state()
+
+    def _insert(self, lanes, t):
+        """Appends new vehicles on `lanes`, compacting or growing the vehicle arrays as needed."""
+        n = len(lanes)
+        start, end = self._first - self._base, self._next_vehicle - self._base
+        if end + n > len(self._vehicle_lane):
+            size = len(self._vehicle_lane)
+            while end - start + n > size // 2:
+                size *= 2
+            for name in ('_vehicle_lane', '_join_time', '_exit_time', '_vehicle_ids'):
+                old = getattr(self, name)
+                new = np.full(size, np.inf) if name == '_exit_time' else np.empty(size, dtype=old.dtype)
+                new[:end - start] = old[start:end]
+                setattr(self, name, new)
+            self._base = self._first
+            start, end = 0, end - start
+        self._vehicle_lane[end:end + n] = lanes
+        self._join_time[end:end + n] = t + self.approach_time[lanes]
+        self._exit_time[end:end + n] = np.inf
+        self._vehicle_ids[end:end + n] = [f"sur.{v}" for v in range(self._next_vehicle, self._next_vehicle + n)]
+        self._next_vehicle += n
+        return self._vehicle_ids[end:end + n]
+
+    def simulation_step(self):
+        t = self.time
+        n_lanes = len(self.lane_ids)
+
+        # Insertion: deterministic headway per approach, random lane (departLane="random").
+        # A full lane (lane_storage vehicles) blocks the insertion, which stays pending like
+        # SUMO's insertion backlog.
+        if t < len(self.demand):
+            self._insert_credit += self.demand[int(t)]
+        inserted = np.floor(self._insert_credit)
+        self._insert_credit -= inserted
+        departed = ()
+        if inserted.any():
+            approach = np.repeat(np.arange(len(self.approaches)), inserted.astype(np.int64))
+            lanes = np.concatenate([self.approach_lanes[a][self.rng.integers(len(self.approach_lanes[a]), size=int(inserted[a]))]
+                                    for a in np.flatnonzero(inserted)])
+            order = np.argsort(lanes, kind='stable')
+            new_per_lane = np.bincount(lanes, minlength=n_lanes)
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order)) - np.repeat(np.cumsum(new_per_lane) - new_per_lane, new_per_lane)
+            fits = self._lane_count[lanes] + rank < self.lane_storage[lanes]
+            np.add.at(self._insert_credit, approach[~fits], 1.)
+            lanes = lanes[fits]
+            self._lane_count += np.bincount(lanes, minlength=n_lanes)
+            departed = self._insert(lanes, t)
+
+        window = slice(self._first - self._base, self._next_vehicle - self._base)
+        lane = self._vehicle_lane[window]
+        exit_time = self._exit_time[window]
+
+        # Vehicles reaching the stop line join the queue (join times are FIFO per lane);
+        # green lanes discharge the head of their queue at saturation flow
+        queued_at = np.flatnonzero(np.isinf(exit_time) & (self._join_time[window] <= t))
+        self._queued = np.bincount(lane[queued_at], minlength=n_lanes)
+        green = self.net['green_masks'][self.phase]
+        credit = np.where(green, self._discharge_credit + self.saturation_flow, 0.)
+        served = np.minimum(credit.astype(np.int64), self._queued)
+        credit -= served
+        self._discharge_credit = np.where(green & (self._queued == served), np.minimum(credit, 1.), credit)
+        if served.any():
+            order = queued_at[np.argsort(lane[queued_at], kind='stable')]
+            rank = np.arange(len(order)) - np.repeat(np.cumsum(self._queued) - self._queued, self._queued)
+            leaving = order[rank < np.repeat(served, self._queued)]
+            exit_time[leaving] = t + self.exit_time[lane[leaving]]
+            self._queued -= served
+            self._lane_count -= served
+
+        arrived = self._vehicle_ids[window][(exit_time <= t) & (exit_time > t - 1.)]
+        done = exit_time <= t
+        self._first += len(done) if done.all() else int(np.argmin(done))
+
+        # Signal clock (auto-advance like a SUMO static program)
+        self.phase_remaining -= 1.
+        if self.phase_remaining <= 0:
+            self.phase = (self.phase + 1) % len(self.net['phase_durations'])
+            self.phase_remaining = self.net['phase_durations'][self.phase]
+
+        self.time = t + 1.
+        self.ncars += len(departed)
+        self._fill_metrics(departed, arrived)
+
+    def _lane_order(self):
+        """Window offsets of the vehicles still on an incoming lane, sorted by lane (front first), their lanes and ranks."""
+        window = slice(self._first - self._base, self._next_vehicle - self._base)
+        on_lane = np.flatnonzero(np.isinf(self._exit_time[window]))
+        on_lane = on_lane[np.argsort(self._vehicle_lane[window][on_lane], kind='stable')]
+        lane = self._vehicle_lane[window][on_lane]
+        counts = np.bincount(lane, minlength=len(self.lane_ids))
+        rank = np.arange(len(lane)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return on_lane, lane, rank, counts
+
+    def _fill_metrics(self, departed, arrived):
+        """
+        Fills the LaneMetrics fields the controllers read. vehicle_speed and vehicle_position
+        stay empty: get_state computes positions from the vehicle arrays directly.
+        """
+        m = self.metrics
+        t = self.time - 1.
+        m.time = self.time
+        m.departed_ids = tuple(departed)
+        m.arrived_ids = tuple(arrived)
+
+        window = slice(self._first - self._base, self._next_vehicle - self._base)
+        on_lane, lane, rank, counts = self._lane_order()
+        ids = self._vehicle_ids[window][on_lane].tolist()
+        wait = np.where(rank < self._queued[lane], np.maximum(0., np.floor(t - self._join_time[window][on_lane])), 0.)
+
+        bounds = np.cumsum(counts).tolist()
+        m.lane_vehicle_ids = [tuple(ids[a:b]) for a, b in zip([0] + bounds, bounds)]
+        m.lane_vehicle_number[:] = counts
+        m.lane_halting_number[:] = self._queued
+        m.lane_waiting_time[:] = np.bincount(lane, weights=wait, minlength=len(self.lane_ids))
+        m.vehicle_waiting_time = dict(zip(ids, wait.tolist()))
+        exit_time = self._exit_time[window]
+        exiting = self._vehicle_ids[window][(exit_time > t) & ~np.isinf(exit_time)]
+        m.vehicle_waiting_time.update(dict.fromkeys(exiting.tolist(), 0.))
+
+    def set_traffic_light_phase(self, phase, duration):
+        self.phase = phase
+        self.phase_remaining = duration
+
+    def get_state(self):
+        state = np.zeros(self.lane_len * 12 + 4, dtype=np.float32)
+        on_lane, lane, rank, _ = self._lane_order()
+        t = self.time - 1.
+        join = self._join_time[self._first - self._base:][on_lane]
+        queued = self._queued[lane]
+        distance = np.where(rank < queued, rank * self.vehicle_spacing,
+                            np.maximum((join - t) * self.lane_speed[lane], queued * self.vehicle_spacing))
+        xy = self.stop_line[lane] + distance[:, None] * self.upstream_dir[lane]
+        add_lane_occupancy(state, lane, xy, self.lane_len, self.place_offset, self.place_len)
+        state[self.lane_len * 12 : self.lane_len * 12 + 4] = np.eye(4)[self.phase]
+        return state
+
+    def get_waiting_time(self):
+        return float(self.metrics.lane_waiting_time.sum())
+
+    def close(self):
+        pass
+
+
+def compare_logs(sumo_log, surrogate_log, columns):
+    """Per-column bias / RMSE / correlation between two per-step CSV logs (aligned on step)."""
+    sumo = np.genfromtxt(sumo_log, delimiter=',', names=True)
+    surrogate = np.genfromtxt(surrogate_log, delimiter=',', names=True)
+    n = min(len(sumo), len(surrogate))
+    rows = []
+    for column in columns:
+        a = sumo[column][:n]
+        b = surrogate[column][:n]
+        corr = np.corrcoef(a, b)[0, 1] if a.std() > 0 and b.std() > 0 else float('nan')
+        rows.append({
+            'column': column,
+            'sumo_mean': float(a.mean()),
+            'surrogate_mean': float(b.mean()),
+            'bias': float((b - a).mean()),
+            'rmse': float(np.sqrt(((b - a) ** 2).mean())),
+            'corr': float(corr),
+        })
+    return rows
+
+
+def calibration_report(sumo_log, controller='static', steps=500, seed=23, scale=1.0,
+                       surrogate_log='surrogate_queue_length.txt'):
+    """Runs `controller` on the surrogate and compares its per-step log with a SUMO log."""
+    env = SurrogateEnv(seed=seed, scale=scale)
+    if controller == 'csp':
+        from traffic_light_csp import TrafficLightCSP, LOG_COLUMNS
+        ctrl = TrafficLightCSP(env=env)
+        ctrl.log_path = surrogate_log
+        summary = ctrl.run_simulation(total_steps=steps)
+    else:
+        from statis import TrafficLightStatic, LOG_COLUMNS
+        ctrl = TrafficLightStatic(env=env)
+        ctrl.max_simulation_steps = steps
+        ctrl.log_path = surrogate_log
+        summary = ctrl.run()
+    columns = [name for name, _ in LOG_COLUMNS[1:]]
+    return summary, compare_logs(sumo_log, surrogate_log, columns)
+
+
+def screening_speed(n_plans=1000, horizon=3600):
+    """Simulated seconds per wall-clock millisecond for a batch of random plans."""
+    model = QueueModel()
+    rng = np.random.default_rng(0)
+    ns_green = rng.integers(20, 61, n_plans)
+    ew_green = rng.integers(20, 61, n_plans)
+    model.lane_classes(horizon) # Kedatangan di-cache per horizon, di luar pengukuran
+    start = time.perf_counter()
+    model.simulate_plans(ns_green, ew_green, horizon=horizon)
+    elapsed_ms = (time.perf_counter() - start) * 1e3
+    return n_plans * horizon / elapsed_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate the surrogate intersection against a SUMO log.")
+    parser.add_argument('--controller', default='static', choices=('static', 'csp'))
+    parser.add_argument('--sumo-log', default='static_queue_length.txt')
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=23)
+    parser.add_argument('--scale', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    summary, rows = calibration_report(args.sumo_log, args.controller, args.steps, args.seed, args.scale)
+    print(f"\n--- Surrogate calibration ({args.controller}) vs {args.sumo_log} ---")
+    print(f"{'column':<26}{'sumo mean':>12}{'surr. mean':>12}{'bias':>10}{'rmse':>10}{'corr':>8}")
+    for row in rows:
+        print(f"{row['column']:<26}{row['sumo_mean']:>12.2f}{row['surrogate_mean']:>12.2f}"
+              f"{row['bias']:>10.2f}{row['rmse']:>10.2f}{row['corr']:>8.2f}")
+    print(f"Surrogate run: {summary['steps']} steps in {summary['wall_time']:.3f}s "
+          f"({summary['steps_per_second']:.0f} steps/s)")
+    print(f"QueueModel screening: {screening_speed():.0f} simulated seconds per ms (1000 plans x 3600 s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from green_solver import (DEFAULT_WEIGHTS, WEIGHT_NAMES, calculate_cost_grid, feasible_mask, green_grid,
+                          rank_plans, solve_batch, solve_vectorized)
+
+# (min_green, max_green, green_step)
+RANGES = [(20, 60, 1), (10, 120, 1), (0, 300, 1), (20, 60, 2), (30, 32, 1)]
+
+
+def full_grid(ns_count, ew_count, ns_wait, ew_wait, weights, min_green, max_green, green_step):
+    """Cost of every grid plan, inf where infeasible (the direct formulation)."""
+    ns_green, ew_green = green_grid(min_green, max_green, green_step)
+    mask = feasible_mask(ns_count, ew_count, ns_green, ew_green, min_green, max_green)
+    cost = calculate_cost_grid(ns_count, ew_count, ns_wait, ew_wait, ns_green, ew_green, weights)
+    return ns_green.ravel(), ew_green.ravel(), np.where(mask, cost, np.inf).ravel()
+
+
+def cases(seed=0, n=60):
+    rng = np.random.default_rng(seed)
+    weight_sets = [DEFAULT_WEIGHTS, dict(DEFAULT_WEIGHTS, green_duration_penalty_weight=0.0)]
+    for i in range(n):
+        weights = weight_sets[i % 2] if i < n // 2 else {
+            name: float(DEFAULT_WEIGHTS[name] * np.exp(rng.uniform(-2, 2))) for name in WEIGHT_NAMES}
+        ns_count, ew_count = (int(c) for c in rng.integers(0, 40, 2))
+        waits = rng.uniform(0, 5000, 2)
+        yield ns_count, ew_count, float(waits[0]), float(waits[1]), weights
+
+
+@pytest.mark.parametrize('green_range', RANGES)
+def test_solve_vectorized_matches_full_grid(green_range):
+    for ns_count, ew_count, ns_wait, ew_wait, weights in cases():
+        ns_green, ew_green, cost = full_grid(ns_count, ew_count, ns_wait, ew_wait, weights, *green_range)
+        result = solve_vectorized(ns_count, ew_count, ns_wait, ew_wait, weights, *green_range)
+        if not np.isfinite(cost).any():
+            assert result is None
+            continue
+        idx = np.argmin(cost)
+        assert result == (int(ns_green[idx]), int(ew_green[idx]), float(cost[idx]))
+
+
+@pytest.mark.parametrize('green_range', RANGES)
+def test_rank_plans_matches_full_grid(green_range):
+    for ns_count, ew_count, ns_wait, ew_wait, weights in cases(seed=1):
+        ns_green, ew_green, cost = full_grid(ns_count, ew_count, ns_wait, ew_wait, weights, *green_range)
+        order = np.argsort(cost, kind='stable')[:8]
+        order = order[np.isfinite(cost[order])]
+        expected = [(int(ns_green[i]), int(ew_green[i]), float(cost[i])) for i in order]
+        assert rank_plans(ns_count, ew_count, ns_wait, ew_wait, weights, *green_range) == expected
+
+
+def test_solve_batch_matches_solve_vectorized():
+    rows = list(cases(seed=2, n=30))
+    for weights in (DEFAULT_WEIGHTS, rows[-1][4]):
+        ns_count, ew_count, ns_wait, ew_wait = (np.array([row[i] for row in rows]) for i in range(4))
+        ns_best, ew_best, cost_best, feasible = solve_batch(ns_count, ew_count, ns_wait, ew_wait, weights, 0, 300)
+        for j in range(len(rows)):
+            expected = solve_vectorized(ns_count[j], ew_count[j], ns_wait[j], ew_wait[j], weights, 0, 300)
+            assert feasible[j]
+            assert (ns_best[j], ew_best[j], cost_best[j]) == expected
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from live_metrics import LIVE_COLUMNS, LiveMetricsReader, LiveMetricsWriter
+
+
+def publish(writer, steps):
+    for step in steps:
+        writer.publish(step, *([float(step)] * (len(LIVE_COLUMNS) - 1)))
+
+
+def test_reader_follows_ring(tmp_path):
+    path = str(tmp_path / 'run.live')
+    with LiveMetricsWriter(path, capacity=8) as writer:
+        reader = LiveMetricsReader(path)
+        publish(writer, range(5))
+        rows, seq, dropped = reader.since(0)
+        assert list(reader.column(rows, 'step')) == [0, 1, 2, 3, 4] and (seq, dropped) == (5, 0)
+        publish(writer, range(5, 20))
+        rows, seq, dropped = reader.since(seq)
+        np.testing.assert_array_equal(reader.column(rows, 'step'), np.arange(13, 20))
+        assert (seq, dropped) == (20, 8)
+
+
+def test_close_unlinks_ring_but_mapped_reader_keeps_it(tmp_path):
+    path = str(tmp_path / 'run.live')
+    writer = LiveMetricsWriter(path, capacity=8)
+    reader = LiveMetricsReader(path)
+    publish(writer, range(3))
+    writer.close()
+    assert not os.path.exists(path)
+    assert list(reader.column(reader.latest(3), 'step')) == [0, 1, 2]
+    assert not reader.replaced()
+
+
+def test_close_keeps_ring_of_a_newer_run(tmp_path):
+    path = str(tmp_path / 'run.live')
+    old = LiveMetricsWriter(path, capacity=8)
+    new = LiveMetricsWriter(path, capacity=8)
+    old.close()
+    assert os.path.exists(path)
+    new.close()
+    assert not os.path.exists(path)
@@ -0,0 +1,46 @@
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metrics_sink import MetricsSink
+
+COLUMNS = [('step', 'd'), ('halting_vehicles', 'd'), ('waiting_time', '.2f'), ('ns_avg_wait', '.2f')]
+
+
+def write_rows(path, rows, capacity=1024):
+    with MetricsSink(path, COLUMNS, formats=('npz',), capacity=capacity) as sink:
+        for step in range(rows):
+            sink.append(step, step % 7, step * 0.5, step * 0.25)
+    return sink
+
+
+def test_npz_round_trip(tmp_path):
+    sink = write_rows(str(tmp_path / 'log.csv'), 2500)
+    with np.load(sink.npz_path) as data:
+        assert sorted(data.files) == sorted(name for name, _ in COLUMNS)
+        assert data['step'].dtype == np.int64
+        np.testing.assert_array_equal(data['step'], np.arange(2500))
+        np.testing.assert_allclose(data['waiting_time'], np.arange(2500) * 0.5)
+    assert not os.path.exists(sink.npz_path + '.part')
+
+
+def test_empty_npz(tmp_path):
+    sink = write_rows(str(tmp_path / 'log.csv'), 0)
+    with np.load(sink.npz_path) as data:
+        assert data['step'].shape == (0,)
+
+
+def test_npz_memory_stays_flat(tmp_path):
+    # 200k baris (~6 MB data) dengan buffer 1024 baris: puncak alokasi harus tetap sekitar satu batch
+    capacity = 1024
+    tracemalloc.start()
+    try:
+        write_rows(str(tmp_path / 'log.csv'), 200_000, capacity)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    batch_bytes = capacity * 8 * len(COLUMNS)
+    assert peak < 8 * batch_bytes
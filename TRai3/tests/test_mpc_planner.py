@@ -0,0 +1,40 @@
+"""
+The MPC planner rolls plans out on its own SUMO worker processes: a csp run must
+use it when selected (cli.py / batch_runner.py --planner mpc) and stop the
+workers when the run ends.
+"""
+import multiprocessing
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sumoenv
+from batch_runner import run_one
+from cli import main
+
+
+def sumo_available():
+    try:
+        sumoenv.sumo_home()
+    except RuntimeError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(not sumo_available(), reason="SUMO not installed")
+def test_csp_runs_with_mpc_planner(tmp_path):
+    spec = {'run': 0, 'controller': 'csp', 'seed': 23, 'scale': 1.0, 'steps': 120, 'planner': 'mpc'}
+    row = run_one(spec, str(tmp_path))
+    assert row['simulated_steps'] == 120
+    with open(tmp_path / 'csp_0000.log') as f:
+        decisions = re.search(r"MPC planner: (\d+) decisions", f.read())
+    assert decisions is not None and int(decisions.group(1)) > 0
+    assert multiprocessing.active_children() == [] # Worker rollout sudah dihentikan
+
+
+def test_mpc_planner_is_csp_only():
+    with pytest.raises(SystemExit):
+        main(['run', 'static', '--planner', 'mpc'])
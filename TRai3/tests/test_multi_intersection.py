@@ -0,0 +1,61 @@
+"""
+The multi-junction controller on the single-junction network: its result rows
+must carry the same KPI fields as the single-junction controllers, and its
+reinstalled junction programs must leave every switch to the phase clocks.
+"""
+import contextlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sumoenv
+from controller_harness import summary_dict
+from multi_intersection import HOLD_DURATION, MultiIntersectionCSP
+from vehicle_stats import VehicleStats
+
+QUIET = ['--no-step-log', 'true', '--no-warnings', 'true']
+
+
+def sumo_available():
+    try:
+        sumoenv.sumo_home()
+    except RuntimeError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(not sumo_available(), reason="SUMO not installed")
+
+
+def test_summary_lines_up_with_single_junction_rows():
+    controller = MultiIntersectionCSP(label='test_multi', sumo_args=QUIET)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        summary = controller.run_simulation(300)
+    single = summary_dict('csp', 1, 1.0, 0, 0.0, VehicleStats())
+    assert set(single) <= set(summary)
+    assert summary['vehicles_arrived'] == controller.vehicle_stats.arrived > 0
+    assert summary['avg_waiting_time'] == pytest.approx(
+        controller.vehicle_stats.total_waiting_time / summary['vehicles_arrived'])
+
+
+def test_phases_only_end_on_the_phase_clock():
+    controller = MultiIntersectionCSP(label='test_multi_hold', sumo_args=QUIET)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        controller.start()
+    try:
+        tl = controller.traci.trafficlight
+        for tl_id in controller.layout.tl_ids:
+            program = tl.getProgram(tl_id)
+            logic = next(logic for logic in tl.getAllProgramLogics(tl_id) if logic.programID == program)
+            assert all(phase.duration == HOLD_DURATION for phase in logic.phases)
+        controller._advance_clocks(controller.metrics.time)
+        tl_id = controller.layout.tl_ids[0]
+        phase = tl.getPhase(tl_id)
+        assert phase == controller.layout.cycle_phases[0, controller.cycle_pos[0]]
+        for _ in range(int(controller.phase_end[0] - controller.metrics.time) - 1):
+            controller.traci.simulationStep()
+        assert tl.getPhase(tl_id) == phase
+    finally:
+        controller.close()
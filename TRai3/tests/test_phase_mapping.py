@@ -0,0 +1,40 @@
+"""
+Pins the NS/EW phase mapping of gneJ00 against intersection.net.xml: every
+controller builds its cycle from controller_harness.GREEN_PHASE / signal_cycle,
+so a wrong mapping would silently give each direction the other's green.
+"""
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from controller_harness import EW, EW_LANES, GREEN_PHASE, NS, NS_LANES, START, signal_cycle
+from surrogate_env import NET_FILE, load_network
+
+
+def green_lanes_per_phase():
+    root = ET.parse(NET_FILE).getroot()
+    logic = next(tl for tl in root.iter('tlLogic') if tl.get('id') == 'gneJ00' and tl.get('programID') == '0')
+    states = [phase.get('state') for phase in logic.iter('phase')]
+    links = [(int(c.get('linkIndex')), f"{c.get('from')}_{c.get('fromLane')}")
+             for c in root.iter('connection') if c.get('tl') == 'gneJ00']
+    return [{lane for index, lane in links if state[index] in 'Gg'} for state in states]
+
+
+def test_green_phase_matches_network():
+    green = green_lanes_per_phase()
+    assert green[GREEN_PHASE[NS]] == set(NS_LANES)
+    assert green[GREEN_PHASE[EW]] == set(EW_LANES)
+    assert green[GREEN_PHASE[NS] + 1] == green[GREEN_PHASE[EW] + 1] == set() # Kuning
+
+
+def test_signal_cycle_follows_program_order():
+    assert GREEN_PHASE[START] == 0 # Program SUMO dimulai di fase 0
+    assert signal_cycle(30, 40, 5) == ((0, 40), (1, 5), (2, 30), (3, 5))
+
+
+def test_surrogate_green_masks_match_network():
+    lane_ids = list(NS_LANES + EW_LANES)
+    masks = load_network(lane_ids=lane_ids)['green_masks']
+    for phase, lanes in enumerate(green_lanes_per_phase()):
+        assert [lane in lanes for lane in lane_ids] == masks[phase].tolist()
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from green_solver import DEFAULT_WEIGHTS, WEIGHT_NAMES, solve_vectorized
+from plan_cache import PlanCache
+
+BUCKETS = [(1, 1.0), (5, 100.0), (20, 1000.0), (None, None)]
+
+
+def observations(rng, n=400):
+    """States around the direction boundary (ns - ew in -2..2) and around integer waiting times."""
+    for _ in range(n):
+        ew_count = int(rng.integers(0, 40))
+        ns_count = max(0, ew_count + int(rng.integers(-2, 3)))
+        waits = rng.integers(0, 500, size=2) + rng.choice([0.0, 0.001, 0.5, 0.999], size=2)
+        yield ns_count, ew_count, float(waits[0]), float(waits[1])
+
+
+def steady_observations(rng, n=400):
+    """Steady demand: counts and waiting times scattered around one operating point."""
+    for _ in range(n):
+        counts = np.maximum(0, np.round(rng.normal([18, 6], 3)))
+        waits = np.maximum(0., rng.normal([300., 60.], 40.))
+        yield int(counts[0]), int(counts[1]), float(waits[0]), float(waits[1])
+
+
+def replay(cache, states, weights, min_green=20, max_green=60):
+    """Feeds `states` through the cache like TrafficLightCSP; every hit must equal the exact solve."""
+    for obs in states:
+        expected = solve_vectorized(*obs, weights, min_green, max_green)
+        expected = None if expected is None else expected[:2]
+        key = cache.key(*obs)
+        found, plan = cache.lookup(key)
+        if found:
+            assert plan == expected, obs
+        else:
+            cache.store(key, expected)
+    return cache.stats()['hit_rate']
+
+
+@pytest.mark.parametrize('count_bucket, waiting_bucket', BUCKETS)
+@pytest.mark.parametrize('seed', range(4))
+def test_cached_plan_equals_solver(seed, count_bucket, waiting_bucket):
+    rng = np.random.default_rng(seed)
+    weights = dict(DEFAULT_WEIGHTS)
+    if seed:
+        weights = {name: float(DEFAULT_WEIGHTS[name] * np.exp(rng.uniform(-1.5, 1.5))) for name in WEIGHT_NAMES}
+    min_green, max_green = (20, 60) if seed % 2 == 0 else (10, 45)
+    cache = PlanCache(count_bucket=count_bucket, waiting_bucket=waiting_bucket)
+    cache.validate((seed,))
+    replay(cache, observations(rng), weights, min_green, max_green)
+    if count_bucket is None:
+        assert len(cache) <= 3
+
+
+def test_hit_rate_grows_with_bucket_size():
+    hit_rates = [replay(PlanCache(count_bucket=count_bucket, waiting_bucket=waiting_bucket),
+                        steady_observations(np.random.default_rng(0)), DEFAULT_WEIGHTS)
+                 for count_bucket, waiting_bucket in BUCKETS]
+    assert hit_rates == sorted(hit_rates)
+    assert hit_rates[1] > 0.5 # Bucket bawaan
+    assert hit_rates[-1] > 0.99
+
+
+def test_opposite_directions_never_share_a_key():
+    cache = PlanCache(count_bucket=None, waiting_bucket=None)
+    assert cache.key(11, 10, 0.0, 500.0) != cache.key(10, 11, 500.0, 0.0)
+    assert cache.key(10, 10, 3.0, 4.0) == cache.key(0, 0, 0.0, 0.0)
+    cache = PlanCache(count_bucket=5)
+    assert cache.key(11, 10, 0.0, 0.0) != cache.key(10, 11, 0.0, 0.0) # Bucket sama, arah berbeda
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tripinfo import read_tripinfo, summary_row
+from weight_tuner import objective_value
+
+# Dua trip selesai, satu masih berjalan, satu tanpa departLane (sudah di jaringan saat warm start)
+TRIPINFO = """<tripinfos>
+    <tripinfo id="a" depart="0.00" departLane="-gneE0_0" arrival="40.00" duration="40.00" waitingTime="10.00" timeLoss="12.00"/>
+    <tripinfo id="b" depart="5.00" departLane="-gneE1_1" arrival="35.00" duration="30.00" waitingTime="0.00" timeLoss="2.00"/>
+    <tripinfo id="c" depart="10.00" departLane="" arrival="60.00" duration="50.00" waitingTime="20.00" timeLoss="22.00"/>
+    <tripinfo id="d" depart="20.00" departLane="-gneE0_0" arrival="-1.00" duration="80.00" waitingTime="70.00" timeLoss="75.00"/>
+</tripinfos>
+"""
+
+
+@pytest.fixture
+def summary(tmp_path):
+    path = tmp_path / 'tripinfo.xml'
+    path.write_text(TRIPINFO)
+    return read_tripinfo(str(path), {'-gneE0': 'N', '-gneE1': 'E'})
+
+
+def test_unfinished_trips_are_not_counted_as_arrived(summary):
+    assert summary['vehicles_arrived'] == 3
+    assert summary['avg_waiting_time'] == pytest.approx(10.0)
+    assert summary['avg_travel_time'] == pytest.approx(40.0)
+    assert summary['unfinished'] == 1
+    assert summary['unfinished_waiting_time'] == pytest.approx(70.0)
+    assert summary['approaches']['N']['vehicles_arrived'] == 1
+
+
+def test_trips_without_departure_lane_have_no_approach(summary):
+    assert summary['unknown_approach'] == 1
+    assert set(summary['approaches']) == {'N', 'E'}
+    row = summary_row(summary, 'csp', 100, 1.0)
+    assert not any(key.startswith('_') for key in row)
+
+
+def test_tuner_objective_penalizes_unfinished_trips(summary):
+    row = summary_row(summary, 'csp', 100, 1.0)
+    assert objective_value(row, 'avg_waiting_time') == pytest.approx((30.0 + 70.0) / 4)
+    assert objective_value(row, 'avg_time_loss') == pytest.approx((36.0 + 75.0) / 4)
+    assert objective_value(row, 'waiting_time_p90') == row['waiting_time_p90']
@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sumoenv import SumoEnv
+from traffic_light_csp import TIMING_NAMES, TrafficLightCSP
+from weight_tuner import TUNED_NAMES, default_weights, sample_configs
+
+
+def test_default_weights_match_a_fresh_controller():
+    # SumoEnv tidak menjalankan SUMO sebelum reset(), jadi tidak perlu SUMO terpasang
+    csp = TrafficLightCSP(env=SumoEnv(label='test_weight_tuner'))
+    expected = csp.cost_weights()
+    expected.update((name, getattr(csp, name)) for name in TIMING_NAMES)
+    assert default_weights() == expected
+    assert set(default_weights()) == set(TUNED_NAMES)
+
+
+def test_sample_configs_keep_the_baseline_first():
+    base = default_weights()
+    configs = sample_configs(5, base, min_green=(10, 40))
+    assert configs[0] == base
+    for config in configs[1:]:
+        assert 10 <= config['min_green'] <= 40
+        assert config['max_green'] >= config['min_green'] + 5
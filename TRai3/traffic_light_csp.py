@@ -1,29 +1,92 @@
-import traci
+import json
+import multiprocessing
+import os
 import sys
-from constraint import Problem, BacktrackingSolver
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
 import numpy as np
 from sumoenv import SumoEnv 
+from green_solver import DEFAULT_WEIGHTS, SOLVER_ENGINES, WEIGHT_NAMES, calculate_cost
+from controller_harness import (EW_LANES, LOG_COLUMNS, NS_LANES, STORE_COLUMNS, average_vehicle_wait, signal_cycle,
+                                summary_dict)
+from plan_cache import PlanCache
+from metrics_sink import MetricsSink
+from vehicle_stats import VehicleStats
+import results_store
+import tripinfo
+
+# Pekerja solver mode pipeline: 'thread' cukup untuk solver NumPy, 'process' untuk solver
+# Python murni ('constraint') yang memegang GIL selama solve
+PIPELINE_EXECUTORS = ('thread', 'process')
+
+# Batas durasi hijau (detik, bilangan bulat) yang juga boleh diatur lewat set_weights()/profil bobot
+TIMING_NAMES = ('min_green', 'max_green')
+DEFAULT_TIMING = {'min_green': 20, 'max_green': 60}
 
 class TrafficLightCSP:
-    def __init__(self):
-        self.env = SumoEnv(label='csp_sim', gui_f=True) # Mengatur gui_f=True untuk visualisasi
+    def __init__(self, solver_engine='vectorized', use_subscriptions=True, backend='libsumo', env=None,
+                 profiler=None, planner=None, fast_forward=False, lookahead=None, solve_deadline=0.05,
+                 pipeline_executor='thread', gui_f=False):
+        if solver_engine not in SOLVER_ENGINES:
+            raise ValueError(f"Unknown solver engine '{solver_engine}', expected one of {sorted(SOLVER_ENGINES)}")
+        if env is None:
+            env = SumoEnv(label='csp_sim', gui_f=gui_f, use_subscriptions=use_subscriptions,
+                          backend=backend) # gui_f=True untuk visualisasi (sumo-gui)
+        if profiler is not None:
+            env.profiler = profiler
+        if fast_forward and env.metrics_mode != 'tripinfo':
+            raise ValueError("fast_forward needs an env with metrics_mode='tripinfo' (vehicles are not polled per step)")
+        if fast_forward and env.detectors is not None:
+            raise ValueError("fast_forward cannot be combined with observation='detectors' (loops would be read once per phase)")
+        self.env = env
+        # Satu simulationStep(targetTime) per fase alih-alih satu per detik; log satu baris per fase
+        self.fast_forward = fast_forward
+        if lookahead is not None and planner is not None:
+            raise ValueError("lookahead cannot be combined with a planner (rollouts need the running simulation)")
+        if pipeline_executor not in PIPELINE_EXECUTORS:
+            raise ValueError(f"Unknown pipeline executor '{pipeline_executor}', expected one of {PIPELINE_EXECUTORS}")
+        # Mode pipeline: observasi `lookahead` langkah sebelum keputusan, solver berjalan di thread
+        # pekerja sementara simulasi lanjut; jika belum selesai `solve_deadline` detik setelah titik
+        # keputusan, rencana sebelumnya dipakai lagi. None = berurutan (observasi, solve, aktuasi)
+        self.lookahead = lookahead
+        self.solve_deadline = solve_deadline
+        self.pipeline_executor = pipeline_executor
+        self._executor = None
+        self._pending = None # (observasi, dari cache?, Future) rencana berikutnya
+        self._prefetch_step = None
+        self._last_plan = None
+        self.prefetched = 0
+        self.late_plans = 0
+        self.plan_wait_time = 0.0
+        self.profiler = env.profiler # Timer per tahap; NULL_PROFILER jika tidak diaktifkan
         self.tl_id = "gneJ00" 
-        self.ns_lanes = ['-gneE0_0', '-gneE0_1', '-gneE0_2', '-gneE2_0', '-gneE2_1', '-gneE2_2']
-        # Perbaikan typo: mengubah '-gneE1_1' kedua menjadi '-gneE1_2'
-        self.ew_lanes = ['-gneE1_0', '-gneE1_1', '-gneE1_2', '-gneE3_0', '-gneE3_1', '-gneE3_2']
+        self.ns_lanes = list(NS_LANES)
+        self.ew_lanes = list(EW_LANES)
+        self.ns_lane_idx = self.env.metrics.lane_indices(self.ns_lanes)
+        self.ew_lane_idx = self.env.metrics.lane_indices(self.ew_lanes)
         
-        self.min_green = 20
-        self.max_green = 60
+        self.min_green = DEFAULT_TIMING['min_green']
+        self.max_green = DEFAULT_TIMING['max_green']
         self.yellow_time = 5
         self.red_time = 0 
+        self.green_step = 1 # Granularitas durasi hijau (detik)
+
+        # 'vectorized' (NumPy, satu kali evaluasi grid) atau 'constraint' (python-constraint lama)
+        self.solver_engine = solver_engine
 
         self.step = 0
-        self.total_vehicles_departed = 0
+        self._end_step = None # total_steps run_simulation(): siklus terakhir dipotong di sini
+        self.wall_time = 0.0
+        self.log_path = 'queue_length.txt'
+        self.log_formats = ('csv',) # Tambahkan 'npz' / 'parquet' untuk output kolom biner
+        self._sink = None
+        self.total_vehicles_arrived = 0
         self.total_waiting_time = 0.0 # This will store sum of total waiting times for *arrived* vehicles
-        self.vehicle_travel_times = {}
-        self.vehicle_departure_times = {}
-        # New: Dictionary to accumulate waiting time for each *active* vehicle
-        self.accumulated_waiting_time_per_veh = {} 
+        # Waktu berangkat dan waktu tunggu terakumulasi per kendaraan *aktif* (slot didaur ulang saat tiba),
+        # serta agregat perjalanan yang sudah selesai
+        self.vehicle_stats = VehicleStats()
+        # Ringkasan tripinfo.read_tripinfo() jika env berjalan dengan metrics_mode='tripinfo'
+        self.trip_summary = None
         
         # Mengubah variabel untuk menghitung total mobil di jalur
         self.current_ns_waiting_time = 0.0 # instantaneous waiting time sum for lanes
@@ -31,87 +94,315 @@ class TrafficLightCSP:
         self.current_ns_vehicle_count = 0 
         self.current_ew_vehicle_count = 0 
         
-        # Bobot untuk fungsi biaya (tuning ini sangat penting!)
-        self.ns_waiting_time_weight = 1.0 
-        self.ew_waiting_time_weight = 1.0 
-        self.ns_vehicle_count_weight = 0.5 
-        self.ew_vehicle_count_weight = 0.5 
-        self.imbalance_penalty = 10.0 
-        self.over_max_green_penalty = 5.0 
-        # NEW: Penalty for longer green light durations
-        self.green_duration_penalty_weight = 0.01 # Adjust this value as needed
+        # Bobot untuk fungsi biaya (tuning ini sangat penting!), awalnya green_solver.DEFAULT_WEIGHTS
+        self.set_weights(DEFAULT_WEIGHTS)
+
+        # Cache rencana (ns_green, ew_green) per state terkuantisasi (lihat plan_cache.py); set None untuk menonaktifkan
+        self.plan_cache = PlanCache()
+        # Opsional: mpc_planner.MPCPlanner memilih di antara rencana terbaik lewat simulasi rollout
+        self.planner = planner
+        # Opsional: results_store.ResultsStore yang mencatat metadata, KPI dan deret per langkah setiap run
+        self.results_store = None
+        self._run_id = None
+        # Opsional: live_metrics.LiveMetricsWriter, menerima satu baris per langkah yang dicatat (lihat live_metrics.py)
+        self.live_metrics = None
+        self._phase = 0
+        self._greens = (np.nan, np.nan) # Hijau NS/EW siklus yang sedang berjalan, NaN sebelum keputusan pertama
+        # Mode detektor: total loop (kendaraan, detik tertutup) pada keputusan terakhir, awal jendela agregasi
+        self._detector_mark = (0, 0.0)
 
 
     def _get_current_lane_metrics(self):
+        detectors = self.env.detectors
+        if detectors is not None:
+            # Seperti controller lapangan: jumlah kendaraan yang melewati loop dan detik loop tertutup
+            # (antrean sampai ke loop) per arah sejak keputusan terakhir, alih-alih isi lajur saat ini
+            counts = detectors.vehicle_total - self._detector_mark[0]
+            occupied = detectors.occupied_time - self._detector_mark[1]
+            self.current_ns_vehicle_count = int(counts[self.ns_lane_idx].sum())
+            self.current_ew_vehicle_count = int(counts[self.ew_lane_idx].sum())
+            self.current_ns_waiting_time = float(occupied[self.ns_lane_idx].sum())
+            self.current_ew_waiting_time = float(occupied[self.ew_lane_idx].sum())
+            return
+
         # Mendapatkan waktu tunggu saat ini untuk setiap arah
         # This is instantaneous waiting time for halting vehicles on specified lanes
-        self.current_ns_waiting_time = sum(traci.lane.getWaitingTime(lane_id) for lane_id in self.ns_lanes)
-        self.current_ew_waiting_time = sum(traci.lane.getWaitingTime(lane_id) for lane_id in self.ew_lanes)
+        metrics = self.env.metrics
+        self.current_ns_waiting_time = float(metrics.lane_waiting_time[self.ns_lane_idx].sum())
+        self.current_ew_waiting_time = float(metrics.lane_waiting_time[self.ew_lane_idx].sum())
         
         # Mendapatkan jumlah total mobil di jalur untuk setiap arah
-        self.current_ns_vehicle_count = sum(traci.lane.getLastStepVehicleNumber(lane_id) for lane_id in self.ns_lanes)
-        self.current_ew_vehicle_count = sum(traci.lane.getLastStepVehicleNumber(lane_id) for lane_id in self.ew_lanes)
+        self.current_ns_vehicle_count = int(metrics.lane_vehicle_number[self.ns_lane_idx].sum())
+        self.current_ew_vehicle_count = int(metrics.lane_vehicle_number[self.ew_lane_idx].sum())
+
+
+    def _average_vehicle_wait(self, lane_idx):
+        return average_vehicle_wait(self.env.metrics, lane_idx)
+
+
+    def _log_step(self):
+        """Appends the current step to the queue_length log."""
+        metrics = self.env.metrics
+        ns_queue = int(metrics.lane_halting_number[self.ns_lane_idx].sum())
+        ew_queue = int(metrics.lane_halting_number[self.ew_lane_idx].sum())
+        row = (self.step, ns_queue + ew_queue, self.env.get_waiting_time(), ns_queue, ew_queue,
+               self._average_vehicle_wait(self.ns_lane_idx), self._average_vehicle_wait(self.ew_lane_idx))
+        self._sink.append(*row)
+        if self.live_metrics is not None:
+            self.live_metrics.publish(*row, self._phase, *self._greens)
+
+
+    def cost_weights(self):
+        return {name: getattr(self, name) for name in WEIGHT_NAMES}
+
+
+    def set_weights(self, weights):
+        """
+        Sets cost weights from a {name: value} dict (names from green_solver.WEIGHT_NAMES);
+        min_green / max_green (TIMING_NAMES) are accepted too.
+        """
+        known = WEIGHT_NAMES + TIMING_NAMES
+        unknown = set(weights) - set(known)
+        if unknown:
+            raise ValueError(f"Unknown cost weight(s) {sorted(unknown)}, expected any of {known}")
+        for name, value in weights.items():
+            setattr(self, name, int(value) if name in TIMING_NAMES else float(value))
+
+
+    def load_weights(self, path):
+        """Loads a weight profile written by weight_tuner.py; returns the whole profile dict."""
+        with open(path) as f:
+            profile = json.load(f)
+        self.set_weights(profile['weights'])
+        return profile
 
 
     def calculate_cost(self, ns_vehicle_count, ew_vehicle_count, ns_green, ew_green):
-        cost = 0
-        # Tujuan: Meminimalkan waktu tunggu dan jumlah mobil di jalur
         # Menggunakan waktu tunggu saat ini yang sudah didapatkan (instantaneous lane waiting time)
-        cost += self.current_ns_waiting_time * self.ns_waiting_time_weight
-        cost += self.current_ew_waiting_time * self.ew_waiting_time_weight
-        
-        # Menambahkan bobot untuk jumlah mobil di jalur
-        cost += ns_vehicle_count * self.ns_vehicle_count_weight
-        cost += ew_vehicle_count * self.ew_vehicle_count_weight
-
-        # Kendala/Penalti untuk ketidakseimbangan yang tidak diatasi dengan benar
-        if ns_vehicle_count > ew_vehicle_count and ns_green < ew_green:
-            cost += (ew_green - ns_green) * self.imbalance_penalty
-        elif ew_vehicle_count > ns_vehicle_count and ew_green < ns_green:
-            cost += (ns_green - ew_green) * self.imbalance_penalty
-        
-        # NEW: Add a small penalty for longer green light durations
-        cost += ns_green * self.green_duration_penalty_weight
-        cost += ew_green * self.green_duration_penalty_weight
-            
-        return cost
+        return calculate_cost(ns_vehicle_count, ew_vehicle_count,
+                              self.current_ns_waiting_time, self.current_ew_waiting_time,
+                              ns_green, ew_green, self.cost_weights())
+
+
+    def _plan_signature(self):
+        return tuple(getattr(self, name) for name in WEIGHT_NAMES) + (self.min_green, self.max_green, self.green_step)
+
+
+    def _observation(self):
+        """(ns count, ew count, ns waiting time, ew waiting time) from the last _get_current_lane_metrics()."""
+        return (self.current_ns_vehicle_count, self.current_ew_vehicle_count,
+                self.current_ns_waiting_time, self.current_ew_waiting_time)
+
+
+    def _lookup_plan(self, observation):
+        """Plan cache lookup: (True, plan or None) on a hit, (False, None) on a miss."""
+        if self.plan_cache is None:
+            return False, None
+        self.plan_cache.validate(self._plan_signature())
+        found, plan = self.plan_cache.lookup(self.plan_cache.key(*observation))
+        if not found or plan is None:
+            return found, None
+        ns_green, ew_green = plan
+        return True, (ns_green, ew_green, calculate_cost(*observation, ns_green, ew_green, self.cost_weights()))
+
+
+    def _store_plan(self, observation, result):
+        if self.plan_cache is not None:
+            self.plan_cache.store(self.plan_cache.key(*observation), None if result is None else result[:2])
+
+
+    def _solve_green_split(self, observation=None):
+        """Returns (ns_green, ew_green, cost) for `observation` (default: the current lane metrics), or None."""
+        if observation is None:
+            observation = self._observation()
+        found, result = self._lookup_plan(observation)
+        if found:
+            return result
+
+        solve = SOLVER_ENGINES[self.solver_engine]
+        with self.profiler.stage(f'csp.solve.{self.solver_engine}'):
+            result = solve(*observation, self.cost_weights(), self.min_green, self.max_green, self.green_step)
+        self._store_plan(observation, result)
+        return result
+
+
+    def _plan_green_split(self):
+        """Green split for the next cycle: the MPC planner if one is set, else the analytic solver."""
+        if self.planner is not None:
+            return self.planner.plan(self)
+        if self.lookahead is not None:
+            return self._collect_plan()
+        return self._solve_green_split()
+
+
+    def _schedule_prefetch(self, cycle_length):
+        """Pipeline mode: the step at which the plan after a cycle starting now is requested."""
+        # Setelah siklus, keputusan berikutnya jatuh pada kelipatan 50 pertama setelah siklus selesai
+        next_decision = ((self.step + cycle_length) // 50 + 1) * 50
+        self._prefetch_step = next_decision - self.lookahead
+
+
+    def _submit_solve(self, observation):
+        """Hands one solve to the pipeline worker (only plain arguments, so it also works across processes)."""
+        return self._executor.submit(SOLVER_ENGINES[self.solver_engine], *observation, self.cost_weights(),
+                                     self.min_green, self.max_green, self.green_step)
+
+
+    def _maybe_prefetch(self):
+        """Pipeline mode: at the prefetch step, observes the lanes and hands the solve to the worker."""
+        if self._prefetch_step is None or self.step < self._prefetch_step:
+            return
+        self._prefetch_step = None
+        self._get_current_lane_metrics()
+        observation = self._observation()
+        # Cache rencana hanya disentuh di thread utama
+        found, plan = self._lookup_plan(observation)
+        if found:
+            future = Future()
+            future.set_result(plan)
+        else:
+            future = self._submit_solve(observation)
+        self._pending = (observation, found, future)
+        self.prefetched += 1
+
+
+    def _collect_plan(self):
+        """Pipeline mode: the prefetched plan, or the previous one if the solver misses the deadline."""
+        pending, self._pending = self._pending, None
+        if pending is None: # Keputusan pertama: belum ada yang diminta sebelumnya
+            return self._solve_green_split()
+        observation, cached, future = pending
+        start = time.perf_counter()
+        try:
+            result = future.result(timeout=self.solve_deadline)
+        except TimeoutError:
+            self.late_plans += 1
+            print(f"  Solver missed the {self.solve_deadline * 1e3:.0f} ms deadline, reusing the previous plan")
+            return self._last_plan
+        finally:
+            self.plan_wait_time += time.perf_counter() - start
+        if not cached:
+            self._store_plan(observation, result)
+        return result
+
+
+    def _start_pipeline(self):
+        if self.pipeline_executor == 'process':
+            # spawn: pekerja tidak boleh mewarisi instance libsumo yang sedang berjalan
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            # Panaskan pekerja (start proses + import solver) selama siklus pertama berjalan
+            self._submit_solve((0, 0, 0.0, 0.0))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='csp_solver')
+
+
+    def _account_vehicles(self):
+        """Vehicle bookkeeping of the last simulated step (traci mode only)."""
+        metrics = self.env.metrics
+        # Mode tripinfo: statistik perjalanan dibaca dari output SUMO setelah simulasi
+        if not metrics.track_vehicles:
+            return
+        vehicle_stats = self.vehicle_stats
+        with self.profiler.stage('csp.vehicle_accounting'):
+            # Track departed vehicles for departure times
+            vehicle_stats.depart(metrics.departed_ids, metrics.time)
+
+            # Accumulate waiting time for *active* vehicles at each step
+            # Iterate over all vehicles currently in the simulation
+            vehicle_stats.add_waiting(metrics.vehicle_waiting_time.keys(), metrics.vehicle_waiting_time.values())
+
+            # For vehicles that arrived at their destination: travel time and
+            # accumulated waiting time go into the aggregates, the slot is freed
+            vehicle_stats.arrive(metrics.arrived_ids, metrics.time)
+            self.total_vehicles_arrived = vehicle_stats.arrived
+            self.total_waiting_time = vehicle_stats.total_waiting_time
+
+
+    def _simulate_step(self):
+        """One simulation second: step, vehicle bookkeeping and log row."""
+        with self.profiler.stage('csp.simulation_step'):
+            self.env.simulation_step()
+        # Setiap langkah, juga di dalam siklus: kendaraan yang tiba harus melepas slotnya
+        self._account_vehicles()
+        with self.profiler.stage('csp.log'):
+            self._log_step()
+        self.step += 1
+        self._maybe_prefetch()
+
+
+    def _advance(self, steps):
+        """Fast-forward: `steps` simulation seconds in one call, one log row for the last of them."""
+        if steps <= 0:
+            return
+        with self.profiler.stage('csp.simulation_step'):
+            self.env.fast_forward(steps)
+        self._account_vehicles()
+        self.step += steps - 1 # Indeks langkah terakhir, seperti baris log mode per langkah
+        with self.profiler.stage('csp.log'):
+            self._log_step()
+        self.step += 1
+        self._maybe_prefetch()
+
+
+    def _run_cycle(self, green_ns, green_ew):
+        """
+        Runs one controller_harness.signal_cycle (EW green / yellow / NS green / yellow
+        on gneJ00), cut off at the run's total_steps.
+        """
+        if self.lookahead is not None:
+            self._schedule_prefetch(green_ns + green_ew + 2 * self.yellow_time)
+        self._greens = (green_ns, green_ew)
+        cycle = signal_cycle(green_ns, green_ew, self.yellow_time)
+        if self.fast_forward:
+            # Seluruh siklus diprogram sekali (fase 0..3 berurutan); SUMO berpindah fase sendiri
+            self.env.program_cycle([duration for _, duration in cycle], append_base=True)
+            for phase, duration in cycle:
+                self._phase = phase
+                self._advance(min(duration, self._end_step - self.step))
+            return
+        for phase, duration in cycle:
+            duration = min(duration, self._end_step - self.step)
+            if duration <= 0:
+                break
+            self._phase = phase
+            self.env.set_traffic_light_phase(phase, duration)
+            for _ in range(duration):
+                self._simulate_step()
 
 
     def run_simulation(self, total_steps):
+        self._end_step = total_steps
         try:
             self.env.reset()
-            traci.trafficlight.setPhase(self.tl_id, 0) 
-            traci.trafficlight.setPhaseDuration(self.tl_id, self.min_green)
+            self.trip_summary = None
+            on_flush = None
+            if self.results_store is not None:
+                self._run_id = self.results_store.begin_run(
+                    results_store.run_metadata(self.env, 'csp', total_steps, fast_forward=int(self.fast_forward)),
+                    params=self.run_params())
+                on_flush = self.results_store.series_writer(self._run_id, STORE_COLUMNS)
+            self._sink = MetricsSink(self.log_path, LOG_COLUMNS, formats=self.log_formats, on_flush=on_flush)
+            self.env.set_traffic_light_phase(0, self.min_green)
+            self._phase, self._greens = 0, (np.nan, np.nan)
+            self._detector_mark = (0, 0.0)
+            if self.lookahead is not None:
+                self._start_pipeline()
+            start_time = time.perf_counter()
 
             while self.step < total_steps:
-                traci.simulationStep()
-                self.step += 1
-
-                # Track departed vehicles for departure times
-                for veh_id in traci.simulation.getDepartedIDList():
-                    self.vehicle_departure_times[veh_id] = traci.simulation.getTime()
-
-                # Accumulate waiting time for *active* vehicles at each step
-                # Iterate over all vehicles currently in the simulation
-                for veh_id in traci.vehicle.getIDList(): 
-                    self.accumulated_waiting_time_per_veh[veh_id] = \
-                        self.accumulated_waiting_time_per_veh.get(veh_id, 0) + traci.vehicle.getWaitingTime(veh_id)
-
-                # For vehicles that arrived at their destination
-                for veh_id in traci.simulation.getArrivedIDList():
-                    if veh_id in self.vehicle_departure_times:
-                        self.total_vehicles_departed += 1
-                        travel_time = traci.simulation.getTime() - self.vehicle_departure_times[veh_id]
-                        self.vehicle_travel_times[veh_id] = travel_time
-                        
-                        # Add the total accumulated waiting time for this vehicle
-                        if veh_id in self.accumulated_waiting_time_per_veh:
-                            self.total_waiting_time += self.accumulated_waiting_time_per_veh[veh_id]
-                            del self.accumulated_waiting_time_per_veh[veh_id] # Clean up to save memory
-                        # else: This vehicle might have departed and arrived within the same step or an edge case
+                if self.fast_forward:
+                    # Langsung ke titik keputusan berikutnya (langkah 1 atau kelipatan 50)
+                    decision_step = 1 if self.step == 0 else (self.step // 50 + 1) * 50
+                    target = min(decision_step, total_steps)
+                    if self._prefetch_step is not None and self.step < self._prefetch_step < target:
+                        target = self._prefetch_step # Berhenti di titik observasi mode pipeline
+                    self._advance(target - self.step)
+                else:
+                    self._simulate_step()
 
                 # Mendapatkan metrik jumlah mobil dan waktu tunggu saat ini (instantaneous)
-                self._get_current_lane_metrics()
+                with self.profiler.stage('csp.lane_metrics'):
+                    self._get_current_lane_metrics()
 
                 if self.step % 50 == 0 or self.step == 1:
                     print(f"------------------------------")
@@ -119,140 +410,110 @@ class TrafficLightCSP:
                     print(f"  NS Vehicle Count: {self.current_ns_vehicle_count}, NS Waiting Time: {self.current_ns_waiting_time:.2f}")
                     print(f"  EW Vehicle Count: {self.current_ew_vehicle_count}, EW Waiting Time: {self.current_ew_waiting_time:.2f}")
 
-                    problem = Problem(BacktrackingSolver())
-
-                    problem.addVariable('ns_green', range(self.min_green, self.max_green + 1))
-                    problem.addVariable('ew_green', range(self.min_green, self.max_green + 1))
-
-                    problem.addConstraint(lambda ns: ns >= self.min_green, ['ns_green'])
-                    problem.addConstraint(lambda ew: ew >= self.min_green, ['ew_green'])
-
-                    problem.addConstraint(lambda ns: ns <= self.max_green, ['ns_green'])
-                    problem.addConstraint(lambda ew: ew <= self.max_green, ['ew_green'])
+                    with self.profiler.stage('csp.decision'):
+                        plan = self._plan_green_split()
+                    self._last_plan = plan
+                    if self.env.detectors is not None: # Jendela agregasi detektor berikutnya dimulai di sini
+                        self._detector_mark = (self.env.detectors.vehicle_total.copy(),
+                                               self.env.detectors.occupied_time.copy())
 
-                    if self.current_ns_vehicle_count > self.current_ew_vehicle_count:
-                        problem.addConstraint(lambda ns, ew: ns >= ew, ['ns_green', 'ew_green'])
-                        problem.addConstraint(lambda ns, ew: ns - ew >= 5, ['ns_green', 'ew_green'])
-                    elif self.current_ew_vehicle_count > self.current_ns_vehicle_count:
-                        problem.addConstraint(lambda ns, ew: ew >= ns, ['ns_green', 'ew_green'])
-                        problem.addConstraint(lambda ew, ns: ew - ns >= 5, ['ew_green', 'ns_green'])
-                    else:
-                        problem.addConstraint(lambda ns, ew: abs(ns - ew) <= 10, ['ns_green', 'ew_green'])
-
-                    problem.addConstraint(lambda ns, ew: ns >= self.min_green and ew >= self.min_green, ['ns_green', 'ew_green'])
-
-                    # Add the objective function constraint
-                    problem.addConstraint(
-                        lambda ns_green, ew_green: self.calculate_cost(
-                            self.current_ns_vehicle_count, self.current_ew_vehicle_count, 
-                            ns_green, ew_green
-                        ) == min(
-                            self.calculate_cost(self.current_ns_vehicle_count, self.current_ew_vehicle_count, ng, eg)
-                            for ng in range(self.min_green, self.max_green + 1)
-                            for eg in range(self.min_green, self.max_green + 1)
-                            # Filter solutions that meet other constraints for accurate min_cost calculation
-                            if ( (self.current_ns_vehicle_count > self.current_ew_vehicle_count and ng >= eg and ng - eg >= 5) or
-                                 (self.current_ew_vehicle_count > self.current_ns_vehicle_count and eg >= ng and eg - ng >= 5) or
-                                 (self.current_ns_vehicle_count == self.current_ew_vehicle_count and abs(ng - eg) <= 10) )
-                            and ng >= self.min_green and eg >= self.min_green and ng <= self.max_green and eg <= self.max_green
-                        ),
-                        ['ns_green', 'ew_green']
-                    )
-
-                    solutions = problem.getSolutions()
-
-                    optimal_solution = None
-                    min_cost = float('inf')
-
-                    if solutions:
-                        for sol in solutions:
-                            cost = self.calculate_cost(self.current_ns_vehicle_count, self.current_ew_vehicle_count, sol['ns_green'], sol['ew_green'])
-                            if cost < min_cost:
-                                min_cost = cost
-                                optimal_solution = sol
-                        
-                        green_ns_final = optimal_solution['ns_green']
-                        green_ew_final = optimal_solution['ew_green']
+                    if plan is not None:
+                        green_ns_final, green_ew_final, min_cost = plan
                         print(f"  Green NS Final: {green_ns_final}s, Green EW Final: {green_ew_final}s")
                         print(f"  Optimal CSP solution found with cost: {min_cost:.2f}")
-
-                        traci.trafficlight.setPhase(self.tl_id, 0) 
-                        traci.trafficlight.setPhaseDuration(self.tl_id, green_ns_final)
-                        for _ in range(green_ns_final):
-                            traci.simulationStep()
-                            self.step += 1
-                        
-                        traci.trafficlight.setPhase(self.tl_id, 1)
-                        traci.trafficlight.setPhaseDuration(self.tl_id, self.yellow_time)
-                        for _ in range(self.yellow_time):
-                            traci.simulationStep()
-                            self.step += 1
-
-                        traci.trafficlight.setPhase(self.tl_id, 2)
-                        traci.trafficlight.setPhaseDuration(self.tl_id, green_ew_final)
-                        for _ in range(green_ew_final):
-                            traci.simulationStep()
-                            self.step += 1
-
-                        traci.trafficlight.setPhase(self.tl_id, 3)
-                        traci.trafficlight.setPhaseDuration(self.tl_id, self.yellow_time)
-                        for _ in range(self.yellow_time):
-                            traci.simulationStep()
-                            self.step += 1
-
                     else:
                         print(f"  No optimal CSP solution found for step {self.step}. Using default green times.")
                         green_ns_final = self.min_green
                         green_ew_final = self.min_green
                         print(f"  Green NS Final: {green_ns_final}s, Green EW Final: {green_ew_final}s")
-                        
-                        traci.trafficlight.setPhase(self.tl_id, 0)
-                        traci.trafficlight.setPhaseDuration(self.tl_id, green_ns_final)
-                        for _ in range(green_ns_final):
-                            traci.simulationStep()
-                            self.step += 1
-                        
-                        traci.trafficlight.setPhase(self.tl_id, 1)
-                        traci.trafficlight.setPhaseDuration(self.tl_id, self.yellow_time)
-                        for _ in range(self.yellow_time):
-                            traci.simulationStep()
-                            self.step += 1
-
-                        traci.trafficlight.setPhase(self.tl_id, 2)
-                        traci.trafficlight.setPhaseDuration(self.tl_id, green_ew_final)
-                        for _ in range(green_ew_final):
-                            traci.simulationStep()
-                            self.step += 1
-
-                        traci.trafficlight.setPhase(self.tl_id, 3)
-                        traci.trafficlight.setPhaseDuration(self.tl_id, self.yellow_time)
-                        for _ in range(self.yellow_time):
-                            traci.simulationStep()
-                            self.step += 1
-
-
-            if self.total_vehicles_departed > 0:
-                avg_waiting_time = self.total_waiting_time / self.total_vehicles_departed
-                total_travel_time = sum(self.vehicle_travel_times.values())
-                avg_travel_time = total_travel_time / self.total_vehicles_departed if self.total_vehicles_departed > 0 else 0
-                throughput = self.total_vehicles_departed / self.step if self.step > 0 else 0
+
+                    self._run_cycle(green_ns_final, green_ew_final)
+
+            self.wall_time = time.perf_counter() - start_time
+
+            if self.env.metrics_mode == 'tripinfo':
+                print(f"\nSimulation ended at step {self.step}, trip statistics follow once SUMO has written them")
+                print(f"Wall-clock: {self.wall_time:.2f}s ({self.step / self.wall_time:.1f} steps/s)")
+                self._print_planning_stats()
+            elif self.total_vehicles_arrived > 0:
+                avg_waiting_time = self.total_waiting_time / self.total_vehicles_arrived
+                total_travel_time = self.vehicle_stats.total_travel_time
+                avg_travel_time = total_travel_time / self.total_vehicles_arrived if self.total_vehicles_arrived > 0 else 0
+                throughput = self.total_vehicles_arrived / self.step if self.step > 0 else 0
                 
                 print(f"\n--- Simulation Summary (CSP Adaptive Traffic Light Optimized by Vehicle Count) ---")
-                print(f"Simulation ended at step {self.step}. Total vehicles departed: {self.total_vehicles_departed}")
+                print(f"Simulation ended at step {self.step}. Total vehicles arrived: {self.total_vehicles_arrived}")
                 print(f"Total waiting time: {self.total_waiting_time:.2f}s, Average waiting time per vehicle: {avg_waiting_time:.2f}s")
                 print(f"Total travel time: {total_travel_time:.2f}s, Average travel time per vehicle: {avg_travel_time:.2f}s")
+                trips = self.vehicle_stats.summary()
+                print(f"Travel time p50/p90/p99: {trips['travel_time_p50']:.1f}s / {trips['travel_time_p90']:.1f}s / "
+                      f"{trips['travel_time_p99']:.1f}s")
                 print(f"Throughput: {throughput:.4f} vehicles/step")
+                print(f"Wall-clock: {self.wall_time:.2f}s ({self.step / self.wall_time:.1f} steps/s)")
+                self._print_planning_stats()
             else:
-                print("No vehicles departed during the simulation.")
+                print("No vehicles arrived during the simulation.")
+            if self.profiler.enabled:
+                self.profiler.print_report()
         except Exception as e:
+            self._run_id = None # Run yang gagal tidak ditandai selesai di results_store
             print(f"Simulation terminated with error: {e}")
             import traceback
             traceback.print_exc()
         finally:
+            if self._sink is not None:
+                self._sink.close()
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = self._pending = self._prefetch_step = None
+            if self.planner is not None: # Worker rollout (satu proses SUMO masing-masing) dihentikan
+                self.planner.close()
             self.env.close()
+            self.profiler.close()
             print("TraCI connection closed successfully")
+        # SUMO menulis tripinfo saat ditutup
+        if self.env.metrics_mode == 'tripinfo' and os.path.exists(self.env.tripinfo_path):
+            self.trip_summary = self.env.read_trips()
+            tripinfo.print_summary(self.trip_summary, "CSP Adaptive Traffic Light")
+        summary = self.summary()
+        if self._run_id is not None:
+            self.results_store.finish_run(self._run_id, summary)
+            self._run_id = None
+        return summary
+
+
+    def run_params(self):
+        """Controller settings recorded with each run in the results store."""
+        params = self.cost_weights()
+        params.update(min_green=self.min_green, max_green=self.max_green, green_step=self.green_step,
+                      solver_engine=self.solver_engine, lookahead=self.lookahead, observation=self.env.observation,
+                      planner=type(self.planner).__name__ if self.planner is not None else None)
+        return params
+
+
+    def _print_planning_stats(self):
+        if self.plan_cache is not None:
+            stats = self.plan_cache.stats()
+            print(f"Plan cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"(hit rate {stats['hit_rate']:.1%}, {stats['evictions']} evictions, "
+                  f"{stats['invalidations']} invalidations)")
+        if self.planner is not None:
+            stats = self.planner.stats()
+            print(f"MPC planner: {stats['decisions']} decisions, {stats['fallbacks']} fallbacks, "
+                  f"{stats['mean_decision_time'] * 1e3:.1f} ms per decision")
+        if self.lookahead is not None:
+            print(f"Pipeline: {self.prefetched} plans solved {self.lookahead} steps ahead, "
+                  f"{self.late_plans} late (previous plan reused), "
+                  f"{self.plan_wait_time * 1e3:.1f} ms waited at decision points")
+
+
+    def summary(self):
+        """KPI of the last run as a dict (same fields as the printed summary)."""
+        return summary_dict('csp', self.step, self.wall_time, self.total_vehicles_arrived, self.total_waiting_time,
+                            self.vehicle_stats, self.trip_summary)
 
 
 if __name__ == "__main__":
-    traffic_light = TrafficLightCSP()
-    traffic_light.run_simulation(total_steps=500)
\ No newline at end of file
+    # Sama dengan `python cli.py run csp` (opsi: --steps, --gui, ...)
+    from cli import main
+    sys.exit(main(['run', 'csp'] + sys.argv[1:]))
\ No newline at end of file
@@ -0,0 +1,217 @@
+import os
+import xml.etree.ElementTree as ET
+from vehicle_stats import P2Quantile
+
+DETECTOR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'detector.add.xml')
+
+
+def detector_args(out_dir, label, detector_file=DETECTOR_FILE):
+    """
+    SUMO options loading the e1 detectors of `detector_file`, as (sumo_args, detector_path).
+    The detectors are copied to <out_dir>/<label>_detectors.add.xml with their output
+    redirected to <label>_detectors.xml, so parallel runs do not share one output file.
+    """
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    detector_path = os.path.join(out_dir, f"{label}_detectors.xml")
+    additional_path = os.path.join(out_dir, f"{label}_detectors.add.xml")
+    tree = ET.parse(detector_file)
+    for detector in tree.getroot():
+        detector.set('file', detector_path)
+    tree.write(additional_path)
+    return ['--additional-files', additional_path], detector_path
+
+
+def detector_ids(detector_file=DETECTOR_FILE):
+    """{lane id: e1 detector id} of the detectors in `detector_file`."""
+    return {detector.get('lane'): detector.get('id') for detector in ET.parse(detector_file).getroot()
+            if detector.tag == 'e1Detector'}
+
+
+def output_args(out_dir, label, detector_file=DETECTOR_FILE):
+    """
+    SUMO options for a tripinfo-mode run and the files they produce.
+
+    Returns (sumo_args, tripinfo_path, detector_path); the e1 detectors are loaded
+    as in detector_args(), detector_file=None leaves them out (detector_path is None).
+    """
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    tripinfo_path = os.path.join(out_dir, f"{label}_tripinfo.xml")
+    args = ['--tripinfo-output', tripinfo_path]
+    detector_path = None
+    if detector_file is not None:
+        options, detector_path = detector_args(out_dir, label, detector_file)
+        args += options
+    return args, tripinfo_path, detector_path
+
+
+def _iter_elements(path, tag):
+    """Yields the `tag` elements of an XML file one at a time, releasing each afterwards."""
+    context = ET.iterparse(path, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event == 'end' and elem.tag == tag:
+            yield elem
+            # Lepaskan elemen yang sudah dibaca agar memori tetap konstan
+            root.clear()
+
+
+class TripAggregate:
+    """Count, sums and P-square quantiles of travel and waiting time for a set of trips."""
+
+    def __init__(self, quantiles=(0.5, 0.9, 0.99)):
+        self.vehicles = 0
+        self.total_travel_time = 0.0
+        self.total_waiting_time = 0.0
+        self.total_time_loss = 0.0
+        self.travel_quantiles = {p: P2Quantile(p) for p in quantiles}
+        self.waiting_quantiles = {p: P2Quantile(p) for p in quantiles}
+
+    def add(self, travel, waiting, time_loss):
+        self.vehicles += 1
+        self.total_travel_time += travel
+        self.total_waiting_time += waiting
+        self.total_time_loss += time_loss
+        for estimator in self.travel_quantiles.values():
+            estimator.add(travel)
+        for estimator in self.waiting_quantiles.values():
+            estimator.add(waiting)
+
+    def summary(self):
+        n = self.vehicles
+        result = {
+            'vehicles_arrived': n,
+            'total_waiting_time': self.total_waiting_time,
+            'avg_waiting_time': self.total_waiting_time / n if n > 0 else 0.0,
+            'total_travel_time': self.total_travel_time,
+            'avg_travel_time': self.total_travel_time / n if n > 0 else 0.0,
+            'total_time_loss': self.total_time_loss,
+            'avg_time_loss': self.total_time_loss / n if n > 0 else 0.0,
+        }
+        for p, estimator in self.travel_quantiles.items():
+            result[f"travel_time_p{p * 100:g}"] = estimator.value
+        for p, estimator in self.waiting_quantiles.items():
+            result[f"waiting_time_p{p * 100:g}"] = estimator.value
+        return result
+
+
+def read_tripinfo(path, approaches=None, quantiles=(0.5, 0.9, 0.99)):
+    """
+    Trip KPIs of a SUMO --tripinfo-output file, streamed in constant memory.
+
+    Travel time is the tripinfo duration and waiting time SUMO's waitingTime
+    (seconds spent below 0.1 m/s), so these KPIs are not the per-step TraCI ones of
+    metrics_mode='traci' (results_store keeps the mode of every run). Only trips that
+    arrived are aggregated: 'vehicles_arrived' counts them, as in the TraCI summary. Trips still running at the end (written with
+    --tripinfo-output.write-unfinished) are reported apart as 'unfinished' with their
+    travel, waiting and time-loss totals so far ('unfinished_travel_time', ...).
+
+    A trip belongs to the approach of its departure edge; `approaches` maps edge IDs
+    to approach names (unmapped edges keep their ID). Trips without a departure lane
+    (vehicles already in the network when a warm-start run begins recording) are
+    counted in the totals but in no approach; 'unknown_approach' says how many.
+    Returns the overall summary with an 'approaches' dict of per-approach summaries.
+    """
+    approaches = approaches or {}
+    total = TripAggregate(quantiles)
+    per_approach = {}
+    unfinished = [0, 0.0, 0.0, 0.0]
+    unknown = 0
+    for trip in _iter_elements(path, 'tripinfo'):
+        travel = float(trip.get('duration'))
+        waiting = float(trip.get('waitingTime'))
+        time_loss = float(trip.get('timeLoss', 0.0))
+        if float(trip.get('arrival')) < 0:
+            unfinished[0] += 1
+            unfinished[1] += travel
+            unfinished[2] += waiting
+            unfinished[3] += time_loss
+            continue
+        total.add(travel, waiting, time_loss)
+        edge = trip.get('departLane', '').rsplit('_', 1)[0]
+        approach = approaches.get(edge, edge)
+        if not approach:
+            unknown += 1
+            continue
+        if approach not in per_approach:
+            per_approach[approach] = TripAggregate(quantiles)
+        per_approach[approach].add(travel, waiting, time_loss)
+    result = total.summary()
+    result['unfinished'] = unfinished[0]
+    result['unfinished_travel_time'] = unfinished[1]
+    result['unfinished_waiting_time'] = unfinished[2]
+    result['unfinished_time_loss'] = unfinished[3]
+    result['unknown_approach'] = unknown
+    result['approaches'] = {name: per_approach[name].summary() for name in sorted(per_approach)}
+    return result
+
+
+def read_detectors(path):
+    """
+    Per-detector totals of an e1 (induction loop) output file, streamed.
+
+    Returns {detector id: {'vehicles', 'occupancy', 'speed', 'intervals'}} where
+    vehicles is the summed nVehContrib, occupancy the time-weighted mean occupancy
+    (%) and speed the vehicle-weighted mean speed (m/s, intervals without vehicles
+    are skipped).
+    """
+    totals = {}
+    for interval in _iter_elements(path, 'interval'):
+        t = totals.setdefault(interval.get('id'), [0, 0.0, 0.0, 0.0, 0])
+        length = float(interval.get('end')) - float(interval.get('begin'))
+        vehicles = int(float(interval.get('nVehContrib')))
+        t[0] += vehicles
+        t[1] += float(interval.get('occupancy')) * length
+        t[2] += length
+        if vehicles > 0:
+            t[3] += float(interval.get('speed')) * vehicles
+        t[4] += 1
+    return {
+        det_id: {
+            'vehicles': vehicles,
+            'occupancy': occupancy / duration if duration > 0 else 0.0,
+            'speed': speed / vehicles if vehicles > 0 else 0.0,
+            'intervals': intervals,
+        }
+        for det_id, (vehicles, occupancy, duration, speed, intervals) in totals.items()
+    }
+
+
+def print_summary(summary, title):
+    """Prints a read_tripinfo() summary in the layout of the controllers' run summary."""
+    print(f"\n--- Simulation Summary ({title}, from tripinfo output) ---")
+    print(f"Total vehicles arrived: {summary['vehicles_arrived']}"
+          + (f" ({summary['unfinished']} still running)" if summary['unfinished'] else ""))
+    print(f"Total waiting time: {summary['total_waiting_time']:.2f}s, "
+          f"Average waiting time per vehicle: {summary['avg_waiting_time']:.2f}s")
+    print(f"Total travel time: {summary['total_travel_time']:.2f}s, "
+          f"Average travel time per vehicle: {summary['avg_travel_time']:.2f}s")
+    print(f"Travel time p50/p90/p99: {summary['travel_time_p50']:.1f}s / {summary['travel_time_p90']:.1f}s / "
+          f"{summary['travel_time_p99']:.1f}s")
+    for name, approach in summary['approaches'].items():
+        print(f"  {name:>8}: {approach['vehicles_arrived']} trips, "
+              f"wait p50/p90/p99 {approach['waiting_time_p50']:.1f}/{approach['waiting_time_p90']:.1f}/"
+              f"{approach['waiting_time_p99']:.1f}s, "
+              f"travel p50/p90/p99 {approach['travel_time_p50']:.1f}/{approach['travel_time_p90']:.1f}/"
+              f"{approach['travel_time_p99']:.1f}s")
+    if summary['unknown_approach']:
+        print(f"  {summary['unknown_approach']} trips without a departure lane are in no approach")
+
+
+def summary_row(summary, controller, steps, wall_time):
+    """
+    A read_tripinfo() summary as a controller summary() dict (flat, for result tables);
+    per-approach values become <approach>_<field> columns.
+    """
+    row = {'controller': controller, 'steps': steps}
+    row.update((key, value) for key, value in summary.items() if key != 'approaches')
+    arrived = summary['vehicles_arrived']
+    row['throughput'] = arrived / steps if steps > 0 else 0.0
+    row['wall_time'] = wall_time
+    row['steps_per_second'] = steps / wall_time if wall_time > 0 else 0.0
+    for name, approach in summary['approaches'].items():
+        for key in ('vehicles_arrived', 'avg_waiting_time', 'waiting_time_p50', 'waiting_time_p90',
+                    'waiting_time_p99', 'travel_time_p50', 'travel_time_p90', 'travel_time_p99'):
+            row[f"{name}_{key}"] = approach[key]
+    return row
@@ -0,0 +1,147 @@
+import multiprocessing
+import numpy as np
+from sumoenv import SumoEnv
+
+OBS_SIZE = SumoEnv.lane_len * len(SumoEnv.lane_ids) + 4 # Sel okupansi per lajur + one-hot 4 fase
+
+
+def _as_array(raw, dtype, shape):
+    return np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+
+def _worker_main(index, conn, buffers, num_envs, env_kwargs, action_duration, episode_steps):
+    """Runs one SumoEnv and writes its observation / reward / done into the shared buffers."""
+    obs = _as_array(buffers['obs'], np.float32, (num_envs, OBS_SIZE))
+    final_obs = _as_array(buffers['final_obs'], np.float32, (num_envs, OBS_SIZE))
+    rewards = _as_array(buffers['rewards'], np.float64, (num_envs,))
+    dones = _as_array(buffers['dones'], np.uint8, (num_envs,))
+    actions = _as_array(buffers['actions'], np.int64, (num_envs,))
+
+    env = SumoEnv(**env_kwargs)
+    elapsed = 0
+    try:
+        while True:
+            cmd = conn.recv()
+            if cmd == 'close':
+                break
+            try:
+                if cmd == 'reset':
+                    obs[index] = env.reset()
+                    elapsed = 0
+                elif cmd == 'step':
+                    env.set_traffic_light_phase(int(actions[index]), action_duration)
+                    for _ in range(action_duration):
+                        env.simulation_step()
+                    elapsed += action_duration
+                    rewards[index] = -env.get_waiting_time()
+                    done = elapsed >= episode_steps or env.traci.simulation.getMinExpectedNumber() == 0
+                    dones[index] = done
+                    if done: # Auto-reset: observasi terakhir disimpan di final_obs
+                        final_obs[index] = env.get_state()
+                        obs[index] = env.reset()
+                        elapsed = 0
+                    else:
+                        obs[index] = env.get_state()
+            except Exception as e: # Objek SWIG tidak bisa di-pickle, kirim sebagai teks
+                conn.send(repr(e))
+                continue
+            conn.send(None)
+    finally:
+        env.close()
+
+
+class VectorSumoEnv:
+    """
+    N SumoEnv instances stepped in lockstep, one subprocess each.
+
+    An action is the phase index each environment holds for `action_duration`
+    simulated seconds; the reward is minus the waiting time on the incoming lanes
+    after that. Observations (N, 124), rewards and done flags live in shared
+    memory, so only a short command string crosses the pipe per step. An episode
+    ends after `episode_steps` simulated seconds or when no vehicle is left; that
+    environment is reset right away and its last observation is kept in final_obs.
+    """
+
+    def __init__(self, num_envs, seeds=None, backend='libsumo', sumo_args=None,
+                 action_duration=5, episode_steps=3600, label='vec'):
+        self.num_envs = num_envs
+        self.action_duration = action_duration
+        self.episode_steps = episode_steps
+        seeds = list(seeds) if seeds is not None else list(range(23, 23 + num_envs))
+        if len(seeds) != num_envs:
+            raise ValueError(f"Expected {num_envs} seeds, got {len(seeds)}")
+
+        # spawn: setiap proses memuat libsumo sendiri
+        ctx = multiprocessing.get_context('spawn')
+        self._buffers = {
+            'obs': ctx.RawArray('f', num_envs * OBS_SIZE),
+            'final_obs': ctx.RawArray('f', num_envs * OBS_SIZE),
+            'rewards': ctx.RawArray('d', num_envs),
+            'dones': ctx.RawArray('B', num_envs),
+            'actions': ctx.RawArray('q', num_envs),
+        }
+        self.obs = _as_array(self._buffers['obs'], np.float32, (num_envs, OBS_SIZE))
+        self.final_obs = _as_array(self._buffers['final_obs'], np.float32, (num_envs, OBS_SIZE))
+        self.rewards = _as_array(self._buffers['rewards'], np.float64, (num_envs,))
+        self.dones = _as_array(self._buffers['dones'], np.uint8, (num_envs,))
+        self.actions = _as_array(self._buffers['actions'], np.int64, (num_envs,))
+
+        self._conns = []
+        self._procs = []
+        for i, seed in enumerate(seeds):
+            env_kwargs = {
+                'label': f"{label}_{i}",
+                'backend': backend,
+                'sumo_args': ['--seed', str(seed), '--no-step-log', 'true', '--no-warnings', 'true']
+                             + list(sumo_args or []),
+            }
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker_main, daemon=True,
+                               args=(i, child, self._buffers, num_envs, env_kwargs,
+                                     action_duration, episode_steps))
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _broadcast(self, cmd):
+        for conn in self._conns:
+            conn.send(cmd)
+        errors = [(i, conn.recv()) for i, conn in enumerate(self._conns)]
+        errors = [f"env {i}: {error}" for i, error in errors if error is not None]
+        if errors:
+            raise RuntimeError(f"VectorSumoEnv {cmd} failed: " + '; '.join(errors))
+
+    def reset(self):
+        """Resets every environment; returns the (N, 124) observations."""
+        self._broadcast('reset')
+        return self.obs.copy()
+
+    def step(self, actions):
+        """Applies one phase index per environment; returns (obs, rewards, dones) copies."""
+        self.actions[:] = actions
+        self._broadcast('step')
+        return self.obs.copy(), self.rewards.copy(), self.dones.astype(bool)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self._conns:
+            try:
+                conn.send('close')
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
@@ -0,0 +1,186 @@
+import math
+import numpy as np
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate with the P-square algorithm (Jain & Chlamtac, 1985):
+    five markers, O(1) memory and time per observation. Exact for the first five values.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        h = self._heights
+        if self.count <= 5:
+            h.append(x)
+            h.sort()
+            return
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if h[i] <= x < h[i + 1])
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # Interpolasi parabolik; linear jika hasilnya keluar dari urutan marker
+                q = h[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+                if not h[i - 1] < q < h[i + 1]:
+                    q = h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+                h[i] = q
+                n[i] += d
+
+    @property
+    def value(self):
+        if self.count == 0:
+            return math.nan
+        if self.count <= 5:
+            # Kuantil eksak (interpolasi linear) untuk sampel kecil
+            return float(np.quantile(self._heights, self.p))
+        return self._heights[2]
+
+
+class VehicleStats:
+    """
+    Per-vehicle trip statistics in compact arrays.
+
+    Vehicle IDs are interned to integer slots of growable NumPy arrays (departure
+    time, accumulated waiting time); a slot is recycled as soon as its vehicle
+    arrives. Finished trips only update running aggregates (count, sums and P-square
+    quantiles of travel and waiting time), so memory is bounded by the number of
+    vehicles in the network at once rather than by the length of the run.
+
+    The bulk methods take the departed / arrived ID lists of a simulation step.
+    Vehicles that were never registered through depart() or observe() (for example
+    the ones already in the network at start) can accumulate waiting time, but their
+    trips are not counted when they arrive.
+    """
+
+    def __init__(self, capacity=256, quantiles=(0.5, 0.9, 0.99)):
+        self._slots = {}
+        self._free = []
+        self.depart_time = np.full(capacity, np.nan)
+        self.waiting_time = np.zeros(capacity)
+        self.quantile_levels = tuple(quantiles)
+        self.reset()
+
+    def reset(self):
+        self._slots.clear()
+        self._free = list(range(len(self.depart_time) - 1, -1, -1))
+        self.depart_time[:] = np.nan
+        self.waiting_time[:] = 0.0
+        self.arrived = 0
+        self.total_travel_time = 0.0
+        self.total_waiting_time = 0.0
+        self.travel_quantiles = {p: P2Quantile(p) for p in self.quantile_levels}
+        self.waiting_quantiles = {p: P2Quantile(p) for p in self.quantile_levels}
+
+    def __len__(self):
+        """Number of vehicles currently tracked."""
+        return len(self._slots)
+
+    def __contains__(self, veh_id):
+        return veh_id in self._slots
+
+    @property
+    def capacity(self):
+        return len(self.depart_time)
+
+    def _grow(self):
+        old = self.capacity
+        self.depart_time = np.concatenate([self.depart_time, np.full(old, np.nan)])
+        self.waiting_time = np.concatenate([self.waiting_time, np.zeros(old)])
+        self._free.extend(range(2 * old - 1, old - 1, -1))
+
+    def _intern(self, veh_ids):
+        """Slots of `veh_ids` (a list), allocating fresh slots for unknown IDs."""
+        lookup = self._slots
+        slots = [lookup.get(veh_id, -1) for veh_id in veh_ids]
+        if -1 in slots:
+            for k, slot in enumerate(slots):
+                if slot < 0:
+                    if not self._free:
+                        self._grow()
+                    slot = slots[k] = lookup[veh_ids[k]] = self._free.pop()
+                    self.depart_time[slot] = np.nan
+                    self.waiting_time[slot] = 0.0
+        return slots
+
+    def depart(self, veh_ids, time):
+        """Registers (or re-registers) the departure time of `veh_ids`."""
+        veh_ids = list(veh_ids)
+        if veh_ids:
+            slots = self._intern(veh_ids) # Sebelum mengindeks: _intern bisa memperbesar array
+            self.depart_time[slots] = time
+
+    def observe(self, veh_ids, time):
+        """Registers `time` as departure for the IDs seen for the first time."""
+        lookup = self._slots
+        new_ids = [veh_id for veh_id in veh_ids if veh_id not in lookup]
+        if new_ids:
+            slots = self._intern(new_ids)
+            self.depart_time[slots] = time
+
+    def add_waiting(self, veh_ids, waiting_times):
+        """Adds one step of waiting time per vehicle (e.g. LaneMetrics.vehicle_waiting_time)."""
+        veh_ids = list(veh_ids)
+        if veh_ids:
+            slots = self._intern(veh_ids)
+            self.waiting_time[slots] += np.fromiter(waiting_times, dtype=np.float64, count=len(slots))
+
+    def arrive(self, veh_ids, time):
+        """Closes the trips of `veh_ids`, frees their slots and returns how many were counted."""
+        counted = 0
+        lookup = self._slots
+        for veh_id in veh_ids:
+            slot = lookup.pop(veh_id, None)
+            if slot is None:
+                continue
+            self._free.append(slot)
+            depart = self.depart_time[slot]
+            if math.isnan(depart):
+                continue
+            travel = time - float(depart)
+            waiting = float(self.waiting_time[slot])
+            counted += 1
+            self.total_travel_time += travel
+            self.total_waiting_time += waiting
+            for estimator in self.travel_quantiles.values():
+                estimator.add(travel)
+            for estimator in self.waiting_quantiles.values():
+                estimator.add(waiting)
+        self.arrived += counted
+        return counted
+
+    def summary(self):
+        """Trip aggregates: count, mean and quantiles (suffix _p50 etc.) of travel/waiting time."""
+        n = self.arrived
+        result = {
+            'arrived': n,
+            'avg_travel_time': self.total_travel_time / n if n > 0 else 0.0,
+            'avg_vehicle_waiting_time': self.total_waiting_time / n if n > 0 else 0.0,
+        }
+        for p, estimator in self.travel_quantiles.items():
+            result[f"travel_time_p{p * 100:g}"] = estimator.value
+        for p, estimator in self.waiting_quantiles.items():
+            result[f"waiting_time_p{p * 100:g}"] = estimator.value
+        return result
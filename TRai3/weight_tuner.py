@@ -0,0 +1,188 @@
+"""
+Cost-weight tuning for TrafficLightCSP with successive halving.
+
+Weight configurations are sampled log-uniformly around the hand-set defaults,
+together with min_green: with positive weights the waiting-time and vehicle-count
+terms are the same for every plan of a decision, so the cost weights alone hardly
+ever move the chosen split and the green bounds do most of the work. They are
+evaluated with batch_runner in parallel headless workers (tripinfo metrics,
+fast-forward stepping). Every rung runs the surviving configurations on a
+longer step budget and keeps the best 1/eta of them, so most configurations
+are dropped after a short run. The winner is written as a JSON profile that
+TrafficLightCSP.load_weights() and `batch_runner.py --weights` read.
+
+    python weight_tuner.py --configs 27 --budgets 250 750 2250 --seeds 23 24 --out weights/tuned.json
+"""
+import argparse
+import datetime
+import json
+import os
+import time
+
+import numpy as np
+
+from batch_runner import run_grid, write_table
+from green_solver import DEFAULT_WEIGHTS, WEIGHT_NAMES
+from traffic_light_csp import DEFAULT_TIMING, TIMING_NAMES
+
+# Kendaraan yang belum tiba saat anggaran langkah habis ikut dihitung (lihat objective_value), agar
+# konfigurasi yang menahan satu arah tidak terlihat bagus hanya karena kendaraannya belum sampai
+TUNER_SUMO_ARGS = ['--tripinfo-output.write-unfinished', 'true']
+TUNED_NAMES = WEIGHT_NAMES + TIMING_NAMES
+OBJECTIVES = ('avg_waiting_time', 'avg_time_loss', 'avg_travel_time', 'waiting_time_p90', 'travel_time_p90')
+# Objektif rata-rata -> kolom total tripinfo yang dipakai untuk menghitungnya
+_MEAN_TOTALS = {'avg_waiting_time': 'waiting_time', 'avg_time_loss': 'time_loss', 'avg_travel_time': 'travel_time'}
+
+
+def default_weights():
+    """Cost weights and green bounds a fresh TrafficLightCSP starts with."""
+    return dict(DEFAULT_WEIGHTS, **DEFAULT_TIMING)
+
+
+def objective_value(row, objective):
+    """
+    `objective` of a tripinfo result row. The mean objectives also count the trips
+    still running at the end with their time so far (the row KPIs cover arrived trips
+    only); the quantile objectives are those of the arrived trips.
+    """
+    if objective not in _MEAN_TOTALS:
+        return row[objective]
+    name = _MEAN_TOTALS[objective]
+    trips = row['vehicles_arrived'] + row['unfinished']
+    total = row[f"total_{name}"] + row[f"unfinished_{name}"]
+    return total / trips if trips > 0 else 0.0
+
+
+def sample_configs(n, base, spread=4.0, min_green=(10, 40), seed=0):
+    """
+    `base` followed by n - 1 configurations: each cost weight log-uniform in
+    [w / spread, w * spread], min_green a uniform integer in the `min_green` range
+    (max_green is kept, but at least min_green + 5 so the imbalance rule stays feasible).
+    """
+    rng = np.random.default_rng(seed)
+    configs = [dict(base)]
+    for _ in range(n - 1):
+        factors = np.exp(rng.uniform(-np.log(spread), np.log(spread), size=len(WEIGHT_NAMES)))
+        config = {name: float(base[name] * f) for name, f in zip(WEIGHT_NAMES, factors)}
+        config['min_green'] = int(rng.integers(min_green[0], min_green[1] + 1))
+        config['max_green'] = max(int(base['max_green']), config['min_green'] + 5)
+        configs.append(config)
+    return configs
+
+
+def evaluate(configs, indices, budget, seeds, scale, out_dir, workers, backend):
+    """Runs configs[indices] on every seed with `budget` steps; returns the result rows."""
+    specs = []
+    for i in indices:
+        for seed in seeds:
+            specs.append({
+                'run': len(specs),
+                'controller': 'csp',
+                'seed': seed,
+                'scale': scale,
+                'steps': budget,
+                'config': i,
+                'weights': configs[i],
+            })
+    rows = run_grid(specs, out_dir=out_dir, workers=workers, backend=backend, metrics_mode='tripinfo',
+                    fast_forward=True, extra_sumo_args=TUNER_SUMO_ARGS)
+    for row in rows: # Satu kolom per bobot di tabel hasil
+        row.update(row.pop('weights'))
+    return rows
+
+
+def successive_halving(configs, budgets, seeds=(23,), eta=3, scale=1.0, objective='avg_waiting_time',
+                       out_dir='tuning', workers=None, backend='libsumo'):
+    """
+    Successive halving over `configs` (lower objective is better).
+
+    Returns (best index, {index: score at the last budget it reached}, all result rows).
+    Configuration 0 (the baseline) is always evaluated and ranked on the final budget
+    as well, so the winner is never worse than it there.
+    """
+    survivors = list(range(len(configs)))
+    scores = {}
+    rows = []
+    for rung, budget in enumerate(budgets):
+        last = rung == len(budgets) - 1
+        indices = survivors + [0] if last and 0 not in survivors else survivors
+        rung_rows = evaluate(configs, indices, budget, seeds, scale,
+                             os.path.join(out_dir, f"rung{rung}"), workers, backend)
+        for row in rung_rows:
+            row['rung'] = rung
+        rows += rung_rows
+        for i in indices:
+            scores[i] = float(np.mean([objective_value(row, objective) for row in rung_rows
+                                       if row['config'] == i]))
+        ranked = sorted(indices, key=lambda i: scores[i])
+        print(f"Rung {rung}: {len(indices)} config(s) x {len(seeds)} seed(s) at {budget} steps, "
+              f"best {objective} {scores[ranked[0]]:.2f} (config {ranked[0]})")
+        survivors = ranked[:max(1, len(survivors) // eta)] if not last else ranked[:1]
+    return survivors[0], scores, rows
+
+
+def write_profile(path, weights, **info):
+    """Writes a weight profile: {'weights': {...}} plus tuning metadata."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    profile = {'weights': weights}
+    profile.update(info)
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    return profile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the CSP cost weights with successive halving (headless).")
+    parser.add_argument('--configs', type=int, default=27, help="Sampled configurations (the first is the default)")
+    parser.add_argument('--budgets', nargs='+', type=int, default=[250, 750, 2250],
+                        help="Step budget of each rung, increasing")
+    parser.add_argument('--eta', type=int, default=3, help="Keep the best 1/eta configurations per rung")
+    parser.add_argument('--seeds', nargs='+', type=int, default=[23])
+    parser.add_argument('--scale', type=float, default=1.0, help="SUMO --scale demand multiplier")
+    parser.add_argument('--spread', type=float, default=4.0, help="Weights are sampled in [w / spread, w * spread]")
+    parser.add_argument('--min-green', nargs=2, type=int, default=[10, 40], metavar=('LO', 'HI'),
+                        help="Range min_green is sampled from (seconds)")
+    parser.add_argument('--objective', default='avg_waiting_time', choices=OBJECTIVES)
+    parser.add_argument('--sample-seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="Default: number of CPUs")
+    parser.add_argument('--backend', default='libsumo', choices=('libsumo', 'traci'))
+    parser.add_argument('--out-dir', default='tuning')
+    parser.add_argument('--out', default=os.path.join('weights', 'tuned.json'), help="Weight profile to write")
+    args = parser.parse_args(argv)
+    if sorted(args.budgets) != args.budgets:
+        parser.error("--budgets must be increasing")
+
+    configs = sample_configs(args.configs, default_weights(), args.spread, tuple(args.min_green),
+                             args.sample_seed)
+    start = time.perf_counter()
+    best, scores, rows = successive_halving(configs, args.budgets, args.seeds, args.eta, args.scale,
+                                            args.objective, args.out_dir, args.workers, args.backend)
+    elapsed = time.perf_counter() - start
+    write_table(rows, os.path.join(args.out_dir, 'tuning_results.csv'))
+
+    # Perbandingan biaya: semua konfigurasi dijalankan penuh pada anggaran terbesar
+    simulated = sum(args.budgets[row['rung']] for row in rows)
+    exhaustive = args.configs * len(args.seeds) * args.budgets[-1]
+    write_profile(args.out, configs[best],
+                  objective=args.objective,
+                  score=scores[best],
+                  default_score=scores[0],
+                  budget=args.budgets[-1],
+                  seeds=args.seeds,
+                  scale=args.scale,
+                  configs=args.configs,
+                  simulated_steps=simulated,
+                  wall_time=elapsed,
+                  created=datetime.datetime.now().isoformat(timespec='seconds'))
+    print(f"Best config {best}: {args.objective} {scores[best]:.2f} (default {scores[0]:.2f}), "
+          f"profile written to {args.out}")
+    if best == 0:
+        print("No sampled configuration beat the default on the final budget")
+    print(f"{len(rows)} runs, {simulated} simulated steps ({simulated / exhaustive:.0%} of running every "
+          f"config on the full budget) in {elapsed:.1f}s")
+    for name in TUNED_NAMES:
+        print(f"  {name:>32}: {configs[best][name]:.4g}")
+
+
+if __name__ == "__main__":
+    main()